@@ -2,6 +2,9 @@
 ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with gunicorn's ASGI worker, e.g.
+``gunicorn config.asgi --worker-class asgi --workers 2``; the async
+endpoints under /api/async/ then run on the workers' event loops.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
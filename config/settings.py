@@ -1,12 +1,9 @@
 import os
 import dj_database_url
-import cloudinary
-import cloudinary.uploader
-import cloudinary.api
 
 from datetime import timedelta
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -27,7 +24,6 @@ INSTALLED_APPS = [
 
     'cloudinary_storage',
     'django.contrib.staticfiles',
-    'cloudinary',
 
     'rest_framework',
     'corsheaders',
@@ -38,7 +34,9 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'store.middleware.AsyncWhiteNoiseMiddleware',
+    'store.middleware.RequestMetricsMiddleware',
+    'store.middleware.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -65,6 +63,77 @@ DATABASES = {
     )
 }
 
+# Optional read replica for catalog, order list and analytics reads
+# (store.routers.ReplicaRouter). Locally, point it at a copy of the
+# SQLite database, e.g. REPLICA_DATABASE_URL=sqlite:////tmp/replica.sqlite3.
+REPLICA_DATABASE_ALIAS = config('REPLICA_DATABASE_ALIAS', default='replica')
+REPLICA_DATABASE_URL = config('REPLICA_DATABASE_URL', default='')
+if REPLICA_DATABASE_URL:
+    DATABASES[REPLICA_DATABASE_ALIAS] = dj_database_url.parse(
+        REPLICA_DATABASE_URL,
+        conn_max_age=600,
+        conn_health_checks=True,
+    )
+# Seconds a client that wrote keeps reading from the primary.
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=5, cast=int)
+
+DATABASE_ROUTERS = ['store.routers.ReplicaRouter']
+
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=300, cast=int)
+CATALOG_CACHE_LRU_SIZE = config('CATALOG_CACHE_LRU_SIZE', default=256, cast=int)
+CATALOG_VERSION_TIMEOUT = config('CATALOG_VERSION_TIMEOUT', default=60, cast=int)
+CART_SNAPSHOT_TIMEOUT = config('CART_SNAPSHOT_TIMEOUT', default=600, cast=int)
+
+# How long a pending order keeps the stock taken at checkout
+# (store.services.stock; expired holds are released by release_stock_holds).
+STOCK_HOLD_MINUTES = config('STOCK_HOLD_MINUTES', default=30, cast=int)
+
+# Request metrics (store.middleware.RequestMetricsMiddleware).
+SERVER_TIMING = config('SERVER_TIMING', default=True, cast=bool)
+QUERY_BUDGET = config('QUERY_BUDGET', default=30, cast=int)
+# Per-route overrides by URL name, e.g. "product-list=4,cart-list=3".
+QUERY_BUDGETS = {
+    route: int(budget)
+    for route, budget in (item.split('=') for item in config('QUERY_BUDGETS', default='', cast=Csv()))
+}
+
+# Seconds a worker may take to import the app (manage.py startup_profile).
+STARTUP_BUDGET = config('STARTUP_BUDGET', default=2.0, cast=float)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        # INFO adds one JSON line per request (store.requests); warnings,
+        # such as exceeded query budgets, are logged either way.
+        'store': {
+            'handlers': ['console'],
+            'level': config('STORE_LOG_LEVEL', default='WARNING'),
+        },
+    },
+}
+
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
@@ -117,31 +186,19 @@ USE_TZ = True
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
-# CLOUDINARY_STORAGE = {
-#     'CLOUD_NAME': config('CLOUDINARY_CLOUD_NAME'),
-#     'API_KEY': config('CLOUDINARY_API_KEY'),
-#     'API_SECRET': config('CLOUDINARY_API_SECRET'),
-# }
-
-cloudinary.config( 
-  cloud_name = config('CLOUDINARY_CLOUD_NAME'), 
-  api_key = config('CLOUDINARY_API_KEY'), 
-  api_secret = config('CLOUDINARY_API_SECRET'),
-  secure = True
-)
-print("--- CLOUDINARY DEBUG START ---")
-print(f"CLOUD_NAME: {cloudinary.config().cloud_name}")
-print(f"API_KEY: {cloudinary.config().api_key}")
-secret = cloudinary.config().api_secret
-if secret:
-    print(f"SECRET_PREFIX: {secret[:4]}... (Total Length: {len(secret)})")
-else:
-    print("SECRET_PREFIX: None")
-print("--- CLOUDINARY DEBUG END ---")
+# Read by cloudinary_storage, which configures the Cloudinary SDK the first
+# time the media storage is used rather than when settings load.
+CLOUDINARY_STORAGE = {
+    'CLOUD_NAME': config('CLOUDINARY_CLOUD_NAME'),
+    'API_KEY': config('CLOUDINARY_API_KEY'),
+    'API_SECRET': config('CLOUDINARY_API_SECRET'),
+    'SECURE': True,
+}
 
 STORAGES = {
     "default": {
-        "BACKEND": "cloudinary_storage.storage.MediaCloudinaryStorage",
+        # store.storage.VariantFileSystemStorage serves MEDIA_ROOT locally.
+        "BACKEND": config("MEDIA_STORAGE_BACKEND", default="store.storage.VariantCloudinaryStorage"),
     },
     "staticfiles": {
         "BACKEND": "whitenoise.storage.StaticFilesStorage",
@@ -179,5 +236,14 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+ANALYTICS_CACHE_TIMEOUT = config("ANALYTICS_CACHE_TIMEOUT", default=300, cast=int)
+
 PAYSTACK_SECRET_KEY = config("PAYSTACK_SECRET_KEY")
+PAYSTACK_BASE_URL = config("PAYSTACK_BASE_URL", default="https://api.paystack.co")
+PAYSTACK_CONNECT_TIMEOUT = config("PAYSTACK_CONNECT_TIMEOUT", default=3.05, cast=float)
+PAYSTACK_READ_TIMEOUT = config("PAYSTACK_READ_TIMEOUT", default=10, cast=float)
+PAYSTACK_DEADLINE = config("PAYSTACK_DEADLINE", default=15, cast=float)
+PAYSTACK_MAX_RETRIES = config("PAYSTACK_MAX_RETRIES", default=2, cast=int)
+PAYSTACK_BREAKER_THRESHOLD = config("PAYSTACK_BREAKER_THRESHOLD", default=5, cast=int)
+PAYSTACK_BREAKER_RESET = config("PAYSTACK_BREAKER_RESET", default=30, cast=float)
 ADMIN_REGISTRATION_KEY = config('ADMIN_REGISTRATION_KEY')
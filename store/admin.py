@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import OrderItem, Order, Product
+from .models import OrderItem, Order, Product, PaystackEvent
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
@@ -17,4 +17,11 @@ class OrderAdmin(admin.ModelAdmin):
     list_filter = ('status', 'created_at')
     search_fields = ('user__email', 'id', 'paystack_reference')
     inlines = [OrderItemInline]
-    ordering = ('-created_at',)
\ No newline at end of file
+    ordering = ('-created_at',)
+
+
+@admin.register(PaystackEvent)
+class PaystackEventAdmin(admin.ModelAdmin):
+    list_display = ('event', 'reference', 'received_at', 'processed_at')
+    list_filter = ('event', 'processed_at')
+    search_fields = ('reference', 'event_id')
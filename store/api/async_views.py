@@ -0,0 +1,134 @@
+import hashlib
+
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import APIException, NotAuthenticated, NotFound
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+
+from store.models import Cart, Category, Product
+from store.pagination import KeysetPagination
+from store.serializers import CategorySerializer, ProductSerializer
+from store.services import cart_snapshot, catalog_versions
+from store.services.catalog_cache import get_catalog_cache
+from store.services.product_filters import afacet_counts, filter_products
+from store.services.query_optimizer import optimize_for_serializer
+
+# Async read paths for the catalog and cart, mounted under /api/async/.
+# They answer like their sync counterparts (same payloads, ETags, catalog
+# cache and cart snapshot) but use the async ORM and cache APIs, so under
+# an ASGI server (see config/asgi.py) one worker can have many of them in
+# flight. Serializers run on the event loop: every relation they read is
+# loaded up front by optimize_for_serializer.
+
+
+def _error(exc, headers=None):
+    detail = exc.detail if isinstance(exc.detail, (dict, list)) else {"detail": exc.detail}
+    return JsonResponse(detail, status=exc.status_code, safe=False, headers=headers)
+
+
+async def _catalog_response(request, catalog_models, namespace, build):
+    """
+    What CatalogConditionalGetMixin and CatalogCacheMixin do for the sync
+    catalog views: 304 while the catalog versions match the client's
+    validators, else the cached payload, else ``await build(request)``.
+    """
+    request = Request(request)
+    token, modified = await catalog_versions.acurrent(*catalog_models)
+    digest = hashlib.md5(f"{token}:{request.get_full_path()}:json".encode()).hexdigest()
+    etag = f'"{digest}"'
+    last_modified = int(modified.timestamp()) if modified else None
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    catalog_cache = get_catalog_cache()
+    key = catalog_cache.make_key(namespace, token, request)
+    data = await catalog_cache.aget(key)
+    if data is None:
+        try:
+            data = await build(request)
+        except APIException as exc:
+            return _error(exc)
+        await catalog_cache.aset(key, data)
+
+    response = JsonResponse(data, safe=False)
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+def _products(request):
+    return optimize_for_serializer(
+        filter_products(Product.objects.all(), request.query_params), ProductSerializer,
+        restrict_fields=True,
+    )
+
+
+async def _product_list(request):
+    queryset = _products(request)
+    context = {"request": request}
+    paginator = KeysetPagination()
+    page = await paginator.apaginate_queryset(queryset, request)
+    if page is None:
+        data = ProductSerializer([product async for product in queryset], many=True, context=context).data
+    else:
+        data = paginator.get_paginated_data(ProductSerializer(page, many=True, context=context).data)
+
+    if request.query_params.get("facets") in ("1", "true"):
+        facets = await afacet_counts(filter_products(Product.objects.all(), request.query_params))
+        if isinstance(data, dict):
+            data["facets"] = facets
+        else:
+            data = {"results": data, "facets": facets}
+    return data
+
+
+@require_safe
+async def product_list(request):
+    return await _catalog_response(request, ("product",), "async-products", _product_list)
+
+
+@require_safe
+async def product_detail(request, pk):
+    async def build(request):
+        product = await _products(request).filter(pk=pk).afirst()
+        if product is None:
+            raise NotFound("No Product matches the given query.")
+        return ProductSerializer(product, context={"request": request}).data
+
+    return await _catalog_response(request, ("product",), "async-products", build)
+
+
+async def _category_list(request):
+    queryset = optimize_for_serializer(Category.objects.all(), CategorySerializer, restrict_fields=True)
+    categories = [category async for category in queryset]
+    return CategorySerializer(categories, many=True, context={"request": request}).data
+
+
+@require_safe
+async def category_list(request):
+    return await _catalog_response(request, ("category",), "async-categories", _category_list)
+
+
+@require_safe
+async def cart_list(request):
+    request = Request(request)
+    # Stateless, like CartViewSet.list: the token alone identifies the user.
+    authenticator = JWTStatelessUserAuthentication()
+    try:
+        auth = authenticator.authenticate(request)
+        if auth is None:
+            raise NotAuthenticated()
+    except APIException as exc:
+        return _error(exc, headers={"WWW-Authenticate": authenticator.authenticate_header(request)})
+
+    user = auth[0]
+    data = await cart_snapshot.aget(user.pk)
+    if data is None:
+        cart, _ = await Cart.objects.aget_or_create(user_id=user.pk)
+        data = await cart_snapshot.abuild(cart, request)
+    return JsonResponse(data)
@@ -0,0 +1,16 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.permissions import IsAdminUser
+from store.services.catalog_cache import get_catalog_cache
+
+
+class CatalogCacheStats(APIView):
+    authentication_classes = [
+        JWTAuthentication,
+    ]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        # Counters are per worker process.
+        return Response(get_catalog_cache().stats())
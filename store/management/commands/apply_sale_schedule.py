@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store.services.sale_schedule import apply_sale_schedule
+
+
+class Command(BaseCommand):
+    help = "Start and end the scheduled sales whose sale_starts_at or sale_ends_at has passed."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop", action="store_true",
+            help="Keep applying the schedule instead of exiting after one pass.",
+        )
+        parser.add_argument("--sleep", type=float, default=60.0, help="Seconds to wait between passes.")
+
+    def handle(self, *args, **options):
+        while True:
+            started, ended = apply_sale_schedule()
+            if started or ended:
+                self.stdout.write(f"Started {started} sales, ended {ended}")
+            if not options["loop"]:
+                break
+            time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS("Sale schedule applied"))
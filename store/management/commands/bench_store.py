@@ -0,0 +1,109 @@
+import json
+import os
+import subprocess
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from store.services import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every store and accounts endpoint at several data sizes. Runs "
+        "against a throwaway test database and writes the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", default="100,1000",
+            help="Comma separated catalog sizes (products); other volumes scale with them.",
+        )
+        parser.add_argument("--repeat", type=int, default=20, help="Requests per endpoint and size.")
+        parser.add_argument("--cold-cache", action="store_true", help="Clear caches before every request.")
+        parser.add_argument("--only", help="Comma separated endpoint names to run.")
+        parser.add_argument("--output", default="bench-results.json")
+        parser.add_argument("--compare", help="Earlier results file to compare against.")
+        parser.add_argument(
+            "--throughput", action="store_true",
+            help="Also compare concurrent throughput of the sync and async routes under gunicorn.",
+        )
+        parser.add_argument("--workers", type=int, default=2, help="gunicorn workers for --throughput.")
+        parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients for --throughput.")
+        parser.add_argument("--requests", type=int, default=2000, help="Requests per route for --throughput.")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options["sizes"].split(",")]
+        except ValueError:
+            raise CommandError("--sizes must be a comma separated list of integers")
+
+        endpoints = benchmark.ENDPOINTS
+        if options["only"]:
+            wanted = set(options["only"].split(","))
+            endpoints = [endpoint for endpoint in endpoints if endpoint.name in wanted]
+            unknown = wanted - {endpoint.name for endpoint in endpoints}
+            if unknown:
+                raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"]) as source:
+                baseline = json.load(source)
+
+        workdir = tempfile.TemporaryDirectory()
+        if options["throughput"] and connection.vendor == "sqlite":
+            # The gunicorn servers need a database file they can open.
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(workdir.name, "bench.sqlite3")
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            report = benchmark.run_benchmark(
+                sizes, repeat=options["repeat"], cold_cache=options["cold_cache"],
+                endpoints=endpoints, progress=self.report_row,
+            )
+            if options["throughput"]:
+                report["throughput"] = benchmark.run_throughput(
+                    workers=options["workers"], concurrency=options["concurrency"],
+                    requests=options["requests"], progress=self.report_throughput,
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            workdir.cleanup()
+
+        report["created_at"] = timezone.now().isoformat()
+        report["commit"] = self.commit()
+        with open(options["output"], "w") as target:
+            json.dump(report, target, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+        if baseline:
+            for row in benchmark.compare(report, baseline):
+                self.stdout.write(
+                    f"{row['size']:>8} {row['endpoint']:<28} p50 x{row['p50_ratio']} "
+                    f"queries {row['queries_delta']:+d}"
+                )
+
+    def report_row(self, result):
+        status = "/".join(str(code) for code in result["status"])
+        self.stdout.write(
+            f"{result['size']:>8} {result['endpoint']:<28} {status:<8} "
+            f"p50 {result['p50_ms']:>9.2f}ms  p95 {result['p95_ms']:>9.2f}ms  "
+            f"queries {result['queries']}"
+        )
+
+    def report_throughput(self, result):
+        self.stdout.write(
+            f"{result['server']:>8} {result['endpoint']:<28} {result['rps']:>9.1f} req/s  "
+            f"p50 {result['p50_ms']:>9.2f}ms  p95 {result['p95_ms']:>9.2f}ms  errors {result['errors']}"
+        )
+
+    def commit(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
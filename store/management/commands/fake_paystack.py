@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from store.services.fake_paystack import FakePaystackServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local fake Paystack API. Point PAYSTACK_BASE_URL at it to "
+        "exercise payment latency and failures offline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--latency", type=float, default=0.0, help="Seconds to delay each answer.")
+        parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of answers that are HTTP 500.")
+
+    def handle(self, *args, **options):
+        server = FakePaystackServer(
+            host=options["host"],
+            port=options["port"],
+            latency=options["latency"],
+            failure_rate=options["failure_rate"],
+        )
+        self.stdout.write(f"Fake Paystack listening on {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
@@ -0,0 +1,40 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.services import product_import
+
+
+class Command(BaseCommand):
+    help = "Create or update products in bulk from a CSV or JSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSON file to import.")
+        parser.add_argument(
+            "--format", choices=["csv", "json"],
+            help="File format (default: from the file extension).",
+        )
+        parser.add_argument("--batch-size", type=int, default=product_import.BATCH_SIZE)
+        parser.add_argument("--dry-run", action="store_true", help="Validate without writing.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or os.path.splitext(path)[1].lstrip(".").lower()
+        try:
+            with open(path, "rb") as source:
+                rows = product_import.read_rows(source.read(), fmt)
+        except (OSError, product_import.ImportFormatError) as exc:
+            raise CommandError(exc)
+
+        summary = product_import.import_products(
+            rows, batch_size=options["batch_size"], dry_run=options["dry_run"]
+        )
+        for error in summary["errors"]:
+            self.stderr.write(f"row {error['row']}: {json.dumps(error['errors'])}")
+
+        prefix = "Would import" if options["dry_run"] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}: {summary['created']} created, {summary['updated']} updated, "
+            f"{summary['unchanged']} unchanged, {len(summary['errors'])} errors"
+        ))
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_datetime
+
+from store.models import PaystackEvent
+from store.services.paystack_events import process_pending_events
+
+
+class Command(BaseCommand):
+    help = "Apply queued Paystack webhook events in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--loop", action="store_true",
+            help="Keep polling for new events instead of exiting when the queue is empty.",
+        )
+        parser.add_argument("--sleep", type=float, default=2.0, help="Seconds to wait between polls.")
+        parser.add_argument(
+            "--replay-since",
+            help="Mark events received since this ISO datetime unprocessed before starting.",
+        )
+
+    def handle(self, *args, **options):
+        if options["replay_since"]:
+            since = parse_datetime(options["replay_since"])
+            if since is None:
+                self.stderr.write(self.style.ERROR("--replay-since must be an ISO datetime"))
+                return
+            count = PaystackEvent.objects.filter(received_at__gte=since).update(processed_at=None)
+            self.stdout.write(f"Re-queued {count} events")
+
+        total = 0
+        while True:
+            handled = process_pending_events(options["batch_size"])
+            total += handled
+            if handled:
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} events"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from store.services.product_stats import rebuild_product_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized review and sales counters on Product."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "product_ids", nargs="*", type=int,
+            help="Only rebuild these products (default: all).",
+        )
+
+    def handle(self, *args, **options):
+        updated = rebuild_product_stats(options["product_ids"] or None)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {updated} products"))
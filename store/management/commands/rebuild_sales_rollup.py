@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from store.services.sales_rollup import rebuild_sales_rollup
+
+
+class Command(BaseCommand):
+    help = "Backfill the SalesRollup cube from the Order and OrderItem tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Only rebuild days from this date (YYYY-MM-DD) on.")
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            since = parse_date(options["since"])
+            if since is None:
+                raise CommandError("--since must be a YYYY-MM-DD date")
+
+        cells = rebuild_sales_rollup(since)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {cells} rollup cells"))
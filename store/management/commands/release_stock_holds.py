@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store.services.paystack_events import settle_expired_payments
+from store.services.stock import expire_holds
+
+
+class Command(BaseCommand):
+    help = (
+        "Cancel pending orders whose stock hold has expired and put their stock back; "
+        "orders with a Paystack payment are checked with Paystack first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--loop", action="store_true",
+            help="Keep checking for expired holds instead of exiting when there are none.",
+        )
+        parser.add_argument("--sleep", type=float, default=60.0, help="Seconds to wait between checks.")
+
+    def handle(self, *args, **options):
+        total = settled = 0
+        while True:
+            released = expire_holds(options["batch_size"])
+            total += released
+            if released:
+                continue
+            checked = settle_expired_payments(options["batch_size"])
+            settled += checked
+            if checked:
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(f"Released {total} expired holds, settled {settled} payments"))
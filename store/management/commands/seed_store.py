@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store.services.seed_data import SEED_PASSWORD, seed_store
+
+
+class Command(BaseCommand):
+    help = "Add synthetic users, catalog, reviews, carts and orders for development and benchmarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--categories", type=int, default=10)
+        parser.add_argument("--products", type=int, default=200)
+        parser.add_argument("--reviews", type=int, default=400)
+        parser.add_argument("--carts", type=int, default=20)
+        parser.add_argument("--orders", type=int, default=300)
+        parser.add_argument("--items-per-order", type=int, default=3)
+        parser.add_argument("--days", type=int, default=90, help="Spread orders over this many days.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed (same seed, same data).")
+        parser.add_argument("--prefix", default="seed", help="Prefix for generated names.")
+
+    def handle(self, *args, **options):
+        try:
+            created = seed_store(
+                users=options["users"],
+                categories=options["categories"],
+                products=options["products"],
+                reviews=options["reviews"],
+                carts=options["carts"],
+                orders=options["orders"],
+                items_per_order=options["items_per_order"],
+                days=options["days"],
+                seed=options["seed"],
+                prefix=options["prefix"],
+            )
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        summary = ", ".join(f"{count} {name}" for name, count in created.items())
+        self.stdout.write(self.style.SUCCESS(f"Created {summary}"))
+        if created["users"]:
+            self.stdout.write(f"Seeded users log in with password {SEED_PASSWORD!r}")
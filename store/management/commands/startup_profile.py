@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from store.services import startup
+
+
+class Command(BaseCommand):
+    help = (
+        "Boot the app in a fresh interpreter and report what its imports cost, "
+        "per package or per module imported at startup."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--by", choices=["package", "module"], default="package")
+        parser.add_argument("--limit", type=int, default=20, help="Rows to show.")
+        parser.add_argument(
+            "--budget", type=float,
+            help=f"Fail when startup takes longer (seconds, default STARTUP_BUDGET={settings.STARTUP_BUDGET}).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            profile = startup.profile_startup()
+        except startup.StartupError as exc:
+            raise CommandError(f"App failed to start: {exc}")
+
+        rows = startup.by_package if options["by"] == "package" else startup.by_module
+        self.stdout.write(f"{options['by']:<50} {'ms':>9}")
+        for name, micros in rows(profile["imports"])[:options["limit"]]:
+            self.stdout.write(f"{name:<50} {micros / 1000:>9.1f}")
+
+        budget = options["budget"] or settings.STARTUP_BUDGET
+        total = profile["total"]
+        message = f"Startup took {total:.3f}s (budget {budget:.3f}s)"
+        if total > budget:
+            raise CommandError(message)
+        self.stdout.write(self.style.SUCCESS(message))
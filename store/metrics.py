@@ -0,0 +1,74 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_current = ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    """Counters for one request: SQL queries and named timings in seconds."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.timings = {}
+        self._depth = {}
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.sql_time += time.perf_counter() - start
+        metrics.queries += 1
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    # Installed on every connection rather than per request: async views
+    # run their queries on another thread's connection, but the request's
+    # context (and so its metrics) is carried over to it.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def current():
+    """The metrics of the request being handled, or None outside one."""
+    return _current.get()
+
+
+def activate(metrics):
+    return _current.set(metrics)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timer(name):
+    """
+    Add the time spent in the block to the current request's ``name``
+    timing. Nested blocks with the same name count once, so serializers
+    nested in other serializers are not double counted.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    depth = metrics._depth.get(name, 0)
+    metrics._depth[name] = depth + 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics._depth[name] = depth
+        if not depth:
+            metrics.timings[name] = metrics.timings.get(name, 0.0) + time.perf_counter() - start
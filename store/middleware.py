@@ -0,0 +1,167 @@
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from store import metrics, routers
+
+logger = logging.getLogger("store.requests")
+
+
+class RequestMetricsMiddleware:
+    """
+    Record the query count, SQL time, serializer time and view time of
+    each request.
+
+    The numbers go out as a ``Server-Timing`` header (when SERVER_TIMING
+    is on) and as one INFO-level JSON line on the ``store.requests`` logger
+    (shown when STORE_LOG_LEVEL is INFO). A warning is logged when a route
+    runs more queries than its budget: QUERY_BUDGETS by URL name (e.g.
+    ``"product-list"``), else QUERY_BUDGET.
+
+    Streaming responses are measured up to the first byte; queries run
+    while the body is generated are not counted.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request_metrics = metrics.RequestMetrics()
+        token = metrics.activate(request_metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.deactivate(token)
+        return self.finish(request, response, request_metrics, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        request_metrics = metrics.RequestMetrics()
+        token = metrics.activate(request_metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.deactivate(token)
+        return self.finish(request, response, request_metrics, time.perf_counter() - start)
+
+    def finish(self, request, response, request_metrics, view_time):
+        route = self.route_name(request)
+        if settings.SERVER_TIMING:
+            response["Server-Timing"] = self.server_timing(request_metrics, view_time)
+        self.log(request, response, route, request_metrics, view_time)
+        return response
+
+    @staticmethod
+    def route_name(request):
+        match = getattr(request, "resolver_match", None)
+        return match.view_name if match else None
+
+    @staticmethod
+    def server_timing(request_metrics, view_time):
+        serialize = request_metrics.timings.get("serialize", 0.0)
+        return ", ".join([
+            f'db;dur={request_metrics.sql_time * 1000:.1f};desc="{request_metrics.queries} queries"',
+            f"serialize;dur={serialize * 1000:.1f}",
+            f"view;dur={view_time * 1000:.1f}",
+        ])
+
+    @staticmethod
+    def query_budget(route):
+        return settings.QUERY_BUDGETS.get(route, settings.QUERY_BUDGET)
+
+    def log(self, request, response, route, request_metrics, view_time):
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "route": route,
+            "status": response.status_code,
+            "queries": request_metrics.queries,
+            "sql_ms": round(request_metrics.sql_time * 1000, 1),
+            "serialize_ms": round(request_metrics.timings.get("serialize", 0.0) * 1000, 1),
+            "view_ms": round(view_time * 1000, 1),
+        }
+        logger.info(json.dumps(record))
+
+        budget = self.query_budget(route)
+        if budget is not None and route and request_metrics.queries > budget:
+            logger.warning(
+                "Query budget exceeded on %s: %d queries (budget %d)",
+                route, request_metrics.queries, budget,
+            )
+
+
+class ReplicaPinMiddleware:
+    """
+    Track database routing per request (see store.routers) and pin a
+    client that wrote to the primary for REPLICA_PIN_SECONDS, so it reads
+    its own writes while the replica catches up.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = routers.begin_request(request)
+        response = self.get_response(request)
+        routers.end_request(token, request, response)
+        return response
+
+    async def __acall__(self, request):
+        token = routers.begin_request(request)
+        response = await self.get_response(request)
+        routers.end_request(token, request, response)
+        return response
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware that also runs in async middleware chains.
+
+    The stock class is sync-only, so under ASGI Django would hand every
+    request to a worker thread just to pass through it. Here only static
+    file lookups (with autorefresh) and responses leave the event loop.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        path = request.path_info
+        if not self.autorefresh:
+            static_file = self.files.get(path)
+        elif path.startswith(self.static_prefix):
+            static_file = await sync_to_async(self.find_file)(path)
+        else:
+            static_file = None
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,56 @@
+# Generated by Django 5.0 on 2026-10-18 15:15
+
+from django.db import migrations, models
+from django.db.models import Count, F, FloatField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+
+def backfill_product_stats(apps, schema_editor):
+    Product = apps.get_model('store', 'Product')
+    Review = apps.get_model('store', 'Review')
+    OrderItem = apps.get_model('store', 'OrderItem')
+
+    reviews = Review.objects.filter(product=OuterRef('pk')).order_by().values('product')
+    sold = OrderItem.objects.filter(product=OuterRef('pk')).order_by().values('product')
+    Product.objects.update(
+        review_count=Coalesce(Subquery(reviews.annotate(n=Count('id')).values('n')), 0),
+        rating_sum=Coalesce(Subquery(reviews.annotate(n=Sum('rating')).values('n')), 0),
+        units_sold=Coalesce(Subquery(sold.annotate(n=Sum('quantity')).values('n')), 0),
+    )
+    Product.objects.update(
+        average_rating=Coalesce(
+            Cast(F('rating_sum'), FloatField()) / NullIf(F('review_count'), 0),
+            Value(0.0),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0011_category_image_alter_order_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='average_rating',
+            field=models.FloatField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='units_sold',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(backfill_product_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.0 on 2026-10-18 15:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_sales_rollup(apps, schema_editor):
+    Order = apps.get_model('store', 'Order')
+    OrderItem = apps.get_model('store', 'OrderItem')
+    SalesRollup = apps.get_model('store', 'SalesRollup')
+
+    cells = {}
+    totals = (
+        Order.objects.annotate(day=TruncDate('created_at'))
+        .values('day', 'state', 'status')
+        .annotate(n=Count('id'), revenue=Sum('total_amount'))
+    )
+    for row in totals:
+        cells[(row['day'], row['state'], None, row['status'])] = SalesRollup(
+            day=row['day'], state=row['state'], status=row['status'],
+            orders=row['n'], units=0, revenue=row['revenue'] or 0,
+        )
+
+    lines = (
+        OrderItem.objects.annotate(day=TruncDate('order__created_at'))
+        .values('day', 'order__state', 'product__category_id', 'order__status')
+        .annotate(
+            n=Count('order_id', distinct=True),
+            units=Sum('quantity'),
+            revenue=Sum(F('quantity') * F('price'), output_field=DecimalField(max_digits=14, decimal_places=2)),
+        )
+    )
+    for row in lines:
+        day, state, status = row['day'], row['order__state'], row['order__status']
+        cells[(day, state, row['product__category_id'], status)] = SalesRollup(
+            day=day, state=state, category_id=row['product__category_id'], status=status,
+            orders=row['n'], units=row['units'] or 0, revenue=row['revenue'] or 0,
+        )
+        cells[(day, state, None, status)].units += row['units'] or 0
+
+    SalesRollup.objects.bulk_create(cells.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0013_paystackevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('state', models.CharField(max_length=100)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('paid', 'Paid'), ('shipped', 'Shipped'), ('delivered', 'Delivered'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('orders', models.IntegerField(default=0)),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='store.category')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'status'], name='store_sales_day_20c270_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='salesrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', False)), fields=('day', 'state', 'category', 'status'), name='sales_rollup_category_cell'),
+        ),
+        migrations.AddConstraint(
+            model_name='salesrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('day', 'state', 'status'), name='sales_rollup_total_cell'),
+        ),
+        migrations.RunPython(backfill_sales_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.0 on 2026-10-18 15:31
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+FORWARD_SQL = """
+CREATE FUNCTION store_product_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(
+            (SELECT name FROM store_category WHERE id = NEW.category_id), '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER store_product_search_vector_update
+    BEFORE INSERT OR UPDATE OF name, description, category_id ON store_product
+    FOR EACH ROW EXECUTE FUNCTION store_product_search_vector();
+
+CREATE FUNCTION store_category_search_vector() RETURNS trigger AS $$
+BEGIN
+    IF NEW.name IS DISTINCT FROM OLD.name THEN
+        UPDATE store_product SET name = name WHERE category_id = NEW.id;
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER store_category_search_vector_update
+    AFTER UPDATE OF name ON store_category
+    FOR EACH ROW EXECUTE FUNCTION store_category_search_vector();
+
+UPDATE store_product SET name = name;
+
+CREATE INDEX store_product_search_vector_gin ON store_product USING gin (search_vector);
+"""
+
+REVERSE_SQL = """
+DROP INDEX IF EXISTS store_product_search_vector_gin;
+DROP TRIGGER IF EXISTS store_category_search_vector_update ON store_category;
+DROP FUNCTION IF EXISTS store_category_search_vector();
+DROP TRIGGER IF EXISTS store_product_search_vector_update ON store_product;
+DROP FUNCTION IF EXISTS store_product_search_vector();
+"""
+
+
+def create_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(FORWARD_SQL)
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(REVERSE_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0015_catalogversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_trigger, drop_search_trigger),
+    ]
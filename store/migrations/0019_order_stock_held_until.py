@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 16:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0018_cartitem_unique_product'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='stock_held_until',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
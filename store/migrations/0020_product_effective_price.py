@@ -0,0 +1,52 @@
+# Generated by Django 5.0 on 2026-10-18 16:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0019_order_stock_held_until'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_category_tag_price',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_tag_price',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_sale_price',
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='effective_price',
+            field=models.GeneratedField(db_index=True, db_persist=True, expression=models.Case(models.When(discount_price__isnull=False, is_on_sale=True, then=models.F('discount_price')), default=models.F('price')), output_field=models.DecimalField(decimal_places=2, max_digits=10)),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='sale_ends_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='sale_starts_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'tag', 'effective_price'], name='product_category_tag_price'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['tag', 'effective_price'], name='product_tag_price'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_on_sale', 'effective_price'], name='product_sale_price'),
+        ),
+    ]
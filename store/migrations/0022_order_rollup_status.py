@@ -0,0 +1,27 @@
+# Generated by Django 5.0 on 2026-10-18 16:44
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_rolled_up_orders(apps, schema_editor):
+    # Existing orders are taken to be counted under their current status;
+    # rebuild_sales_rollup repairs any cell that was not.
+    Order = apps.get_model('store', 'Order')
+    Order.objects.update(rollup_status=F('status'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0021_order_status_changed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='rollup_status',
+            field=models.CharField(blank=True, editable=False, max_length=20, null=True),
+        ),
+        migrations.RunPython(mark_rolled_up_orders, migrations.RunPython.noop),
+    ]
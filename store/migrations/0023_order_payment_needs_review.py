@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 17:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0022_order_rollup_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='payment_needs_review',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0 on 2026-10-18 18:40
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def recount_units_sold(apps, schema_editor):
+    Product = apps.get_model('store', 'Product')
+    OrderItem = apps.get_model('store', 'OrderItem')
+
+    # units_sold no longer counts the lines of cancelled orders.
+    sold = (
+        OrderItem.objects.filter(product=OuterRef('pk'))
+        .exclude(order__status='cancelled')
+        .order_by()
+        .values('product')
+    )
+    Product.objects.update(
+        units_sold=Coalesce(Subquery(sold.annotate(n=Sum('quantity')).values('n')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0023_order_payment_needs_review'),
+    ]
+
+    operations = [
+        migrations.RunPython(recount_units_sold, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,152 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from store import routers
+from store.services import catalog_versions
+from store.services.catalog_cache import get_catalog_cache
+from store.services.query_optimizer import optimize_for_serializer
+
+
+class SerializerOptimizedQuerysetMixin:
+    """
+    Shape the view's queryset for its serializer so list and detail
+    responses cost a fixed number of queries.
+
+    Applied in filter_queryset so it also covers viewsets that override
+    get_queryset. Column restriction with only() is limited to safe
+    methods, where the instances are never saved back.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return optimize_for_serializer(
+            queryset,
+            self.get_serializer_class(),
+            restrict_fields=self.request.method in SAFE_METHODS,
+        )
+
+
+class CatalogVersionMixin:
+    """Looks up (once per request) the versions of ``catalog_models``."""
+
+    catalog_models = ()
+
+    def get_catalog_version(self):
+        if not hasattr(self, "_catalog_version"):
+            self._catalog_version = catalog_versions.current(*self.catalog_models)
+        return self._catalog_version
+
+
+class CatalogConditionalGetMixin(CatalogVersionMixin):
+    """
+    Answer list/retrieve with 304 Not Modified when the client's
+    If-None-Match / If-Modified-Since still match the catalog versions in
+    ``catalog_models``. The check only needs the version markers, so an
+    unchanged catalog costs neither a catalog query nor serialization.
+    """
+
+    def get_catalog_validators(self, request):
+        token, modified = self.get_catalog_version()
+        renderer = getattr(request, "accepted_renderer", None)
+        digest = hashlib.md5(
+            f"{token}:{request.get_full_path()}:{getattr(renderer, 'format', '')}".encode()
+        ).hexdigest()
+        last_modified = int(modified.timestamp()) if modified else None
+        return f'"{digest}"', last_modified
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_catalog_validators(request)
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+
+class CatalogCacheMixin(CatalogVersionMixin):
+    """
+    Serve anonymous list/retrieve responses from the tiered catalog cache.
+    Entries are keyed by the catalog version and the query parameters.
+    """
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if request.user and request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+
+        catalog_cache = get_catalog_cache()
+        token, _ = self.get_catalog_version()
+        key = catalog_cache.make_key(self.basename, token, request)
+        data = catalog_cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            catalog_cache.set(key, response.data)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+
+class FacetedListMixin:
+    """
+    Add ``facets`` to list responses when the client asks with
+    ``?facets=1``. Views override get_facets(queryset) to fill them in.
+    """
+
+    facets_query_param = "facets"
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if response.status_code != 200 or request.query_params.get(self.facets_query_param) not in ("1", "true"):
+            return response
+
+        facets = self.get_facets(self.get_queryset())
+        if isinstance(response.data, dict):
+            response.data["facets"] = facets
+        else:
+            response.data = {"results": response.data, "facets": facets}
+        return response
+
+    def get_facets(self, queryset):
+        """
+        Return a {facet name: counts} dict for the filtered, unpaginated
+        queryset. The default has no facets.
+        """
+        return {}
+
+
+class ReplicaReadMixin:
+    """
+    Serve safe-method requests from the read replica (see store.routers),
+    limited to ``replica_actions`` on viewsets (None: every action).
+    Authentication runs first, on the primary, so a client that just
+    wrote can be pinned there.
+    """
+
+    replica_actions = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        action = getattr(self, "action", None)
+        if request.method in SAFE_METHODS and (self.replica_actions is None or action in self.replica_actions):
+            routers.use_replica(request)
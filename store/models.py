@@ -1,5 +1,5 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
-from django.db.models import Avg
 from django.contrib.auth import get_user_model
 from django.utils.text import slugify
 from django.conf import settings
@@ -7,6 +7,13 @@ from django.conf import settings
 User = get_user_model()
 
 class Category(models.Model):
+    # (width, height) of the resized copies served next to the original;
+    # see store.services.images.
+    IMAGE_VARIANTS = {
+        "thumb": (96, 96),
+        "card": (400, 300),
+    }
+
     name = models.CharField(max_length=255)
     slug = models.SlugField(unique=True, blank=True)
     image = models.ImageField(upload_to="categories/", blank=True, null=True)
@@ -27,6 +34,11 @@ class Product(models.Model):
         ("top_rated", "Top Rated"),
         ("special_sale", "Special Sale"),
     ]
+    IMAGE_VARIANTS = {
+        "thumb": (160, 160),
+        "card": (480, 480),
+        "detail": (1200, 1200),
+    }
     
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
     name = models.CharField(max_length=255)
@@ -49,11 +61,40 @@ class Product(models.Model):
         blank=True
     )
     is_on_sale = models.BooleanField(default=False)
-    
-    @property
-    def average_rating(self):
-        return self.reviews.aggregate(avg=Avg("rating"))["avg"] or 0
-    
+    # Optional sale window: the apply_sale_schedule command turns
+    # is_on_sale on when it opens and off when it closes.
+    sale_starts_at = models.DateTimeField(blank=True, null=True)
+    sale_ends_at = models.DateTimeField(blank=True, null=True)
+    # What a customer pays now, kept by the database on every write.
+    effective_price = models.GeneratedField(
+        expression=models.Case(
+            models.When(is_on_sale=True, discount_price__isnull=False, then=models.F("discount_price")),
+            default=models.F("price"),
+        ),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        db_persist=True,
+        db_index=True,
+    )
+
+    # Denormalized counters, kept current by store.signals and rebuilt by
+    # the rebuild_product_stats management command.
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    average_rating = models.FloatField(default=0, db_index=True)
+    units_sold = models.PositiveIntegerField(default=0, db_index=True)
+
+    # Maintained by a database trigger on PostgreSQL (migration 0016);
+    # unused on other backends, which search with store.services.search.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        # Storefront filter combinations (see store.services.product_filters).
+        indexes = [
+            models.Index(fields=["category", "tag", "effective_price"], name="product_category_tag_price"),
+            models.Index(fields=["tag", "effective_price"], name="product_tag_price"),
+            models.Index(fields=["is_on_sale", "effective_price"], name="product_sale_price"),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -78,6 +119,11 @@ class CartItem(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["cart", "product"], name="cart_item_unique_product"),
+        ]
+
     def __str__(self):
         return f"{self.product.name} x {self.quantity}"
 
@@ -114,8 +160,27 @@ class Order(models.Model):
     
     paystack_reference = models.CharField(max_length=100, blank=True, null=True)
     paid_at = models.DateTimeField(blank=True, null=True)
+    # Set when Paystack reports a payment for an order that was already
+    # cancelled: the customer was charged and needs a refund or a review.
+    payment_needs_review = models.BooleanField(default=False)
+    # Set while a pending order holds the stock taken at checkout; the
+    # stock goes back if the order is cancelled or still pending by then
+    # (see store.services.stock).
+    stock_held_until = models.DateTimeField(blank=True, null=True, db_index=True)
+    # Written by every status change made through store.services.order_status.
+    status_changed_at = models.DateTimeField(blank=True, null=True)
+    # The status this order is counted under in the SalesRollup cube, or
+    # None while it is not counted (see store.services.sales_rollup).
+    rollup_status = models.CharField(max_length=20, blank=True, null=True, editable=False)
     
     created_at = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so post_save can see transitions.
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
     
     def __str__(self):
         return f"Order #{self.id} - {self.status} - {self.total_amount} - {self.user.username if self.user else 'Guest'}"
@@ -145,4 +210,72 @@ class Review(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
-        return f"{self.product.name} - {self.rating} by {self.user.username}"
\ No newline at end of file
+        return f"{self.product.name} - {self.rating} by {self.user.username}"
+
+class PaystackEvent(models.Model):
+    event_id = models.CharField(max_length=150, unique=True)
+    event = models.CharField(max_length=100)
+    reference = models.CharField(max_length=100, blank=True, db_index=True)
+    payload = models.JSONField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"],
+                name="paystack_event_pending",
+                condition=models.Q(processed_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event} - {self.reference}"
+
+
+class SalesRollup(models.Model):
+    """
+    Daily sales cube keyed by day x state x category x status.
+
+    Rows with a category hold that category's order lines: ``orders`` is
+    the number of orders containing it and ``revenue`` the line revenue.
+    Rows without a category hold whole-order totals: order count, all
+    units and ``total_amount`` (delivery included) as revenue.
+    """
+    day = models.DateField()
+    state = models.CharField(max_length=100)
+    category = models.ForeignKey(
+        Category, related_name="+", on_delete=models.CASCADE, null=True, blank=True
+    )
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "state", "category", "status"],
+                condition=models.Q(category__isnull=False),
+                name="sales_rollup_category_cell",
+            ),
+            models.UniqueConstraint(
+                fields=["day", "state", "status"],
+                condition=models.Q(category__isnull=True),
+                name="sales_rollup_total_cell",
+            ),
+        ]
+        indexes = [models.Index(fields=["day", "status"])]
+
+    def __str__(self):
+        return f"{self.day} {self.state} {self.category_id or 'all'} {self.status}"
+
+
+class CatalogVersion(models.Model):
+    """Write counter per catalog model, used to validate cached catalog reads."""
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
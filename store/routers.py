@@ -0,0 +1,102 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = "primary_pin"
+
+_state = ContextVar("db_routing", default=None)
+
+
+class RoutingState:
+    """How the current request may read: set up by ReplicaPinMiddleware."""
+
+    def __init__(self, pinned=False):
+        # The client wrote within REPLICA_PIN_SECONDS: read from the primary.
+        self.pinned = pinned
+        self.replica = False
+        self.wrote = False
+
+
+def replica_alias():
+    """The configured replica alias, or None when there is no replica."""
+    alias = settings.REPLICA_DATABASE_ALIAS
+    return alias if alias and alias in settings.DATABASES else None
+
+
+def _pin_key(user_id):
+    return f"replica:pin:{user_id}"
+
+
+def begin_request(request):
+    return _state.set(RoutingState(pinned=PIN_COOKIE in request.COOKIES))
+
+
+def end_request(token, request, response):
+    """Pin a client that wrote to the primary for its next requests."""
+    state = _state.get()
+    _state.reset(token)
+    if not (state.wrote and replica_alias()):
+        return
+    seconds = settings.REPLICA_PIN_SECONDS
+    response.set_cookie(PIN_COOKIE, "1", max_age=seconds, httponly=True, samesite="Lax")
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        # API clients that ignore cookies are pinned by user instead.
+        cache.set(_pin_key(user.pk), True, seconds)
+
+
+def use_replica(request):
+    """Send the rest of this request's reads to the replica, if the client may read stale data."""
+    state = _state.get()
+    if state is None or not replica_alias():
+        return
+    user = getattr(request, "user", None)
+    if not state.pinned and user is not None and user.is_authenticated:
+        state.pinned = bool(cache.get(_pin_key(user.pk)))
+    state.replica = True
+
+
+@contextmanager
+def replica_reads():
+    """Read from the replica inside the block, unless the current request is pinned or wrote."""
+    state = _state.get()
+    token = _state.set(RoutingState()) if state is None else None
+    state = _state.get()
+    previous, state.replica = state.replica, True
+    try:
+        yield
+    finally:
+        state.replica = previous
+        if token is not None:
+            _state.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Reads go to the replica (REPLICA_DATABASE_ALIAS) only where a view or
+    service asked for it; everything else, and every read after a write
+    in the same request, uses the primary. Writes always go to the
+    primary, including saves of instances loaded from the replica.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is not None and state.replica and not (state.pinned or state.wrote):
+            alias = replica_alias()
+            if alias:
+                return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary.
+        return True
+
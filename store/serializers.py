@@ -1,28 +1,101 @@
 from rest_framework import serializers
 from .models import Product, Category, Cart, CartItem, Order, OrderItem
+from store.metrics import timer
+from store.services.images import variant_url, variant_urls
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class TimedSerializerMixin:
+    """Counts representation time towards the request's ``serialize`` timing."""
+
+    def to_representation(self, instance):
+        with timer("serialize"):
+            return super().to_representation(instance)
+
+
+class ImageVariantsField(serializers.Field):
+    """Read-only map of the model's image variants (and a srcset) for an image field."""
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return variant_urls(type(value.instance), value.name, self.context.get("request"))
+
+
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    images = ImageVariantsField(source="image")
+
     class Meta:
         model = Category
         fields = "__all__"
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    images = ImageVariantsField(source="image")
+    effective_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+
     class Meta:
         model = Product
-        fields = "__all__"
+        exclude = ["search_vector"]
+        read_only_fields = ["review_count", "rating_sum", "average_rating", "units_sold"]
+
+    def create(self, validated_data):
+        instance = super().create(validated_data)
+        # Computed by the database; save() does not read it back.
+        instance.refresh_from_db(fields=["effective_price"])
+        return instance
 
     def update(self, instance, validated_data):
         # Only update the fields sent in the request
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         instance.save()
+        # Computed by the database; save() does not read it back.
+        instance.refresh_from_db(fields=["effective_price"])
         return instance
 
-class CartItemSerializer(serializers.ModelSerializer):
+class ProductImportSerializer(serializers.Serializer):
+    """
+    One row of a bulk product import (store.services.product_import).
+    Rows with an id update that product; only the columns present change.
+    Rows without one create a product.
+    """
+
+    CREATE_REQUIRED = ("category", "name", "description", "price", "image")
+
+    id = serializers.IntegerField(required=False, min_value=1)
+    category = serializers.SlugField(required=False)
+    name = serializers.CharField(required=False, max_length=255)
+    description = serializers.CharField(required=False)
+    price = serializers.DecimalField(required=False, max_digits=10, decimal_places=2, min_value=0)
+    stock = serializers.IntegerField(required=False, min_value=0)
+    tag = serializers.ChoiceField(required=False, choices=Product.TAG_CHOICES)
+    discount_price = serializers.DecimalField(
+        required=False, allow_null=True, max_digits=10, decimal_places=2, min_value=0
+    )
+    is_on_sale = serializers.BooleanField(required=False)
+    image = serializers.CharField(required=False, max_length=100)
+
+    def to_internal_value(self, data):
+        # An empty CSV cell means "leave unchanged"; JSON null clears discount_price.
+        if hasattr(data, "items"):
+            data = {key: value for key, value in data.items() if value != ""}
+        return super().to_internal_value(data)
+
+    def validate(self, attrs):
+        if "id" not in attrs:
+            missing = [field for field in self.CREATE_REQUIRED if field not in attrs]
+            if missing:
+                raise serializers.ValidationError(
+                    {field: "This field is required to create a product." for field in missing}
+                )
+        return attrs
+
+
+class CartItemSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     product_name = serializers.CharField(source="product.name", read_only=True)
     price = serializers.DecimalField(
-        source="product.price", max_digits=10, decimal_places=2, read_only=True)
+        source="product.effective_price", max_digits=10, decimal_places=2, read_only=True)
     product_image = serializers.SerializerMethodField()
 
     class Meta:
@@ -31,12 +104,9 @@ class CartItemSerializer(serializers.ModelSerializer):
                   "price", "quantity", 'product_image']
 
     def get_product_image(self, obj):
-        request = self.context.get('request')
-        if obj.product.image:
-            return request.build_absolute_uri(obj.product.image.url)
-        return None
+        return variant_url(Product, obj.product.image.name, "thumb", self.context.get('request'))
 
-class CartSerializer(serializers.ModelSerializer):
+class CartSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     items = CartItemSerializer(many=True, read_only=True)
 
     class Meta:
@@ -44,7 +114,7 @@ class CartSerializer(serializers.ModelSerializer):
         fields = ["id", "items"]
 
 
-class OrderItemSerializer(serializers.ModelSerializer):
+class OrderItemSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     product_name = serializers.CharField(source="product.name", read_only=True)
 
     class Meta:
@@ -58,7 +128,7 @@ class OrderItemSerializer(serializers.ModelSerializer):
         ]
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user = serializers.CharField(source="user.username", read_only=True)
     email = serializers.EmailField(source="user.email", read_only=True)
     items = OrderItemSerializer(many=True, read_only=True)
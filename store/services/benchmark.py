@@ -0,0 +1,535 @@
+import hashlib
+import http.client
+import io
+import json
+import math
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLResolver, get_resolver, resolve
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from store.models import Cart, CartItem, Category, Order, OrderItem, Product
+from store.services.catalog_cache import get_catalog_cache
+from store.services.fake_paystack import FakePaystackServer
+from store.services.seed_data import SEED_PASSWORD, seed_store
+
+User = get_user_model()
+
+
+def volumes(size):
+    """Seed volumes for a benchmark size (the number of products)."""
+    return {
+        "users": max(10, size // 2),
+        "categories": max(3, size // 50),
+        "products": size,
+        "reviews": size * 2,
+        "carts": max(5, size // 20),
+        "orders": size,
+    }
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class Endpoint:
+    """
+    One benchmarked request. ``prepare(ctx)`` runs untimed before every
+    call and returns (path, data) or (path, data, headers); ``auth`` is
+    None, "user" or "staff". With format="raw", data is a JSON body sent
+    as is.
+    """
+
+    def __init__(self, name, method, prepare, auth=None, format="json"):
+        self.name = name
+        self.method = method
+        self.prepare = prepare
+        self.auth = auth
+        self.format = format
+
+
+class BenchContext:
+    """Fixtures shared by the endpoints: a shopper, a staff user and helpers."""
+
+    def __init__(self, paystack):
+        self.paystack = paystack
+        self._names = count()
+        self.user = User.objects.create_user("bench-user", "bench@example.com", SEED_PASSWORD)
+        self.staff = User.objects.create_user("bench-staff", "staff@example.com", SEED_PASSWORD, is_staff=True)
+        self.tokens = {
+            "user": str(RefreshToken.for_user(self.user).access_token),
+            "staff": str(RefreshToken.for_user(self.staff).access_token),
+        }
+        self.refresh = str(RefreshToken.for_user(self.user))
+        self.cart, _ = Cart.objects.get_or_create(user=self.user)
+        self.category = Category.objects.order_by("pk").first()
+        self.product = Product.objects.order_by("pk").first()
+        self.order = self.new_order()
+
+        buffer = io.BytesIO()
+        Image.new("RGB", (800, 600), "teal").save(buffer, format="PNG")
+        self.image = buffer.getvalue()
+
+    def unique(self, prefix):
+        return f"{prefix}-{next(self._names)}"
+
+    def upload(self):
+        return SimpleUploadedFile(f"{self.unique('bench')}.png", self.image, content_type="image/png")
+
+    def new_product(self):
+        return Product.objects.create(
+            category=self.category, name=self.unique("Bench product"), description="Benchmark",
+            price=1000, stock=10, image="products/bench.png",
+        )
+
+    def new_order(self, status="pending", reference=None):
+        order = Order.objects.create(
+            user=self.user, total_amount=6000, delivery_fee=5000, state="Lagos",
+            status=status, paystack_reference=reference,
+        )
+        OrderItem.objects.create(order=order, product=self.product, quantity=1, price=1000)
+        return order
+
+    def paid_reference(self, reference):
+        self.paystack.transactions[reference] = {"amount": 600000, "email": self.user.email}
+        return reference
+
+    def cart_item(self):
+        item, _ = CartItem.objects.get_or_create(cart=self.cart, product=self.product)
+        return item
+
+    def fill_cart(self, lines=3):
+        product_ids = list(Product.objects.order_by("pk").values_list("pk", flat=True)[:lines])
+        # Checkout takes stock; keep every run on the success path.
+        Product.objects.filter(pk__in=product_ids).update(stock=F("stock") + 1)
+        for product_id in product_ids:
+            CartItem.objects.get_or_create(cart=self.cart, product_id=product_id)
+
+
+def _get(path):
+    return lambda ctx: (path(ctx) if callable(path) else path, None)
+
+
+def _checkout(ctx):
+    ctx.fill_cart()
+    return "/api/cart/checkout/", {"address": "1 Marina", "city": "Ikeja", "state": "Lagos"}
+
+
+def _verify_payment(ctx):
+    reference = ctx.paid_reference(ctx.unique("bench-ref"))
+    ctx.new_order(reference=reference)
+    return f"/api/cart/verify_payment/?reference={reference}", None
+
+
+def _paystack_verify(ctx):
+    # paystack_verify reads the order id back out of an "ORDER_<id>" reference.
+    return "/api/cart/paystack_verify/", {"reference": ctx.paid_reference(f"ORDER_{ctx.new_order().pk}")}
+
+
+def _webhook(ctx):
+    body = json.dumps({
+        "event": "charge.success",
+        "data": {"id": ctx.unique("evt"), "reference": f"Order-{ctx.order.pk}"},
+    }).encode()
+    signature = hashlib.sha512(body + settings.PAYSTACK_SECRET_KEY.encode()).hexdigest()
+    return "/api/paystack/webhook/", body, {"HTTP_X_PAYSTACK_SIGNATURE": signature}
+
+
+ENDPOINTS = [
+    Endpoint("api-root", "get", _get("/api/"), auth="user"),
+    Endpoint("products-list", "get", _get("/api/products/")),
+    Endpoint("products-list-filtered", "get", _get("/api/products/?in_stock=1&min_price=1000&facets=1")),
+    Endpoint("products-list-page", "get", _get("/api/products/?page_size=20")),
+    Endpoint("products-retrieve", "get", _get(lambda ctx: f"/api/products/{ctx.product.pk}/")),
+    Endpoint("products-search", "get", _get("/api/products/search/?q=smart+phone")),
+    Endpoint(
+        "products-create", "post",
+        lambda ctx: ("/api/products/", {
+            "category": ctx.category.pk, "name": ctx.unique("Created"), "description": "Benchmark",
+            "price": "1500", "stock": 5, "image": ctx.upload(),
+        }),
+        auth="staff", format="multipart",
+    ),
+    Endpoint(
+        "products-update", "patch",
+        lambda ctx: (f"/api/products/{ctx.product.pk}/", {"stock": 40}),
+        auth="staff", format="multipart",
+    ),
+    Endpoint(
+        "products-destroy", "delete",
+        lambda ctx: (f"/api/products/{ctx.new_product().pk}/", None), auth="staff",
+    ),
+    Endpoint(
+        "products-bulk", "post",
+        lambda ctx: ("/api/products/bulk/", [
+            {"id": pk, "stock": 25} for pk in Product.objects.order_by("pk").values_list("pk", flat=True)[:50]
+        ]),
+        auth="staff",
+    ),
+    Endpoint("categories-list", "get", _get("/api/categories/")),
+    Endpoint("categories-retrieve", "get", _get(lambda ctx: f"/api/categories/{ctx.category.pk}/")),
+    Endpoint(
+        "categories-create", "post",
+        lambda ctx: ("/api/categories/", {"name": ctx.unique("Bench category")}), auth="staff",
+    ),
+    Endpoint(
+        "categories-update", "patch",
+        lambda ctx: (f"/api/categories/{ctx.category.pk}/", {}), auth="staff",
+    ),
+    Endpoint(
+        "categories-destroy", "delete",
+        lambda ctx: (f"/api/categories/{Category.objects.create(name=ctx.unique('Doomed')).pk}/", None),
+        auth="staff",
+    ),
+    Endpoint("cart-list", "get", _get("/api/cart/"), auth="user"),
+    Endpoint(
+        "cart-add", "post", lambda ctx: ("/api/cart/", {"product_id": ctx.product.pk}), auth="user",
+    ),
+    Endpoint(
+        "cart-update-quantity", "post",
+        lambda ctx: ("/api/cart/update_quantity/", {"item_id": ctx.cart_item().pk, "action": "increment"}),
+        auth="user",
+    ),
+    Endpoint(
+        "cart-remove-item", "post",
+        lambda ctx: ("/api/cart/remove_item/", {"item_id": ctx.cart_item().pk}), auth="user",
+    ),
+    Endpoint(
+        "cart-batch", "post",
+        lambda ctx: ("/api/cart/batch/", {"operations": [
+            {"op": "add", "product_id": pk}
+            for pk in Product.objects.order_by("pk").values_list("pk", flat=True)[:10]
+        ]}),
+        auth="user",
+    ),
+    Endpoint("cart-clear", "post", lambda ctx: ("/api/cart/clear/", {}), auth="user"),
+    Endpoint("cart-checkout", "post", _checkout, auth="user"),
+    Endpoint("cart-verify-payment", "get", _verify_payment, auth="user"),
+    Endpoint(
+        "cart-paystack-init", "post",
+        lambda ctx: ("/api/cart/paystack_init/", {"order_id": ctx.new_order().pk}), auth="user",
+    ),
+    Endpoint("cart-paystack-verify", "post", _paystack_verify, auth="user"),
+    Endpoint("orders-list-staff", "get", _get("/api/orders/"), auth="staff"),
+    Endpoint("orders-list-customer", "get", _get("/api/orders/"), auth="user"),
+    Endpoint("orders-retrieve", "get", _get(lambda ctx: f"/api/orders/{ctx.order.pk}/"), auth="user"),
+    Endpoint(
+        "orders-update-status", "patch",
+        lambda ctx: (f"/api/orders/{ctx.new_order().pk}/", {"status": "paid"}), auth="staff",
+    ),
+    Endpoint(
+        "orders-bulk-status", "post",
+        lambda ctx: ("/api/orders/bulk-status/", {
+            "ids": [ctx.new_order().pk for _ in range(20)], "status": "paid",
+        }),
+        auth="staff",
+    ),
+    Endpoint(
+        "orders-destroy", "delete",
+        lambda ctx: (f"/api/orders/{ctx.new_order().pk}/", None), auth="staff",
+    ),
+    Endpoint("orders-export", "get", _get("/api/orders/export/?format=csv"), auth="staff"),
+    Endpoint("paystack-webhook", "post", _webhook, format="raw"),
+    Endpoint("async-products-list", "get", _get("/api/async/products/")),
+    Endpoint("async-products-retrieve", "get", _get(lambda ctx: f"/api/async/products/{ctx.product.pk}/")),
+    Endpoint("async-categories-list", "get", _get("/api/async/categories/")),
+    Endpoint("async-cart-list", "get", _get("/api/async/cart/"), auth="user"),
+    Endpoint("debug-jwt", "get", _get("/api/debug/jwt/"), auth="user"),
+    Endpoint("admin-analytics", "get", _get("/api/admin/analytics/"), auth="staff"),
+    Endpoint("admin-catalog-cache", "get", _get("/api/admin/catalog-cache/"), auth="staff"),
+    Endpoint(
+        "auth-register", "post",
+        lambda ctx: ("/api/auth/register/", {
+            "username": ctx.unique("bench-register"), "email": "new@example.com", "password": "A-long-Pa55word",
+        }),
+    ),
+    Endpoint(
+        "auth-login", "post",
+        lambda ctx: ("/api/auth/login/", {"username": "bench-user", "password": SEED_PASSWORD}),
+    ),
+    Endpoint(
+        "auth-token-refresh", "post",
+        lambda ctx: ("/api/auth/token/refresh/", {"refresh": ctx.refresh}),
+    ),
+]
+
+
+def app_routes(urlconfs=("store.urls", "accounts.urls")):
+    """
+    Name of every URL pattern the given urlconfs contribute to the project
+    (the full route for unnamed patterns), as resolve() would report it.
+    """
+    def walk(patterns, prefix, inside):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                module = getattr(pattern.urlconf_module, "__name__", None)
+                yield from walk(pattern.url_patterns, prefix + str(pattern.pattern), inside or module in urlconfs)
+            elif inside:
+                yield pattern.name or prefix + str(pattern.pattern)
+
+    return set(walk(get_resolver().url_patterns, "", False))
+
+
+def route_of(path):
+    match = resolve(path.split("?")[0])
+    return match.url_name or match.route
+
+
+def _request(client, ctx, endpoint):
+    path, data, *extra = endpoint.prepare(ctx)
+    headers = extra[0] if extra else {}
+    if endpoint.auth:
+        headers["HTTP_AUTHORIZATION"] = f"Bearer {ctx.tokens[endpoint.auth]}"
+
+    call = getattr(client, endpoint.method)
+    if data is None:
+        return path, lambda: call(path, **headers)
+    if endpoint.format == "raw":
+        return path, lambda: call(path, data, content_type="application/json", **headers)
+    return path, lambda: call(path, data, format=endpoint.format, **headers)
+
+
+def measure(client, ctx, endpoint, repeat, cold_cache=False):
+    timings = []
+    queries = []
+    statuses = set()
+    for _ in range(repeat):
+        path, send = _request(client, ctx, endpoint)
+        if cold_cache:
+            caches["default"].clear()
+            get_catalog_cache().local.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = send()
+            if getattr(response, "streaming", False):
+                b"".join(response.streaming_content)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(captured))
+        statuses.add(response.status_code)
+    return {
+        "endpoint": endpoint.name,
+        "route": route_of(path),
+        "method": endpoint.method.upper(),
+        "status": sorted(statuses),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "queries": statistics.median_low(queries),
+        "queries_max": max(queries),
+    }
+
+
+def run_benchmark(sizes, repeat=20, cold_cache=False, endpoints=ENDPOINTS, progress=None):
+    """
+    Seed the current database up to each size in turn and measure every
+    endpoint through the Django test client. Paystack is served by a local
+    FakePaystackServer and media by the local variant storage. Returns
+    a JSON-serializable report.
+    """
+    media = tempfile.TemporaryDirectory()
+    storages = {**settings.STORAGES, "default": {"BACKEND": "store.storage.VariantFileSystemStorage"}}
+    results = []
+    with FakePaystackServer() as paystack, media, override_settings(
+        PAYSTACK_BASE_URL=paystack.url, STORAGES=storages, MEDIA_ROOT=media.name,
+    ):
+        seeded = 0
+        ctx = None
+        for size in sorted(sizes):
+            grow = volumes(size)
+            if seeded:
+                previous = volumes(seeded)
+                grow = {name: max(0, value - previous[name]) for name, value in grow.items()}
+            seed_store(**grow, seed=size)
+            seeded = size
+            caches["default"].clear()
+            get_catalog_cache().local.clear()
+
+            ctx = ctx or BenchContext(paystack)
+            client = APIClient(SERVER_NAME="localhost")
+            for endpoint in endpoints:
+                result = measure(client, ctx, endpoint, repeat, cold_cache)
+                result["size"] = size
+                results.append(result)
+                if progress:
+                    progress(result)
+
+    return {
+        "database": connection.vendor,
+        "repeat": repeat,
+        "cold_cache": cold_cache,
+        "sizes": sorted(sizes),
+        "volumes": {size: volumes(size) for size in sorted(sizes)},
+        "results": results,
+    }
+
+
+def compare(report, baseline):
+    """Pair each result with the baseline's for the same size and endpoint."""
+    previous = {(r["size"], r["endpoint"]): r for r in baseline["results"]}
+    rows = []
+    for result in report["results"]:
+        before = previous.get((result["size"], result["endpoint"]))
+        if before:
+            rows.append({
+                "size": result["size"],
+                "endpoint": result["endpoint"],
+                "p50_ratio": round(result["p50_ms"] / before["p50_ms"], 2) if before["p50_ms"] else None,
+                "queries_delta": result["queries"] - before["queries"],
+            })
+    return rows
+
+
+# Sync and async routes serving the same payload, for the throughput run.
+THROUGHPUT_PAIRS = [
+    ("products-list", "/api/products/", "/api/async/products/", False),
+    ("products-retrieve", "/api/products/{product}/", "/api/async/products/{product}/", False),
+    ("categories-list", "/api/categories/", "/api/async/categories/", False),
+    ("cart-list", "/api/cart/", "/api/async/cart/", True),
+]
+
+SERVERS = {
+    "wsgi": ["config.wsgi"],
+    "asgi": ["config.asgi", "--worker-class", "asgi"],
+}
+
+
+def database_url(settings_dict):
+    """A DATABASE_URL for dj_database_url that points at ``settings_dict``."""
+    if settings_dict["ENGINE"].endswith("sqlite3"):
+        return f"sqlite:///{settings_dict['NAME']}"
+    credentials = quote(settings_dict["USER"] or "", safe="")
+    if settings_dict["PASSWORD"]:
+        credentials += ":" + quote(settings_dict["PASSWORD"], safe="")
+    host = quote(settings_dict["HOST"] or "localhost", safe="")
+    port = f":{settings_dict['PORT']}" if settings_dict["PORT"] else ""
+    return f"postgres://{credentials}@{host}{port}/{settings_dict['NAME']}"
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Server:
+    """A gunicorn process serving the app on a free local port."""
+
+    def __init__(self, kind, workers):
+        self.kind = kind
+        self.workers = workers
+        self.port = _free_port()
+
+    def __enter__(self):
+        env = {
+            **os.environ,
+            "DATABASE_URL": database_url(connection.settings_dict),
+            "MEDIA_STORAGE_BACKEND": "store.storage.VariantFileSystemStorage",
+            "STORE_LOG_LEVEL": "WARNING",
+        }
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", *SERVERS[self.kind], "--workers", str(self.workers),
+             "--bind", f"127.0.0.1:{self.port}", "--log-level", "warning"],
+            cwd=settings.BASE_DIR, env=env,
+        )
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=1).close()
+                return self
+            except OSError:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    self.process.kill()
+                    raise RuntimeError(f"gunicorn ({self.kind}) did not start")
+                time.sleep(0.1)
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        self.process.wait(timeout=30)
+
+
+def load(port, path, headers, concurrency, requests):
+    """
+    Send ``requests`` GETs from ``concurrency`` clients at once; returns
+    (wall seconds, latencies in ms, status codes). Every request opens its
+    own connection, as gunicorn's sync workers do not keep them alive.
+    """
+    def worker(count):
+        latencies, statuses = [], []
+        for _ in range(count):
+            started = time.perf_counter()
+            client = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+            try:
+                client.request("GET", path, headers=headers)
+                response = client.getresponse()
+                response.read()
+            finally:
+                client.close()
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses.append(response.status)
+        return latencies, statuses
+
+    shares = [requests // concurrency + (n < requests % concurrency) for n in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(worker, shares))
+    wall = time.perf_counter() - started
+    return wall, [ms for latencies, _ in results for ms in latencies], [code for _, codes in results for code in codes]
+
+
+def run_throughput(workers=2, concurrency=32, requests=2000, pairs=THROUGHPUT_PAIRS, progress=None):
+    """
+    Serve the current database with gunicorn sync workers and with ASGI
+    workers (same worker count) and drive each sync route and its async
+    twin with concurrent requests. The load generator runs on the same
+    machine, so compare the two rows of a pair rather than absolute numbers.
+    """
+    user, _ = User.objects.get_or_create(
+        username="bench-throughput", defaults={"email": "throughput@example.com"}
+    )
+    token = str(RefreshToken.for_user(user).access_token)
+    product = Product.objects.order_by("pk").values_list("pk", flat=True).first()
+    Cart.objects.get_or_create(user=user)
+
+    results = []
+    for kind, index in (("wsgi", 1), ("asgi", 2)):
+        with Server(kind, workers) as server:
+            for pair in pairs:
+                name, path, auth = pair[0], pair[index].format(product=product), pair[3]
+                headers = {"Authorization": f"Bearer {token}"} if auth else {}
+                load(server.port, path, headers, workers, workers * 5)
+                wall, latencies, statuses = load(server.port, path, headers, concurrency, requests)
+                result = {
+                    "endpoint": name,
+                    "server": kind,
+                    "path": path,
+                    "workers": workers,
+                    "concurrency": concurrency,
+                    "requests": requests,
+                    "rps": round(requests / wall, 1),
+                    "p50_ms": round(percentile(latencies, 50), 3),
+                    "p95_ms": round(percentile(latencies, 95), 3),
+                    "errors": sum(1 for status in statuses if status >= 400),
+                }
+                results.append(result)
+                if progress:
+                    progress(result)
+    return results
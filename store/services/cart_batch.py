@@ -0,0 +1,92 @@
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+from rest_framework.exceptions import ValidationError
+
+from store.models import CartItem, Product
+
+MAX_OPERATIONS = 100
+OPERATIONS = ("add", "set", "remove")
+
+
+def _int(value, field, index):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValidationError({"operations": [f"{index}: {field} must be an integer."]})
+
+
+def parse_operations(operations):
+    """
+    Validate the request body and fold it into one change per product:
+    ("add", delta) or ("set", quantity), applied in the order given.
+    """
+    if not isinstance(operations, list) or not operations:
+        raise ValidationError({"operations": ["Expected a non-empty list."]})
+    if len(operations) > MAX_OPERATIONS:
+        raise ValidationError({"operations": [f"At most {MAX_OPERATIONS} operations per batch."]})
+
+    changes = {}
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get("op") not in OPERATIONS:
+            raise ValidationError({"operations": [f"{index}: op must be one of {', '.join(OPERATIONS)}."]})
+        product_id = _int(operation.get("product_id"), "product_id", index)
+        op = operation["op"]
+
+        if op == "remove":
+            changes[product_id] = ("set", 0)
+            continue
+
+        quantity = _int(operation.get("quantity", 1), "quantity", index)
+        if op == "set":
+            if quantity < 0:
+                raise ValidationError({"operations": [f"{index}: quantity must not be negative."]})
+            changes[product_id] = ("set", quantity)
+            continue
+
+        kind, current = changes.get(product_id, ("add", 0))
+        changes[product_id] = (kind, max(current + quantity, 0) if kind == "set" else current + quantity)
+    return changes
+
+
+def apply_operations(cart, operations):
+    """
+    Apply a batch of cart operations in one transaction.
+
+    Whatever the batch size this is four statements: a product existence
+    check, an insert of missing (cart, product) rows that skips existing
+    ones, one UPDATE computing every new quantity in the database (so
+    concurrent batches never lose each other's increments) and one DELETE
+    of lines that reached zero.
+    """
+    changes = parse_operations(operations)
+    product_ids = list(changes)
+
+    with transaction.atomic():
+        found = set(Product.objects.filter(pk__in=product_ids).values_list("pk", flat=True))
+        unknown = sorted(set(product_ids) - found)
+        if unknown:
+            raise ValidationError({"operations": [f"Unknown product ids: {', '.join(map(str, unknown))}."]})
+
+        CartItem.objects.bulk_create(
+            [
+                CartItem(cart=cart, product_id=pk, quantity=0)
+                for pk, (kind, value) in changes.items() if value > 0
+            ],
+            ignore_conflicts=True,
+        )
+
+        quantity = Case(
+            *[
+                When(
+                    product_id=pk,
+                    then=Value(value) if kind == "set" else Greatest(F("quantity") + value, Value(0)),
+                )
+                for pk, (kind, value) in changes.items()
+            ],
+            default=F("quantity"),
+            output_field=IntegerField(),
+        )
+        items = CartItem.objects.filter(cart=cart, product_id__in=product_ids)
+        items.update(quantity=quantity)
+        items.filter(quantity=0).delete()
@@ -0,0 +1,150 @@
+from decimal import Decimal
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from store.models import CartItem, Product
+from store.services import images
+
+
+def _key(user_id):
+    return f"cart:snapshot:{user_id}"
+
+
+def _price(value):
+    return f"{Decimal(value):.2f}"
+
+
+def _image_url(name, request):
+    return images.variant_url(Product, name, "thumb", request)
+
+
+def _item(item_id, product_id, name, price, image, quantity, request):
+    return {
+        "id": item_id,
+        "product": product_id,
+        "product_name": name,
+        "price": _price(price),
+        "quantity": quantity,
+        "product_image": _image_url(image, request),
+    }
+
+
+def _cart_key(cart_id):
+    return f"cart:version:{cart_id}"
+
+
+def _product_key(product_id):
+    return f"cart:product:{product_id}"
+
+
+def _bump(keys):
+    # Now, and again once the write commits: a snapshot built from the
+    # rows as they were before the commit cannot outlive it.
+    def apply():
+        cache.set_many({key: uuid4().hex for key in keys}, settings.CART_SNAPSHOT_TIMEOUT)
+
+    apply()
+    transaction.on_commit(apply)
+
+
+def _lines(cart_id):
+    return (
+        CartItem.objects.filter(cart_id=cart_id)
+        .order_by("pk")
+        .values_list(
+            "pk", "product_id", "product__name", "product__effective_price", "product__image", "quantity"
+        )
+    )
+
+
+def _product_ids(cart_id):
+    return CartItem.objects.filter(cart_id=cart_id).values_list("product_id", flat=True)
+
+
+def _version_keys(cart_id, product_ids):
+    return [_cart_key(cart_id)] + [_product_key(pk) for pk in product_ids]
+
+
+def _versions(keys):
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        # add() never overwrites a newer version set by a concurrent write.
+        for key in missing:
+            cache.add(key, uuid4().hex, settings.CART_SNAPSHOT_TIMEOUT)
+        found.update(cache.get_many(missing))
+    return found
+
+
+async def _aversions(keys):
+    found = await cache.aget_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            await cache.aadd(key, uuid4().hex, settings.CART_SNAPSHOT_TIMEOUT)
+        found.update(await cache.aget_many(missing))
+    return found
+
+
+def get(user_id):
+    """
+    Return the cached cart payload for a user, or None.
+
+    The snapshot records the version of the cart and of each product in
+    it when it was built. Any cart write, or a change to one of those
+    products, makes it stale; writes elsewhere in the catalog do not.
+    """
+    entry = cache.get(_key(user_id))
+    if entry is None:
+        return None
+    if cache.get_many(list(entry["versions"])) != entry["versions"]:
+        return None
+    return entry["cart"]
+
+
+def build(cart, request):
+    """Read the cart from the database and cache it as the user's snapshot."""
+    # Versions are read before the lines so a concurrent write is never
+    # masked: it bumps its version only after it commits.
+    versions = _versions(_version_keys(cart.pk, _product_ids(cart.pk)))
+    data = {"id": cart.pk, "items": [_item(*line, request) for line in _lines(cart.pk)]}
+    cache.set(_key(cart.user_id), {"versions": versions, "cart": data}, settings.CART_SNAPSHOT_TIMEOUT)
+    return data
+
+
+async def aget(user_id):
+    """Async get()."""
+    entry = await cache.aget(_key(user_id))
+    if entry is None:
+        return None
+    if await cache.aget_many(list(entry["versions"])) != entry["versions"]:
+        return None
+    return entry["cart"]
+
+
+async def abuild(cart, request):
+    """Async build()."""
+    product_ids = [pk async for pk in _product_ids(cart.pk)]
+    versions = await _aversions(_version_keys(cart.pk, product_ids))
+    data = {"id": cart.pk, "items": [_item(*line, request) async for line in _lines(cart.pk)]}
+    await cache.aset(
+        _key(cart.user_id), {"versions": versions, "cart": data}, settings.CART_SNAPSHOT_TIMEOUT
+    )
+    return data
+
+
+def invalidate(user_id):
+    cache.delete(_key(user_id))
+
+
+def cart_changed(cart_id):
+    """Make the snapshot of this cart stale, now and after commit."""
+    _bump([_cart_key(cart_id)])
+
+
+def products_changed(product_ids):
+    """Make the snapshots of carts holding these products stale, now and after commit."""
+    _bump([_product_key(pk) for pk in product_ids])
@@ -0,0 +1,148 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+
+class LRUCache:
+    """Small thread-safe least-recently-used map for one worker process."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def _plain(data):
+    # ReturnList/ReturnDict keep a reference to their serializer; drop it
+    # so entries pickle into the shared backend.
+    if isinstance(data, (ReturnList, list)):
+        return [_plain(item) for item in data]
+    if isinstance(data, (ReturnDict, dict)):
+        return {key: _plain(value) for key, value in data.items()}
+    return data
+
+
+class TieredCatalogCache:
+    """
+    Catalog response cache: a per-worker LRU in front of the shared Django
+    cache. Keys embed the catalog version token, so a version bump (see
+    store.services.catalog_versions) makes every older entry unreachable
+    in both tiers at once.
+    """
+
+    def __init__(self, maxsize, timeout, alias="default"):
+        self.local = LRUCache(maxsize)
+        self.timeout = timeout
+        self.alias = alias
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def make_key(self, namespace, token, request):
+        params = sorted(request.query_params.lists())
+        renderer = getattr(request, "accepted_renderer", None)
+        raw = f"{request.path}?{params}:{getattr(renderer, 'format', '')}"
+        return f"catalog:{namespace}:{token}:{hashlib.md5(raw.encode()).hexdigest()}"
+
+    def get(self, key):
+        data = self.local.get(key)
+        if data is not None:
+            self._count("local_hits")
+            return data
+
+        data = self.shared.get(key)
+        if data is not None:
+            self._count("shared_hits")
+            self.local.set(key, data)
+            return data
+
+        self._count("misses")
+        return None
+
+    def set(self, key, data):
+        data = _plain(data)
+        self.local.set(key, data)
+        self.shared.set(key, data, self.timeout)
+
+    async def aget(self, key):
+        data = self.local.get(key)
+        if data is not None:
+            self._count("local_hits")
+            return data
+
+        data = await self.shared.aget(key)
+        if data is not None:
+            self._count("shared_hits")
+            self.local.set(key, data)
+            return data
+
+        self._count("misses")
+        return None
+
+    async def aset(self, key, data):
+        data = _plain(data)
+        self.local.set(key, data)
+        await self.shared.aset(key, data, self.timeout)
+
+    def stats(self):
+        requests = self.local_hits + self.shared_hits + self.misses
+        hits = self.local_hits + self.shared_hits
+        return {
+            "local_hits": self.local_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_ratio": round(hits / requests, 4) if requests else None,
+            "local_entries": len(self.local),
+            "local_maxsize": self.local.maxsize,
+        }
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_catalog_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TieredCatalogCache(
+                    maxsize=settings.CATALOG_CACHE_LRU_SIZE,
+                    timeout=settings.CATALOG_CACHE_TIMEOUT,
+                )
+    return _cache
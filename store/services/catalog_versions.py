@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from store.models import CatalogVersion
+
+
+def _cache_key(name):
+    return f"catalog:version:{name}"
+
+
+def bump(*names):
+    """
+    Advance the version of catalog models after the current transaction
+    commits, so the counter row is never held locked by a long write. The
+    new value is pushed into the shared cache for readers.
+    """
+    def apply():
+        now = timezone.now()
+        for name in names:
+            updated = CatalogVersion.objects.filter(name=name).update(
+                version=F("version") + 1, updated_at=now
+            )
+            if not updated:
+                CatalogVersion.objects.get_or_create(
+                    name=name, defaults={"version": 1, "updated_at": now}
+                )
+        rows = CatalogVersion.objects.filter(name__in=names)
+        cache.set_many(
+            {_cache_key(row.name): (row.version, row.updated_at) for row in rows},
+            settings.CATALOG_VERSION_TIMEOUT,
+        )
+
+    transaction.on_commit(apply)
+
+
+def _token(names, versions):
+    token = ".".join(f"{name}{versions[name][0]}" for name in names)
+    modified = [updated_at for _, updated_at in versions.values() if updated_at]
+    return token, max(modified) if modified else None
+
+
+def current(*names):
+    """
+    Return (token, last_modified) for the given models. Versions are read
+    from the shared cache, falling back to one query for any misses.
+    """
+    found = cache.get_many([_cache_key(name) for name in names])
+    versions = {name: found[_cache_key(name)] for name in names if _cache_key(name) in found}
+
+    missing = [name for name in names if name not in versions]
+    if missing:
+        rows = {row.name: row for row in CatalogVersion.objects.filter(name__in=missing)}
+        for name in missing:
+            row = rows.get(name)
+            versions[name] = (row.version, row.updated_at) if row else (0, None)
+            # add() never overwrites a newer value pushed by bump().
+            cache.add(_cache_key(name), versions[name], settings.CATALOG_VERSION_TIMEOUT)
+
+    return _token(names, versions)
+
+
+async def acurrent(*names):
+    """Async current(), for async views."""
+    found = await cache.aget_many([_cache_key(name) for name in names])
+    versions = {name: found[_cache_key(name)] for name in names if _cache_key(name) in found}
+
+    missing = [name for name in names if name not in versions]
+    if missing:
+        rows = {row.name: row async for row in CatalogVersion.objects.filter(name__in=missing)}
+        for name in missing:
+            row = rows.get(name)
+            versions[name] = (row.version, row.updated_at) if row else (0, None)
+            await cache.aadd(_cache_key(name), versions[name], settings.CATALOG_VERSION_TIMEOUT)
+
+    return _token(names, versions)
@@ -0,0 +1,62 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import DecimalField, F, Sum, Window
+
+from store.models import CartItem, Order, OrderItem
+from store.services import cart_snapshot, stock
+
+
+def place_order(cart, user, address, city, state, delivery_fee):
+    """
+    Turn the cart into a pending order inside one transaction.
+
+    Returns None if the cart is empty and raises stock.InsufficientStock
+    (rolling everything back) if a product has fewer units left than the
+    cart asks for. The cost does not depend on the number of lines: one
+    joined read of the lines (with the cart total computed by the
+    database as a window sum), one conditional update taking the stock,
+    one insert for the order, one bulk insert for its lines and one
+    delete to clear the cart. The order enters the sales rollup once the
+    transaction commits.
+    """
+    with transaction.atomic():
+        items = CartItem.objects.filter(cart=cart)
+        lines = list(
+            items.annotate(
+                cart_total=Window(
+                    Sum(F("quantity") * F("product__effective_price")),
+                    output_field=DecimalField(max_digits=12, decimal_places=2),
+                )
+            ).values_list("product_id", "quantity", "product__effective_price", "cart_total")
+        )
+        if not lines:
+            return None
+
+        # Stock first: a short cart fails before anything is written, and
+        # the sales rollup, whose cells every checkout updates, is only
+        # touched after the commit (see store.signals).
+        units = Counter()
+        for product_id, quantity, _, _ in lines:
+            units[product_id] += quantity
+        stock.reserve(units)
+
+        order = Order.objects.create(
+            user=user,
+            total_amount=lines[0][3] + delivery_fee,
+            delivery_fee=delivery_fee,
+            address=address,
+            city=city,
+            state=state,
+            status="pending",
+            stock_held_until=stock.hold_expiry(),
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product_id=product_id, quantity=quantity, price=price)
+            for product_id, quantity, price, _ in lines
+        ])
+
+        items.delete()
+        cart_snapshot.cart_changed(cart.pk)
+
+    return order
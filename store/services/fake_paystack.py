@@ -0,0 +1,145 @@
+import json
+import random
+import re
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakePaystackServer:
+    """
+    Local stand-in for the Paystack transaction API.
+
+    Serves ``POST /transaction/initialize`` and
+    ``GET /transaction/verify/<reference>`` with Paystack-shaped JSON.
+    ``latency`` delays every answer, ``failure_rate`` turns a random share
+    of answers into HTTP 500s and ``fail_next()`` queues deterministic
+    failures, so client timeouts, retries and the circuit breaker can be
+    exercised and benchmarked offline.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, failure_rate=0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.transactions = {}
+        self.request_count = 0
+        self._failures = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def fail_next(self, count=1, status=500):
+        with self._lock:
+            self._failures.extend([status] * count)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _next_failure(self):
+        with self._lock:
+            self.request_count += 1
+            if self._failures:
+                return self._failures.pop(0)
+        if self.failure_rate and random.random() < self.failure_rate:
+            return 500
+        return None
+
+    def _initialize(self, payload):
+        reference = payload.get("reference") or secrets.token_hex(8)
+        if not payload.get("email") or not payload.get("amount"):
+            return 400, {"status": False, "message": "Email and amount are required"}
+        with self._lock:
+            if reference in self.transactions:
+                return 400, {"status": False, "message": "Duplicate Transaction Reference"}
+            self.transactions[reference] = {"amount": payload["amount"], "email": payload["email"]}
+        return 200, {
+            "status": True,
+            "message": "Authorization URL created",
+            "data": {
+                "authorization_url": f"{self.url}/checkout/{reference}",
+                "access_code": secrets.token_hex(6),
+                "reference": reference,
+            },
+        }
+
+    def _verify(self, reference):
+        transaction = self.transactions.get(reference)
+        if transaction is None:
+            return 400, {"status": False, "message": "Transaction reference not found"}
+        return 200, {
+            "status": True,
+            "message": "Verification successful",
+            "data": {"status": "success", "reference": reference, **transaction},
+        }
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length)
+                if self.path != "/transaction/initialize":
+                    return self.respond(404, {"status": False, "message": "Not found"})
+                try:
+                    payload = json.loads(body or b"{}")
+                except ValueError:
+                    return self.respond(400, {"status": False, "message": "Invalid JSON"})
+                self.handle_call(lambda: fake._initialize(payload))
+
+            def do_GET(self):
+                match = re.fullmatch(r"/transaction/verify/([^/?]+)", self.path)
+                if not match:
+                    return self.respond(404, {"status": False, "message": "Not found"})
+                self.handle_call(lambda: fake._verify(match.group(1)))
+
+            def handle_call(self, call):
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if not self.headers.get("Authorization", "").startswith("Bearer "):
+                    return self.respond(401, {"status": False, "message": "Invalid key"})
+                failure = fake._next_failure()
+                if failure:
+                    return self.respond(failure, {"status": False, "message": "Server error"})
+                self.respond(*call())
+
+            def respond(self, status, payload):
+                body = json.dumps(payload).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up (timed out) before we answered.
+                    pass
+
+        return Handler
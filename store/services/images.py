@@ -0,0 +1,49 @@
+from functools import lru_cache
+
+
+@lru_cache(maxsize=4096)
+def _variant_url(storage, name, width, height):
+    return storage.variant_url(name, width, height)
+
+
+def _storage(model, field):
+    storage = model._meta.get_field(field).storage
+    return storage if hasattr(storage, "variant_url") else None
+
+
+def variant_url(model, name, variant, request=None, field="image"):
+    """URL of one of the model's IMAGE_VARIANTS for a stored image name."""
+    storage = _storage(model, field)
+    if not name or storage is None:
+        return None
+    width, height = model.IMAGE_VARIANTS[variant]
+    url = _variant_url(storage, name, width, height)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def variant_urls(model, name, request=None, field="image"):
+    """
+    Return {variant: url} for every variant declared in the model's
+    IMAGE_VARIANTS, plus a ``srcset`` string. URLs depend only on the
+    stored name, so they are derived without storage API calls and
+    memoized per process.
+    """
+    storage = _storage(model, field)
+    if not name or storage is None:
+        return None
+
+    urls = {}
+    srcset = []
+    for variant, (width, _) in model.IMAGE_VARIANTS.items():
+        urls[variant] = variant_url(model, name, variant, request, field)
+        srcset.append(f"{urls[variant]} {width}w")
+    urls["srcset"] = ", ".join(srcset)
+    return urls
+
+
+def generate_variants(instance, field="image"):
+    """Render the image variants where the storage builds them up front."""
+    fieldfile = getattr(instance, field)
+    storage = fieldfile.storage
+    if fieldfile and hasattr(storage, "generate_variants"):
+        storage.generate_variants(fieldfile.name, instance.IMAGE_VARIANTS.values())
@@ -1,44 +1,101 @@
-from django.db.models import Sum, Count, F
-from django.db.models.functions import TruncDate
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q, Sum, F
 from django.utils import timezone
 from datetime import timedelta
-from store.models import Order, OrderItem
+from store.models import Product, SalesRollup
+from store.routers import replica_reads
+
+REVENUE_STATUSES = ["paid", "delivered", "shipped", "completed"]
+OPEN_STATUSES = ["paid", "pending", "shipped"]
+CLOSED_STATUSES = ["delivered", "completed", "cancelled"]
+
+DASHBOARD_VERSION_KEY = "analytics:dashboard:version"
+
+
+def _order_totals():
+    # Whole-order cells of the sales cube (see SalesRollup).
+    return SalesRollup.objects.filter(category__isnull=True)
 
 
 def daily_sales(days=7):
-    start_date = timezone.now() - timedelta(days=days)
+    start_date = (timezone.now() - timedelta(days=days)).date()
     return (
-        Order.objects.filter(status__in=[
-                             "paid", "delivered", "shipped" < "completed"], created_at__gte=start_date)
-        .annotate(day=TruncDate("created_at"))
+        _order_totals()
+        .filter(status__in=REVENUE_STATUSES, day__gte=start_date)
         .values("day")
-        .annotate(total=Sum("total_amount"), orders=Count("id"))
+        .annotate(total=Sum("revenue"), orders=Sum("orders"))
         .order_by("day")
     )
 
 
 def best_selling_products(limit=5):
+    # Read from the units_sold counter (see Product) instead of grouping
+    # every order line ever sold. Units count from the moment an order
+    # takes them until it is cancelled, not only while it is paid.
     return (
-        OrderItem.objects.filter(order__status="paid")
-        .values("product__name")
-        .annotate(
-            quantity_sold=Sum("quantity"),
-            revenue=Sum(F("price") * F("quantity")),
-        )
-        .order_by("-quantity_sold")[:limit]
+        Product.objects.filter(units_sold__gt=0)
+        .order_by("-units_sold")
+        .values(product__name=F("name"), quantity_sold=F("units_sold"))[:limit]
     )
 
 
 def top_products(limit=5):
     return (
-        OrderItem.objects.values("product__name")
-        .annotate(total_sold=Sum("quantity"))
-        .order_by("-total_sold")[:limit]
+        Product.objects.filter(units_sold__gt=0)
+        .order_by("-units_sold")
+        .values(product__name=F("name"), total_sold=F("units_sold"))[:limit]
     )
 
 
-def total_revenue(): (
-    Order.objects.filter(status__in=["paid", "delivered", "shipped"],)
-    .aggregate(total=Sum("total_amount"))["total"]
-    or 0
-)
+def dashboard_summary():
+    summary = _order_totals().aggregate(
+        total_orders=Sum("orders"),
+        pending_orders=Sum("orders", filter=Q(status__in=OPEN_STATUSES)),
+        completed_orders=Sum("orders", filter=Q(status__in=CLOSED_STATUSES)),
+        total_revenue=Sum("revenue", filter=Q(status__in=REVENUE_STATUSES)),
+    )
+    return {key: value or 0 for key, value in summary.items()}
+
+
+def dashboard(fresh=False):
+    """
+    The admin dashboard payload, cached under a version that every order
+    change bumps. ``fresh`` recomputes it and refreshes the cache.
+    """
+    version = cache.get(DASHBOARD_VERSION_KEY, 0)
+    key = f"analytics:dashboard:{version}:{timezone.now().date()}"
+    if not fresh:
+        data = cache.get(key)
+        if data is not None:
+            return data
+
+    # May lag the primary by the replica delay, like any cached payload.
+    with replica_reads():
+        data = {
+            "summary": dashboard_summary(),
+            "daily_sales": list(daily_sales(7)),
+            "top_products": list(best_selling_products(5)),
+        }
+    cache.set(key, data, settings.ANALYTICS_CACHE_TIMEOUT)
+    return data
+
+
+def invalidate_dashboard():
+    def bump():
+        try:
+            cache.incr(DASHBOARD_VERSION_KEY)
+        except ValueError:
+            cache.set(DASHBOARD_VERSION_KEY, 1, None)
+
+    transaction.on_commit(bump)
+
+
+def total_revenue():
+    return (
+        _order_totals()
+        .filter(status__in=REVENUE_STATUSES)
+        .aggregate(total=Sum("revenue"))["total"]
+        or 0
+    )
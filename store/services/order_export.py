@@ -0,0 +1,118 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
+from itertools import groupby
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from store.models import Order, OrderItem
+
+CHUNK_SIZE = 2000
+
+ORDER_FIELDS = (
+    "id", "created_at", "status", "user__username", "user__email", "address", "city",
+    "state", "delivery_fee", "total_amount", "paid_at", "paystack_reference",
+)
+ITEM_FIELDS = ("product_id", "product__name", "quantity", "price")
+
+CSV_HEADER = (
+    "order_id", "created_at", "status", "username", "email", "address", "city", "state",
+    "delivery_fee", "total_amount", "paid_at", "paystack_reference",
+    "product_id", "product_name", "quantity", "price",
+)
+
+
+def _chunks(orders, size):
+    chunk = []
+    for order in orders:
+        chunk.append(order)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_orders(queryset, chunk_size=None):
+    """
+    Yield (order, items) pairs as plain tuples, ordered by id.
+
+    Orders are read through a server-side cursor where the database has
+    one; the lines of each chunk of orders are then fetched in one query.
+    Memory use is bounded by the chunk size, not the export size.
+    """
+    chunk_size = chunk_size or CHUNK_SIZE
+    orders = queryset.order_by("id").values_list(*ORDER_FIELDS).iterator(chunk_size=chunk_size)
+    for chunk in _chunks(orders, chunk_size):
+        lines = (
+            OrderItem.objects.filter(order_id__in=[order[0] for order in chunk])
+            .order_by("order_id", "id")
+            .values_list("order_id", *ITEM_FIELDS)
+        )
+        items = {
+            order_id: [line[1:] for line in group]
+            for order_id, group in groupby(lines, key=lambda line: line[0])
+        }
+        for order in chunk:
+            yield order, items.get(order[0], [])
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def csv_rows(queryset, chunk_size=None):
+    """One CSV row per order line; orders without lines get one row."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_HEADER)
+    empty = (None,) * len(ITEM_FIELDS)
+    for order, items in iter_orders(queryset, chunk_size):
+        for item in items or [empty]:
+            yield writer.writerow(order + item)
+
+
+def ndjson_lines(queryset, chunk_size=None):
+    """One JSON document per order, with its lines nested."""
+    keys = ("id",) + CSV_HEADER[1:len(ORDER_FIELDS)]
+    item_keys = CSV_HEADER[len(ORDER_FIELDS):]
+    for order, items in iter_orders(queryset, chunk_size):
+        document = dict(zip(keys, order))
+        document["items"] = [dict(zip(item_keys, item)) for item in items]
+        yield json.dumps(document, cls=DjangoJSONEncoder) + "\n"
+
+
+def _date(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: "Must be a date (YYYY-MM-DD)."})
+    return parsed
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_orders(params):
+    """Orders matching the export query: from/to (inclusive dates) and status (comma list)."""
+    queryset = Order.objects.all()
+    # Compare created_at against day boundaries so an index on it applies.
+    date_from = _date(params, "from")
+    if date_from:
+        queryset = queryset.filter(created_at__gte=_start_of(date_from))
+    date_to = _date(params, "to")
+    if date_to:
+        queryset = queryset.filter(created_at__lt=_start_of(date_to + timedelta(days=1)))
+    statuses = [value for value in params.get("status", "").split(",") if value]
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+    return queryset
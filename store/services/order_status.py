@@ -0,0 +1,98 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from store.models import Order
+from store.services import sales_rollup, stock
+
+MAX_ORDERS = 1000
+
+ALLOWED_STATUS_TRANSITIONS = {
+    "pending": ["paid", "cancelled"],
+    "paid": ["shipped", "cancelled"],
+    "shipped": ["delivered"],
+    "delivered": ["completed"],
+    "completed": [],
+    "cancelled": [],
+}
+
+
+def predecessors(status):
+    """The statuses an order may move to ``status`` from."""
+    return [source for source, targets in ALLOWED_STATUS_TRANSITIONS.items() if status in targets]
+
+
+def parse_bulk_request(data):
+    """Validate a bulk status body: {"ids": [order ids], "status": target}."""
+    ids = data.get("ids") if hasattr(data, "get") else None
+    if not isinstance(ids, list) or not ids:
+        raise ValidationError({"ids": ["Expected a non-empty list of order ids."]})
+    if len(ids) > MAX_ORDERS:
+        raise ValidationError({"ids": [f"At most {MAX_ORDERS} orders per request."]})
+    if not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+        raise ValidationError({"ids": ["Order ids must be integers."]})
+
+    status = data.get("status")
+    if status not in ALLOWED_STATUS_TRANSITIONS:
+        raise ValidationError({"status": [f"Must be one of {', '.join(ALLOWED_STATUS_TRANSITIONS)}."]})
+    return ids, status
+
+
+def transition(order_ids, status, **changes):
+    """
+    Move orders to ``status`` with conditional updates, so concurrent
+    writers cannot make an order skip a step or move twice.
+
+    Orders are locked as their statuses are read, grouped by that status,
+    and each group moves in one ``UPDATE ... WHERE id IN (...) AND status
+    = <read status>`` (a single statement unless ``status`` has several
+    allowed predecessors); the rollup and stock holds of all moved orders
+    follow in one pass. An order whose status changed in between (only
+    possible where the database cannot lock rows) is left alone and
+    reported. Returns (moved ids, {id: reason} for the orders that did
+    not move).
+    """
+    order_ids = set(order_ids)
+    now = timezone.now()
+    if status == "paid":
+        changes.setdefault("paid_at", now)
+
+    moved = []
+    failed = {}
+    with transaction.atomic(savepoint=False):
+        read = dict(
+            Order.objects.filter(pk__in=order_ids).select_for_update().values_list("pk", "status")
+        )
+        failed.update({pk: "Order not found" for pk in order_ids - read.keys()})
+
+        allowed = predecessors(status)
+        groups = defaultdict(list)
+        for pk, previous in read.items():
+            if previous in allowed:
+                groups[previous].append(pk)
+            else:
+                failed[pk] = f"Cannot change status from {previous} to {status}"
+
+        for previous, ids in sorted(groups.items()):
+            fields = {"status": status, "status_changed_at": now, **changes}
+            if previous == "pending" and status != "cancelled":
+                # The order went ahead: the stock it holds is sold.
+                fields["stock_held_until"] = None
+            updated = Order.objects.filter(pk__in=ids, status=previous).update(**fields)
+            if updated < len(ids):
+                won = set(
+                    Order.objects.filter(pk__in=ids, status=status, status_changed_at=now)
+                    .values_list("pk", flat=True)
+                )
+                for pk in set(ids) - won:
+                    failed[pk] = "Order status changed by another request"
+                ids = list(won)
+            moved.extend(ids)
+
+        sales_rollup.sync_orders(moved)
+        if status == "cancelled" and moved:
+            stock.release(moved)
+
+    return sorted(moved), failed
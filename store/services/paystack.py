@@ -0,0 +1,183 @@
+import logging
+import threading
+import time
+from urllib.parse import quote
+
+import requests
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class PaystackError(Exception):
+    """Paystack could not be reached or kept failing within the deadline."""
+
+
+class CircuitOpenError(PaystackError):
+    """Calls are short-circuited after repeated Paystack failures."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After ``threshold`` failures in a row the circuit opens and calls fail
+    fast for ``reset_timeout`` seconds. The first call after that is let
+    through as a trial; success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, threshold=5, reset_timeout=30):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError("Paystack circuit is open")
+            # Half-open: allow this call, push the window out for the rest.
+            self.opened_at = time.monotonic()
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class PaystackClient:
+    """
+    Paystack API client on a pooled keep-alive session.
+
+    Every call is bounded by ``deadline`` seconds overall, including
+    retries. Connection failures are always retried with exponential
+    backoff; read timeouts and 5xx answers are only retried for
+    idempotent calls, since Paystack may already have acted on them.
+    4xx answers are returned to the caller as Paystack's JSON body.
+    """
+
+    def __init__(self, secret_key, base_url="https://api.paystack.co",
+                 connect_timeout=3.05, read_timeout=10, deadline=15,
+                 max_retries=2, backoff=0.25, pool_size=10, breaker=None):
+        self.base_url = base_url.rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {secret_key}",
+            "Content-Type": "application/json",
+        })
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def initialize_transaction(self, *, email, amount, reference, callback_url=None):
+        payload = {"email": email, "amount": amount, "reference": reference}
+        if callback_url:
+            payload["callback_url"] = callback_url
+        return self._request("POST", "/transaction/initialize", json=payload)
+
+    def verify_transaction(self, reference):
+        return self._request(
+            "GET", f"/transaction/verify/{quote(reference, safe='')}", idempotent=True
+        )
+
+    def close(self):
+        self.session.close()
+
+    def _request(self, method, path, idempotent=False, **kwargs):
+        url = f"{self.base_url}{path}"
+        expires = time.monotonic() + self.deadline
+        attempt = 0
+
+        while True:
+            self.breaker.before_call()
+            remaining = expires - time.monotonic()
+            timeout = (min(self.connect_timeout, remaining), min(self.read_timeout, remaining))
+
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except requests.ConnectionError as exc:
+                error, retryable = exc, True
+            except requests.Timeout as exc:
+                error, retryable = exc, idempotent
+            else:
+                if response.status_code < 500:
+                    try:
+                        data = response.json()
+                    except ValueError:
+                        # An HTML error page or empty body, e.g. from a proxy.
+                        error = PaystackError(
+                            f"Paystack returned a non-JSON body with HTTP {response.status_code}"
+                        )
+                    else:
+                        self.breaker.record_success()
+                        return data
+                else:
+                    error = PaystackError(f"Paystack returned HTTP {response.status_code}")
+                retryable = idempotent
+
+            self.breaker.record_failure()
+            attempt += 1
+            delay = self.backoff * 2 ** (attempt - 1)
+            if not retryable or attempt > self.max_retries or time.monotonic() + delay >= expires:
+                logger.warning("Paystack %s %s failed after %d attempt(s): %s", method, path, attempt, error)
+                raise PaystackError(str(error)) from error
+            time.sleep(delay)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = PaystackClient(
+                    settings.PAYSTACK_SECRET_KEY,
+                    base_url=settings.PAYSTACK_BASE_URL,
+                    connect_timeout=settings.PAYSTACK_CONNECT_TIMEOUT,
+                    read_timeout=settings.PAYSTACK_READ_TIMEOUT,
+                    deadline=settings.PAYSTACK_DEADLINE,
+                    max_retries=settings.PAYSTACK_MAX_RETRIES,
+                    breaker=CircuitBreaker(
+                        threshold=settings.PAYSTACK_BREAKER_THRESHOLD,
+                        reset_timeout=settings.PAYSTACK_BREAKER_RESET,
+                    ),
+                )
+    return _client
+
+
+@receiver(setting_changed)
+def _reset_client(setting, **kwargs):
+    global _client
+    if setting.startswith("PAYSTACK_") and _client is not None:
+        _client.close()
+        _client = None
+
+
+def initialize_transaction(**kwargs):
+    return get_client().initialize_transaction(**kwargs)
+
+
+def verify_transaction(reference):
+    return get_client().verify_transaction(reference)
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from store.models import Order, PaystackEvent
+from store.services import order_status, paystack, stock
+from store.services.paystack import PaystackError
+
+logger = logging.getLogger(__name__)
+
+
+def event_key(payload, body=None):
+    """
+    Paystack re-sends the same event on retries; key it on event +
+    transaction, or on a hash of the body for events naming neither.
+    """
+    data = payload.get("data") or {}
+    identity = data.get("id") or data.get("reference")
+    if not identity:
+        if body is None:
+            body = json.dumps(payload, sort_keys=True).encode()
+        identity = hashlib.sha256(body).hexdigest()
+    return f"{payload.get('event', '')}:{identity}"
+
+
+def record_event(payload, body=None):
+    """Append a webhook event to the log; duplicates are dropped by the unique key."""
+    data = payload.get("data") or {}
+    PaystackEvent.objects.bulk_create(
+        [
+            PaystackEvent(
+                event_id=event_key(payload, body)[:150],
+                event=payload.get("event", ""),
+                reference=(data.get("reference") or "")[:100],
+                payload=payload,
+            )
+        ],
+        ignore_conflicts=True,
+    )
+
+
+# Statuses of orders whose payment has been taken.
+PAID_STATUSES = ("paid", "shipped", "delivered", "completed")
+
+
+def flag_for_review(orders):
+    """
+    Flag the orders of this queryset that were cancelled but paid for
+    anyway, for a refund or review.
+    """
+    lost = orders.filter(status="cancelled", payment_needs_review=False)
+    lost_ids = list(lost.values_list("pk", flat=True))
+    if lost_ids:
+        Order.objects.filter(pk__in=lost_ids).update(payment_needs_review=True)
+        logger.warning("Payment received for cancelled orders %s; flagged for review", lost_ids)
+
+
+def mark_orders_paid(references, paid_at=None):
+    """
+    Move the pending orders behind these references to paid. A payment
+    for an order that was cancelled meanwhile (e.g. its stock hold ran
+    out) is logged and the order flagged for a refund or review.
+    Returns the number of orders marked paid.
+    """
+    orders = Order.objects.filter(paystack_reference__in=references)
+    order_ids = list(orders.filter(status="pending").values_list("pk", flat=True))
+    paid = []
+    if order_ids:
+        paid, _ = order_status.transition(order_ids, "paid", paid_at=paid_at or timezone.now())
+    flag_for_review(orders)
+    return len(paid)
+
+
+def mark_order_paid(order_id):
+    """
+    Mark one order paid once Paystack verified its payment. Returns None
+    when the order is paid (now or already), else the reason it is not;
+    a cancelled order is flagged for review.
+    """
+    _, failed = order_status.transition([order_id], "paid")
+    if order_id not in failed:
+        return None
+    current = Order.objects.filter(pk=order_id).values_list("status", flat=True).first()
+    if current in PAID_STATUSES:
+        return None
+    logger.warning("Verified payment not applied to order %s: %s", order_id, failed[order_id])
+    flag_for_review(Order.objects.filter(pk=order_id))
+    return failed[order_id]
+
+
+def settle_expired_payments(batch_size=100, now=None):
+    """
+    Settle pending orders whose stock hold ran out after a Paystack
+    payment was started, asking Paystack about each: paid ones are
+    marked paid, failed or abandoned ones cancelled (their stock goes
+    back), and the hold of the rest, still in progress, is extended.
+    Stops early, leaving the rest for the next pass, when Paystack is
+    unavailable. Returns the number of orders paid or cancelled.
+    """
+    now = now or timezone.now()
+    orders = (
+        Order.objects.filter(status="pending", stock_held_until__lte=now)
+        .exclude(paystack_reference__isnull=True)
+        .exclude(paystack_reference="")
+        .order_by("stock_held_until", "pk")
+        .values_list("pk", "paystack_reference")[:batch_size]
+    )
+    outcomes = defaultdict(list)
+    for pk, reference in orders:
+        try:
+            response = paystack.verify_transaction(reference)
+        except PaystackError as exc:
+            logger.warning("Cannot verify %s for order %s: %s", reference, pk, exc)
+            break
+        outcomes[(response.get("data") or {}).get("status")].append(pk)
+
+    settled = 0
+    if outcomes.get("success"):
+        paid, _ = order_status.transition(outcomes.pop("success"), "paid")
+        settled += len(paid)
+    failed = outcomes.pop("failed", []) + outcomes.pop("abandoned", [])
+    if failed:
+        cancelled, _ = order_status.transition(failed, "cancelled")
+        settled += len(cancelled)
+    in_progress = [pk for ids in outcomes.values() for pk in ids]
+    if in_progress:
+        Order.objects.filter(pk__in=in_progress, status="pending").update(stock_held_until=stock.hold_expiry())
+    return settled
+
+
+def process_pending_events(batch_size=100):
+    """
+    Apply one batch of unprocessed events and mark them processed.
+
+    Rows are claimed with SKIP LOCKED where the database supports it, so
+    several workers can drain the log side by side. Returns the number of
+    events handled.
+    """
+    with transaction.atomic():
+        events = list(
+            PaystackEvent.objects.filter(processed_at__isnull=True)
+            .select_for_update(skip_locked=True)
+            .order_by("id")
+            .only("id", "event", "reference")[:batch_size]
+        )
+        if not events:
+            return 0
+
+        paid = {e.reference for e in events if e.event == "charge.success" and e.reference}
+        now = timezone.now()
+        if paid:
+            mark_orders_paid(paid, paid_at=now)
+
+        PaystackEvent.objects.filter(pk__in=[e.pk for e in events]).update(processed_at=now)
+    return len(events)
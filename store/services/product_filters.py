@@ -0,0 +1,163 @@
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Case, Count, IntegerField, Value, When
+from rest_framework.exceptions import ValidationError
+
+from store.models import Product
+
+# Upper bounds of the price facet buckets; the last bucket is open-ended.
+PRICE_BUCKETS = (10000, 50000, 100000, 500000)
+
+# Tags that rank the catalog instead of filtering it.
+ORDERING_TAGS = {
+    "best_seller": "-units_sold",
+    "top_rated": "-average_rating",
+}
+
+# Fields accepted by ?ordering= (each also descending with a leading "-").
+ORDERING_FIELDS = ("effective_price", "price", "created_at", "units_sold", "average_rating")
+
+TRUE_VALUES = {"1", "true", "yes", "on"}
+FALSE_VALUES = {"0", "false", "no", "off"}
+
+
+def _flag(params, name):
+    value = params.get(name)
+    if value is None or value == "":
+        return None
+    value = value.lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValidationError({name: "Must be true or false."})
+
+
+def _price(params, name):
+    value = params.get(name)
+    if value is None or value == "":
+        return None
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise ValidationError({name: "Must be a number."})
+
+
+def filter_products(queryset, params):
+    """
+    Apply the storefront filters from the query string: category (one id
+    or a comma separated list), tag, min_price/max_price (on the
+    effective price), on_sale and in_stock. Filters combine with AND;
+    ``ordering`` sorts by one of ORDERING_FIELDS.
+    """
+    category = params.get("category")
+    if category:
+        try:
+            ids = [int(pk) for pk in category.split(",")]
+        except ValueError:
+            raise ValidationError({"category": "Must be a category id or a comma separated list."})
+        queryset = queryset.filter(category_id__in=ids)
+
+    tag = params.get("tag")
+    if tag in ORDERING_TAGS:
+        queryset = queryset.order_by(ORDERING_TAGS[tag])
+    elif tag:
+        queryset = queryset.filter(tag=tag)
+
+    min_price = _price(params, "min_price")
+    if min_price is not None:
+        queryset = queryset.filter(effective_price__gte=min_price)
+    max_price = _price(params, "max_price")
+    if max_price is not None:
+        queryset = queryset.filter(effective_price__lte=max_price)
+
+    on_sale = _flag(params, "on_sale")
+    if on_sale is not None:
+        queryset = queryset.filter(is_on_sale=on_sale)
+
+    in_stock = _flag(params, "in_stock")
+    if in_stock is True:
+        queryset = queryset.filter(stock__gt=0)
+    elif in_stock is False:
+        queryset = queryset.filter(stock__lte=0)
+
+    ordering = params.get("ordering")
+    if ordering:
+        if ordering.lstrip("-") not in ORDERING_FIELDS:
+            raise ValidationError({"ordering": f"Must be one of {', '.join(ORDERING_FIELDS)}."})
+        queryset = queryset.order_by(ordering)
+
+    return queryset
+
+
+def _price_bucket():
+    return Case(
+        *[When(effective_price__lt=bound, then=Value(i)) for i, bound in enumerate(PRICE_BUCKETS)],
+        default=Value(len(PRICE_BUCKETS)),
+        output_field=IntegerField(),
+    )
+
+
+def _bucket_bounds(index):
+    low = PRICE_BUCKETS[index - 1] if index else 0
+    high = PRICE_BUCKETS[index] if index < len(PRICE_BUCKETS) else None
+    return low, high
+
+
+def facet_counts(queryset):
+    """
+    Count the products in ``queryset`` per category, tag, price bucket and
+    sale flag.
+
+    One grouped query returns the count of every (category, tag, bucket,
+    sale) combination present; each facet is then a sum over that small
+    table, so adding a facet does not add a query.
+    """
+    return _sum_facets(_facet_cells(queryset))
+
+
+async def afacet_counts(queryset):
+    """Async facet_counts()."""
+    return _sum_facets([cell async for cell in _facet_cells(queryset)])
+
+
+def _facet_cells(queryset):
+    return (
+        queryset.order_by()
+        .annotate(price_bucket=_price_bucket())
+        .values("category_id", "category__name", "tag", "price_bucket", "is_on_sale")
+        .annotate(count=Count("pk"))
+    )
+
+
+def _sum_facets(cells):
+    categories = {}
+    tags = defaultdict(int)
+    buckets = defaultdict(int)
+    on_sale = defaultdict(int)
+    for cell in cells:
+        category = categories.setdefault(
+            cell["category_id"],
+            {"id": cell["category_id"], "name": cell["category__name"], "count": 0},
+        )
+        category["count"] += cell["count"]
+        tags[cell["tag"]] += cell["count"]
+        buckets[cell["price_bucket"]] += cell["count"]
+        on_sale[cell["is_on_sale"]] += cell["count"]
+
+    tag_labels = dict(Product.TAG_CHOICES)
+    return {
+        "category": sorted(categories.values(), key=lambda c: (-c["count"], c["name"])),
+        "tag": [
+            {"value": tag, "label": label, "count": tags[tag]}
+            for tag, label in tag_labels.items() if tags[tag]
+        ],
+        "price": [
+            dict(zip(("min", "max"), _bucket_bounds(i)), count=buckets[i])
+            for i in range(len(PRICE_BUCKETS) + 1) if buckets[i]
+        ],
+        "on_sale": [
+            {"value": flag, "count": on_sale[flag]} for flag in (True, False) if on_sale[flag]
+        ],
+    }
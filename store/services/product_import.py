@@ -0,0 +1,139 @@
+import csv
+import io
+import json
+from collections import defaultdict
+
+from django.db import transaction
+
+from store.models import Category, Product
+from store.serializers import ProductImportSerializer
+from store.services import cart_snapshot, catalog_versions
+
+BATCH_SIZE = 500
+
+IMPORT_FIELDS = (
+    "category", "name", "description", "price", "stock", "tag",
+    "discount_price", "is_on_sale", "image",
+)
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def read_rows(content, format):
+    """Parse CSV or JSON (a list of objects) into a list of row dicts."""
+    if isinstance(content, bytes):
+        try:
+            content = content.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise ImportFormatError("File must be UTF-8 encoded")
+    if format == "csv":
+        return list(csv.DictReader(io.StringIO(content)))
+    if format == "json":
+        try:
+            rows = json.loads(content)
+        except json.JSONDecodeError as exc:
+            raise ImportFormatError(f"Invalid JSON: {exc}")
+        if isinstance(rows, dict):
+            rows = rows.get("products")
+        if not isinstance(rows, list):
+            raise ImportFormatError("Expected a list of products")
+        return rows
+    raise ImportFormatError(f"Unsupported format: {format}")
+
+
+def _resolve_categories(rows):
+    slugs = {row["category"] for row in rows if "category" in row}
+    return dict(Category.objects.filter(slug__in=slugs).values_list("slug", "pk"))
+
+
+def _values(attrs, categories):
+    values = {key: value for key, value in attrs.items() if key in IMPORT_FIELDS}
+    if "category" in values:
+        values["category_id"] = categories[values.pop("category")]
+    return values
+
+
+def import_products(rows, batch_size=None, dry_run=False):
+    """
+    Create or update products from row dicts.
+
+    Rows are validated up front and written in batches. Each batch costs one query
+    to load the products it updates, one bulk_create for the new ones and
+    one bulk_update per distinct set of changed fields (usually one, e.g.
+    price alone), so only columns that actually changed are written.
+    Categories are resolved by slug in a single query up front.
+
+    Invalid rows are skipped and reported; returns a summary with
+    per-row errors (``row`` is the 1-based position in the input).
+    """
+    batch_size = batch_size or BATCH_SIZE
+    summary = {"created": 0, "updated": 0, "unchanged": 0, "errors": []}
+
+    validated = []
+    for number, row in enumerate(rows, start=1):
+        serializer = ProductImportSerializer(data=row)
+        if serializer.is_valid():
+            validated.append((number, serializer.validated_data))
+        else:
+            summary["errors"].append({"row": number, "errors": serializer.errors})
+
+    categories = _resolve_categories([attrs for _, attrs in validated])
+
+    with transaction.atomic():
+        for start in range(0, len(validated), batch_size):
+            _import_batch(validated[start:start + batch_size], categories, summary, dry_run)
+
+        if not dry_run and (summary["created"] or summary["updated"]):
+            catalog_versions.bump("product", "search")
+
+    summary["errors"].sort(key=lambda error: error["row"])
+    return summary
+
+
+def _import_batch(batch, categories, summary, dry_run):
+    valid = []
+    for number, attrs in batch:
+        if "category" in attrs and attrs["category"] not in categories:
+            summary["errors"].append({"row": number, "errors": {"category": ["Unknown category slug."]}})
+        else:
+            valid.append((number, attrs))
+
+    ids = {attrs["id"] for _, attrs in valid if "id" in attrs}
+    columns = ["category_id" if field == "category" else field for field in IMPORT_FIELDS]
+    existing = Product.objects.only(*columns).in_bulk(ids)
+
+    to_create = []
+    changed = defaultdict(list)
+    for number, attrs in valid:
+        values = _values(attrs, categories)
+        if "id" not in attrs:
+            to_create.append(Product(**values))
+            continue
+
+        product = existing.get(attrs["id"])
+        if product is None:
+            summary["errors"].append({"row": number, "errors": {"id": ["Unknown product id."]}})
+            continue
+
+        fields = frozenset(
+            field for field, value in values.items()
+            if (getattr(product, field).name if field == "image" else getattr(product, field)) != value
+        )
+        if not fields:
+            summary["unchanged"] += 1
+            continue
+        for field in fields:
+            setattr(product, field, values[field])
+        changed[fields].append(product)
+
+    summary["created"] += len(to_create)
+    summary["updated"] += sum(len(products) for products in changed.values())
+    if dry_run:
+        return
+
+    Product.objects.bulk_create(to_create)
+    for fields, products in changed.items():
+        Product.objects.bulk_update(products, sorted(fields))
+    cart_snapshot.products_changed([product.pk for products in changed.values() for product in products])
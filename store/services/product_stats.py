@@ -0,0 +1,73 @@
+from django.db.models import Case, Count, Exists, F, FloatField, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from store.models import Order, OrderItem, Product, Review
+from store.services import catalog_versions
+
+
+def _average(rating_sum, review_count):
+    return Coalesce(
+        Cast(rating_sum, FloatField()) / NullIf(review_count, 0),
+        Value(0.0),
+    )
+
+
+def record_review(product_id, rating, sign=1):
+    """Add (sign=1) or remove (sign=-1) one review from a product's counters."""
+    rating_sum = F("rating_sum") + sign * rating
+    review_count = F("review_count") + sign
+    Product.objects.filter(pk=product_id).update(
+        review_count=review_count,
+        rating_sum=rating_sum,
+        average_rating=_average(rating_sum, review_count),
+    )
+    catalog_versions.bump("product")
+
+
+def record_units_sold(quantities, order_id=None):
+    """
+    Apply a {product_id: units} mapping to units_sold in one statement.
+    With ``order_id`` the units are only applied while that order is not
+    cancelled, checked in the same statement.
+    """
+    quantities = {pk: qty for pk, qty in quantities.items() if qty}
+    if not quantities:
+        return
+
+    delta = Case(
+        *[When(pk=pk, then=Value(qty)) for pk, qty in quantities.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    products = Product.objects.filter(pk__in=quantities)
+    if order_id is not None:
+        products = products.filter(
+            Exists(Order.objects.filter(pk=order_id).exclude(status="cancelled"))
+        )
+    products.update(units_sold=F("units_sold") + delta)
+    catalog_versions.bump("product")
+
+
+def rebuild_product_stats(product_ids=None):
+    """
+    Recompute the counters from the Review and OrderItem tables.
+    units_sold counts the lines of orders that are not cancelled.
+    """
+    products = Product.objects.all()
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+
+    reviews = Review.objects.filter(product=OuterRef("pk")).order_by().values("product")
+    sold = (
+        OrderItem.objects.filter(product=OuterRef("pk")).exclude(order__status="cancelled")
+        .order_by().values("product")
+    )
+
+    updated = products.update(
+        review_count=Coalesce(Subquery(reviews.annotate(n=Count("id")).values("n")), 0),
+        rating_sum=Coalesce(Subquery(reviews.annotate(n=Sum("rating")).values("n")), 0),
+        units_sold=Coalesce(Subquery(sold.annotate(n=Sum("quantity")).values("n")), 0),
+    )
+    products.update(average_rating=_average(F("rating_sum"), F("review_count")))
+    catalog_versions.bump("product")
+    return updated
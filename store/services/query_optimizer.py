@@ -0,0 +1,125 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch, prefetch_related_objects
+from rest_framework import serializers
+
+
+def _new_plan():
+    return {"select": set(), "only": set(), "prefetch": {}, "restrict": True}
+
+
+def _merge(plan, child, prefix):
+    plan["select"].update(f"{prefix}__{path}" for path in child["select"])
+    plan["only"].update(f"{prefix}__{path}" for path in child["only"])
+    plan["prefetch"].update(
+        (f"{prefix}__{path}", nested) for path, nested in child["prefetch"].items()
+    )
+    plan["restrict"] = plan["restrict"] and child["restrict"]
+
+
+def _walk(plan, model, attrs, field, path):
+    name, rest = attrs[0], attrs[1:]
+    try:
+        model_field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        # A property or method: we can't tell which columns it needs.
+        plan["restrict"] = False
+        return
+
+    lookup = "__".join(path + [name])
+    if not model_field.is_relation:
+        plan["only"].add(lookup)
+        return
+
+    related = model_field.related_model
+    if model_field.one_to_many or model_field.many_to_many:
+        child = getattr(field, "child", None)
+        if not rest and isinstance(child, serializers.ModelSerializer):
+            child_plan = _build_plan(type(child), related)
+            if model_field.one_to_many:
+                # The prefetch joins children back to their parent on this FK.
+                child_plan["only"].add(model_field.field.name)
+            plan["prefetch"][lookup] = (related, child_plan)
+        else:
+            plan["prefetch"][lookup] = None
+        return
+
+    if model_field.concrete:
+        plan["only"].add(lookup)
+
+    if rest:
+        plan["select"].add(lookup)
+        _walk(plan, related, rest, field, path + [name])
+    elif isinstance(field, serializers.ModelSerializer):
+        plan["select"].add(lookup)
+        _merge(plan, _build_plan(type(field), related), lookup)
+    elif not model_field.concrete:
+        plan["select"].add(lookup)
+
+
+@lru_cache(maxsize=None)
+def _cached_plan(serializer_class, model):
+    return _build_plan(serializer_class, model)
+
+
+def _build_plan(serializer_class, model):
+    plan = _new_plan()
+    for field in serializer_class().fields.values():
+        if field.write_only:
+            continue
+        if field.source == "*":
+            # SerializerMethodField and friends see the whole instance.
+            plan["restrict"] = False
+            continue
+        _walk(plan, model, field.source_attrs, field, [])
+    return plan
+
+
+def _prefetches(plan, restrict_fields):
+    prefetches = []
+    for path, nested in sorted(plan["prefetch"].items()):
+        if nested is None:
+            prefetches.append(path)
+            continue
+        related, child_plan = nested
+        queryset = _apply(related._default_manager.all(), child_plan, restrict_fields)
+        prefetches.append(Prefetch(path, queryset=queryset))
+    return prefetches
+
+
+def _apply(queryset, plan, restrict_fields):
+    if plan["select"]:
+        queryset = queryset.select_related(*sorted(plan["select"]))
+    prefetches = _prefetches(plan, restrict_fields)
+    if prefetches:
+        queryset = queryset.prefetch_related(*prefetches)
+    if restrict_fields and plan["restrict"] and plan["only"]:
+        queryset = queryset.only(*sorted(plan["only"]))
+    return queryset
+
+
+def optimize_for_serializer(queryset, serializer_class, restrict_fields=True):
+    """
+    Add the select_related/prefetch_related/only() calls that
+    serializer_class needs to render rows from queryset.
+
+    Relations are discovered from each field's ``source`` path: forward
+    relations read through dotted sources or nested serializers are
+    joined, many-valued relations are prefetched with their own optimized
+    queryset. only() is skipped whenever a field reads the whole instance
+    or a non-field attribute, since its column needs are unknown.
+    """
+    plan = _cached_plan(serializer_class, queryset.model)
+    return _apply(queryset, plan, restrict_fields)
+
+
+def prefetch_for_serializer(instances, serializer_class, restrict_fields=True):
+    """Prefetch what serializer_class needs onto already-loaded instances."""
+    if not instances:
+        return
+    plan = _cached_plan(serializer_class, type(instances[0]))
+    prefetches = _prefetches(plan, restrict_fields)
+    lookups = sorted(plan["select"]) + prefetches
+    if lookups:
+        prefetch_related_objects(instances, *lookups)
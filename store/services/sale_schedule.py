@@ -0,0 +1,32 @@
+from django.db.models import Q
+from django.utils import timezone
+
+from store.models import Product
+from store.services import cart_snapshot, catalog_versions
+
+
+def window_open(now):
+    """Products whose sale window (either end may be open) contains ``now``."""
+    return (
+        (Q(sale_starts_at__isnull=True) | Q(sale_starts_at__lte=now))
+        & (Q(sale_ends_at__isnull=True) | Q(sale_ends_at__gt=now))
+    )
+
+
+def apply_sale_schedule(now=None):
+    """
+    Turn is_on_sale on for products whose sale window has opened and off
+    for those whose window has closed; effective_price follows in the
+    same write. Products without a window keep their manual flag. Returns
+    (started, ended) counts.
+    """
+    now = now or timezone.now()
+    scheduled = Product.objects.filter(Q(sale_starts_at__isnull=False) | Q(sale_ends_at__isnull=False))
+    starting = list(scheduled.filter(window_open(now), is_on_sale=False).values_list("pk", flat=True))
+    ending = list(scheduled.filter(~window_open(now), is_on_sale=True).values_list("pk", flat=True))
+    started = Product.objects.filter(pk__in=starting, is_on_sale=False).update(is_on_sale=True)
+    ended = Product.objects.filter(pk__in=ending, is_on_sale=True).update(is_on_sale=False)
+    if started or ended:
+        catalog_versions.bump("product")
+        cart_snapshot.products_changed(starting + ending)
+    return started, ended
@@ -0,0 +1,196 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, DecimalField, F, IntegerField, Sum, Value, When
+from django.db.models.functions import TruncDate
+
+from store.models import Order, OrderItem, SalesRollup
+from store.services.order_analytics import invalidate_dashboard
+
+
+def _cells(orders, *status_fields):
+    """
+    Contributions of an Order queryset to the cube, keyed by
+    (day, state, category_id, status), with each order filed under the
+    status held in the status field ("status" by default; "rollup_status":
+    the cells it is currently counted in). Given several fields, the
+    status in the key is the tuple of their values.
+    """
+    status_fields = status_fields or ("status",)
+
+    def status_of(row, prefix=""):
+        statuses = tuple(row[prefix + field] for field in status_fields)
+        return statuses if len(statuses) > 1 else statuses[0]
+
+    cells = defaultdict(lambda: [0, 0, Decimal(0)])
+
+    totals = (
+        orders.order_by()
+        .annotate(day=TruncDate("created_at"))
+        .values("day", "state", *status_fields)
+        .annotate(n=Count("id"), revenue=Sum("total_amount"))
+    )
+    for row in totals:
+        cell = cells[(row["day"], row["state"], None, status_of(row))]
+        cell[0] += row["n"]
+        cell[2] += row["revenue"] or 0
+
+    lines = (
+        OrderItem.objects.filter(order__in=orders.order_by().values("pk"))
+        .annotate(day=TruncDate("order__created_at"))
+        .values("day", "order__state", "product__category_id", *[f"order__{field}" for field in status_fields])
+        .annotate(
+            n=Count("order_id", distinct=True),
+            units=Sum("quantity"),
+            revenue=Sum(F("quantity") * F("price"), output_field=DecimalField(max_digits=14, decimal_places=2)),
+        )
+    )
+    for row in lines:
+        cell_status = status_of(row, "order__")
+        cell = cells[(row["day"], row["order__state"], row["product__category_id"], cell_status)]
+        cell[0] += row["n"]
+        cell[1] += row["units"] or 0
+        cell[2] += row["revenue"] or 0
+        cells[(row["day"], row["order__state"], None, cell_status)][1] += row["units"] or 0
+
+    return cells
+
+
+def _merge(deltas, cells, sign):
+    for key, (orders, units, revenue) in cells.items():
+        delta = deltas[key]
+        delta[0] += sign * orders
+        delta[1] += sign * units
+        delta[2] += sign * revenue
+
+
+def _per_cell(ids, deltas, index, output_field):
+    return Case(
+        *[When(pk=pk, then=Value(deltas[key][index])) for key, pk in ids.items()],
+        default=Value(0),
+        output_field=output_field,
+    )
+
+
+def _write(deltas):
+    """
+    Add {cell: [orders, units, revenue]} deltas to the cube with one
+    locking read of the cells, one UPDATE for those that exist and one
+    INSERT for the rest, whatever the number of cells.
+    """
+    pending = {key: delta for key, delta in deltas.items() if any(delta)}
+    while pending:
+        # Locked in pk order, so concurrent writers queue instead of deadlocking.
+        rows = (
+            SalesRollup.objects.filter(
+                day__in={key[0] for key in pending},
+                state__in={key[1] for key in pending},
+                status__in={key[3] for key in pending},
+            )
+            .select_for_update()
+            .order_by("pk")
+            .values_list("day", "state", "category_id", "status", "pk")
+        )
+        ids = {tuple(row[:4]): row[4] for row in rows if tuple(row[:4]) in pending}
+        if ids:
+            SalesRollup.objects.filter(pk__in=ids.values()).update(
+                orders=F("orders") + _per_cell(ids, pending, 0, IntegerField()),
+                units=F("units") + _per_cell(ids, pending, 1, IntegerField()),
+                revenue=F("revenue") + _per_cell(ids, pending, 2, DecimalField(max_digits=14, decimal_places=2)),
+            )
+
+        pending = {key: delta for key, delta in pending.items() if key not in ids}
+        if not pending:
+            break
+        try:
+            with transaction.atomic():
+                SalesRollup.objects.bulk_create([
+                    SalesRollup(
+                        day=day, state=state, category_id=category_id, status=status,
+                        orders=orders, units=units, revenue=revenue,
+                    )
+                    for (day, state, category_id, status), (orders, units, revenue) in pending.items()
+                ])
+            break
+        except IntegrityError:
+            # Another writer created one of these cells first: add to it.
+            continue
+    invalidate_dashboard()
+
+
+def sync_orders(order_ids):
+    """
+    Count orders in the cube under their current status.
+
+    Each order records the status it is counted under (rollup_status), so
+    an order that changed status leaves the cells it was actually added
+    to, and one that was never added (created outside checkout, bulk
+    inserted, ...) is just added. Orders already counted under their
+    status are left alone.
+    """
+    if not order_ids:
+        return
+    # No savepoint: callers such as order_status.transition already run
+    # in a transaction, and a failure here must undo theirs anyway.
+    with transaction.atomic(savepoint=False):
+        ids = list(
+            Order.objects.filter(pk__in=order_ids)
+            .exclude(rollup_status=F("status"))
+            .select_for_update()
+            .values_list("pk", flat=True)
+        )
+        if not ids:
+            return
+        # Old and new cells of every order, read in one pass.
+        deltas = defaultdict(lambda: [0, 0, Decimal(0)])
+        for (day, state, category_id, (filed, current)), values in _cells(
+            Order.objects.filter(pk__in=ids), "rollup_status", "status"
+        ).items():
+            if filed:
+                _merge(deltas, {(day, state, category_id, filed): values}, -1)
+            _merge(deltas, {(day, state, category_id, current): values}, 1)
+        _write(deltas)
+        Order.objects.filter(pk__in=ids).update(rollup_status=F("status"))
+
+
+def remove_orders(order_ids):
+    """Take orders out of the cube, e.g. before their lines change or they are deleted."""
+    with transaction.atomic():
+        filed = list(
+            Order.objects.filter(pk__in=order_ids, rollup_status__isnull=False)
+            .select_for_update()
+            .values_list("pk", flat=True)
+        )
+        if not filed:
+            return
+        deltas = defaultdict(lambda: [0, 0, Decimal(0)])
+        _merge(deltas, _cells(Order.objects.filter(pk__in=filed), "rollup_status"), -1)
+        _write(deltas)
+        Order.objects.filter(pk__in=filed).update(rollup_status=None)
+
+
+def rebuild_sales_rollup(since=None):
+    """Recompute the cube from Order/OrderItem, optionally only from a day on."""
+    orders = Order.objects.all()
+    rows = SalesRollup.objects.all()
+    if since is not None:
+        orders = orders.filter(created_at__date__gte=since)
+        rows = rows.filter(day__gte=since)
+
+    cells = _cells(orders)
+    with transaction.atomic():
+        rows.delete()
+        orders.update(rollup_status=F("status"))
+        SalesRollup.objects.bulk_create(
+            [
+                SalesRollup(
+                    day=day, state=state, category_id=category_id, status=status,
+                    orders=count, units=units, revenue=revenue,
+                )
+                for (day, state, category_id, status), (count, units, revenue) in cells.items()
+            ],
+            batch_size=500,
+        )
+    invalidate_dashboard()
+    return len(cells)
@@ -0,0 +1,125 @@
+import math
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F
+
+from store.models import Product
+from store.services import catalog_versions
+
+# Field weights mirror the A/B/C weights of the PostgreSQL trigger.
+FIELD_WEIGHTS = (("name", 3.0), ("category__name", 2.0), ("description", 1.0))
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from in is it of on or the to with".split()
+)
+
+
+def tokenize(text):
+    return [
+        token for token in _TOKEN_RE.findall((text or "").lower())
+        if token not in STOP_WORDS
+    ]
+
+
+class InvertedIndex:
+    """
+    In-memory term -> {product_id: weight} index over the product catalog.
+
+    Query terms are ANDed; the last term also matches as a prefix so
+    results come back while the user is still typing. Scores are the sum
+    of field-weighted term frequencies scaled by inverse document frequency.
+    """
+
+    def __init__(self, rows):
+        postings = defaultdict(lambda: defaultdict(float))
+        self.size = 0
+        for row in rows:
+            self.size += 1
+            for (_, weight), text in zip(FIELD_WEIGHTS, row[1:]):
+                for token in tokenize(text):
+                    postings[token][row[0]] += weight
+        self.postings = {term: dict(docs) for term, docs in postings.items()}
+        self.terms = sorted(self.postings)
+
+    def _expand(self, prefix):
+        start = bisect_left(self.terms, prefix)
+        for term in self.terms[start:]:
+            if not term.startswith(prefix):
+                break
+            yield term
+
+    def _scores(self, terms):
+        scores = defaultdict(float)
+        for term in terms:
+            docs = self.postings.get(term, {})
+            idf = math.log(1 + self.size / (1 + len(docs)))
+            for pk, weight in docs.items():
+                scores[pk] += weight * idf
+        return scores
+
+    def search(self, query, limit=20):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        results = None
+        for position, token in enumerate(tokens):
+            if position == len(tokens) - 1:
+                terms = list(self._expand(token))
+            else:
+                terms = [token] if token in self.postings else []
+            scores = self._scores(terms)
+            if results is None:
+                results = scores
+            else:
+                results = {pk: score + scores[pk] for pk, score in results.items() if pk in scores}
+            if not results:
+                return []
+
+        ranked = sorted(results.items(), key=lambda item: (-item[1], item[0]))
+        return [pk for pk, _ in ranked[:limit]]
+
+
+_index = None
+_index_token = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Return this process's index, rebuilding it after catalog writes."""
+    global _index, _index_token
+    token = catalog_versions.current("search")
+    if _index is None or _index_token != token:
+        with _index_lock:
+            if _index is None or _index_token != token:
+                rows = Product.objects.values_list(
+                    "pk", *(field for field, _ in FIELD_WEIGHTS)
+                ).iterator(chunk_size=2000)
+                _index = InvertedIndex(rows)
+                _index_token = token
+    return _index
+
+
+def search_products(query, limit=20):
+    """Return product ids for the query, most relevant first."""
+    if connection.vendor == "postgresql":
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        # Same semantics as the in-app index: AND of terms, last one a prefix.
+        raw = " & ".join(tokens) + ":*"
+        search = SearchQuery(raw, search_type="raw", config="english")
+        return list(
+            Product.objects.filter(search_vector=search)
+            .annotate(rank=SearchRank(F("search_vector"), search))
+            .order_by("-rank", "pk")
+            .values_list("pk", flat=True)[:limit]
+        )
+    return get_index().search(query, limit)
@@ -0,0 +1,172 @@
+import random
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from store.models import Cart, CartItem, Category, Order, OrderItem, Product, Review
+from store.services import catalog_versions
+from store.services.product_stats import rebuild_product_stats
+from store.services.sales_rollup import rebuild_sales_rollup
+
+User = get_user_model()
+
+SEED_PASSWORD = "seed-password"
+
+ADJECTIVES = ("Classic", "Smart", "Ultra", "Compact", "Wireless", "Premium", "Eco", "Pro", "Mini", "Max")
+NOUNS = ("Phone", "Laptop", "Speaker", "Watch", "Camera", "Blender", "Kettle", "Sneaker", "Jacket", "Lamp")
+STATES = ("Lagos", "Ogun", "Oyo")
+STATUS_WEIGHTS = {
+    "pending": 15, "paid": 25, "shipped": 15, "delivered": 15, "completed": 20, "cancelled": 10,
+}
+
+
+def _next_index(queryset, field, prefix):
+    return queryset.filter(**{f"{field}__startswith": prefix}).count()
+
+
+def seed_store(
+    users=0, categories=0, products=0, reviews=0, carts=0, orders=0,
+    items_per_order=3, days=90, seed=0, prefix="seed", batch_size=1000,
+):
+    """
+    Add synthetic rows in bulk and bring the derived tables up to date.
+
+    Volumes are added on top of whatever is already there, so calling this
+    with increasing sizes grows one dataset. New rows are spread over the
+    last ``days`` days. Every user created gets the SEED_PASSWORD
+    password. Returns the number of rows created per model.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    created = {}
+
+    with transaction.atomic():
+        start = _next_index(User.objects, "username", f"{prefix}-user-")
+        password = make_password(SEED_PASSWORD)
+        User.objects.bulk_create(
+            [
+                User(username=f"{prefix}-user-{n}", email=f"{prefix}-user-{n}@example.com", password=password)
+                for n in range(start, start + users)
+            ],
+            batch_size=batch_size,
+        )
+        created["users"] = users
+
+        start = _next_index(Category.objects, "name", f"{prefix} category ")
+        Category.objects.bulk_create(
+            [
+                Category(name=f"{prefix} category {n}", slug=slugify(f"{prefix} category {n}"))
+                for n in range(start, start + categories)
+            ],
+            batch_size=batch_size,
+        )
+        created["categories"] = categories
+
+        category_ids = list(Category.objects.values_list("pk", flat=True))
+        if products and not category_ids:
+            raise ValueError("Products need at least one category")
+        start = _next_index(Product.objects, "image", f"products/{prefix}-")
+        new_products = []
+        for n in range(start, start + products):
+            price = Decimal(rng.randrange(500, 900000))
+            on_sale = rng.random() < 0.2
+            new_products.append(Product(
+                category_id=rng.choice(category_ids),
+                name=f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {n}",
+                description=f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS).lower()} for everyday use.",
+                price=price,
+                discount_price=(price * Decimal("0.8")).quantize(Decimal("1")) if on_sale else None,
+                is_on_sale=on_sale,
+                stock=rng.randrange(0, 100),
+                tag=rng.choice(Product.TAG_CHOICES)[0],
+                image=f"products/{prefix}-{n}.png",
+            ))
+        Product.objects.bulk_create(new_products, batch_size=batch_size)
+        created["products"] = products
+
+        user_ids = list(User.objects.filter(is_staff=False).values_list("pk", flat=True))
+        catalog = list(Product.objects.values_list("pk", "price"))
+        if (reviews or carts or orders) and not (user_ids and catalog):
+            raise ValueError("Reviews, carts and orders need users and products")
+
+        Review.objects.bulk_create(
+            [
+                Review(
+                    product_id=rng.choice(catalog)[0],
+                    user_id=rng.choice(user_ids),
+                    rating=rng.randint(1, 5),
+                    comment="Seeded review",
+                )
+                for _ in range(reviews)
+            ],
+            batch_size=batch_size,
+        )
+        created["reviews"] = reviews
+
+        cartless = list(
+            User.objects.filter(is_staff=False, cart__isnull=True).values_list("pk", flat=True)[:carts]
+        )
+        new_carts = Cart.objects.bulk_create([Cart(user_id=pk) for pk in cartless], batch_size=batch_size)
+        CartItem.objects.bulk_create(
+            [
+                CartItem(cart=cart, product_id=product_id, quantity=rng.randint(1, 3))
+                for cart in new_carts
+                for product_id, _ in rng.sample(catalog, k=min(len(catalog), rng.randint(1, 5)))
+            ],
+            batch_size=batch_size,
+        )
+        created["carts"] = len(new_carts)
+
+        statuses, weights = zip(*STATUS_WEIGHTS.items())
+        new_orders = []
+        lines = []
+        for _ in range(orders):
+            state = rng.choice(STATES)
+            order_lines = [
+                (product_id, rng.randint(1, 3), price)
+                for product_id, price in rng.sample(catalog, k=min(len(catalog), items_per_order))
+            ]
+            delivery_fee = Decimal(5000 if state == "Lagos" else 8000)
+            new_orders.append(Order(
+                user_id=rng.choice(user_ids),
+                total_amount=sum(quantity * price for _, quantity, price in order_lines) + delivery_fee,
+                delivery_fee=delivery_fee,
+                address=f"{rng.randint(1, 200)} Seed Street",
+                city="Ikeja",
+                state=state,
+                status=rng.choices(statuses, weights)[0],
+            ))
+            lines.append(order_lines)
+        Order.objects.bulk_create(new_orders, batch_size=batch_size)
+        OrderItem.objects.bulk_create(
+            [
+                OrderItem(order=order, product_id=product_id, quantity=quantity, price=price)
+                for order, order_lines in zip(new_orders, lines)
+                for product_id, quantity, price in order_lines
+            ],
+            batch_size=batch_size,
+        )
+        created["orders"] = orders
+
+        # created_at is auto_now_add; spread the new orders with one UPDATE per day.
+        by_day = defaultdict(list)
+        for order in new_orders:
+            by_day[rng.randrange(days)].append(order.pk)
+        for day, pks in by_day.items():
+            created_at = now - timedelta(days=day, minutes=rng.randrange(24 * 60))
+            Order.objects.filter(pk__in=pks).update(created_at=created_at)
+            Order.objects.filter(pk__in=pks).exclude(status__in=["pending", "cancelled"]).update(
+                paid_at=created_at
+            )
+
+        rebuild_product_stats()
+        rebuild_sales_rollup()
+        catalog_versions.bump("category", "search")
+
+    return created
@@ -0,0 +1,76 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+
+# What a WSGI worker does before serving its first request.
+BOOT_SCRIPT = """
+import time
+start = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(time.perf_counter() - start)
+"""
+
+
+class StartupError(RuntimeError):
+    pass
+
+
+def parse_importtime(output):
+    """
+    Parse ``python -X importtime`` output into (module, self_us,
+    cumulative_us, depth) tuples, in the order the lines were printed
+    (a module's imports come before it).
+    """
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+
+def profile_startup(python=None):
+    """
+    Boot the app in a fresh interpreter and time it.
+
+    Returns ``{"total": seconds, "imports": [...]}`` where imports are the
+    parse_importtime tuples. The child inherits the environment, so it
+    loads the same settings as this process.
+    """
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "config.settings")}
+    result = subprocess.run(
+        [python or sys.executable, "-X", "importtime", "-c", BOOT_SCRIPT],
+        capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+    )
+    if result.returncode:
+        lines = result.stderr.strip().splitlines()
+        raise StartupError(lines[-1] if lines else f"exit status {result.returncode}")
+    return {
+        "total": float(result.stdout.strip().splitlines()[-1]),
+        "imports": parse_importtime(result.stderr),
+    }
+
+
+def by_package(imports):
+    """Self import time summed per top-level package, most expensive first."""
+    totals = defaultdict(int)
+    for module, self_us, _, _ in imports:
+        totals[module.split(".")[0]] += self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def by_module(imports):
+    """Cumulative import time of the modules the boot imported directly."""
+    return sorted(
+        ((module, cumulative_us) for module, _, cumulative_us, depth in imports if depth == 0),
+        key=lambda item: item[1], reverse=True,
+    )
@@ -0,0 +1,123 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Sum, Value, When
+from django.utils import timezone
+
+from store.models import Order, OrderItem, Product
+from store.services import catalog_versions, sales_rollup
+
+# Checkout takes stock with one conditional UPDATE over all of an order's
+# products instead of locking them with SELECT ... FOR UPDATE first, so a
+# product row is locked only from that statement to the commit right
+# after it. Pending orders hold their stock until STOCK_HOLD_MINUTES have
+# passed; cancelled and expired orders give it back.
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product_ids):
+        super().__init__(f"Not enough stock for products {product_ids}")
+        self.product_ids = product_ids
+
+
+def _per_product(quantities):
+    return Case(
+        *[When(pk=pk, then=Value(qty)) for pk, qty in quantities.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def hold_expiry():
+    return timezone.now() + timedelta(minutes=settings.STOCK_HOLD_MINUTES)
+
+
+def reserve(quantities):
+    """
+    Take a {product_id: units} mapping out of stock, and count it in
+    units_sold, in one statement. Either every product has enough stock
+    or nothing changes and InsufficientStock names the short products.
+    """
+    quantities = {pk: qty for pk, qty in quantities.items() if qty > 0}
+    if not quantities:
+        return
+
+    units = _per_product(quantities)
+    products = Product.objects.filter(pk__in=quantities)
+    try:
+        with transaction.atomic():
+            # The stock test is re-checked against the latest row version
+            # when the statement had to wait for a concurrent checkout.
+            updated = products.filter(stock__gte=units).update(
+                stock=F("stock") - units,
+                units_sold=F("units_sold") + units,
+            )
+            if updated != len(quantities):
+                raise InsufficientStock([])
+    except InsufficientStock:
+        available = set(products.filter(stock__gte=units).values_list("pk", flat=True))
+        raise InsufficientStock(sorted(set(quantities) - available))
+    catalog_versions.bump("product")
+
+
+def _units(order_ids):
+    return dict(
+        OrderItem.objects.filter(order_id__in=order_ids)
+        .values("product_id")
+        .annotate(units=Sum("quantity"))
+        .values_list("product_id", "units")
+    )
+
+
+def release(order_ids, units_sold=True):
+    """
+    Take cancelled orders out of units_sold and put back the stock of
+    those still holding it, in one product update. Callers pass orders
+    that have just been cancelled, so each is counted out once; stock is
+    returned only while the hold lasts. ``units_sold=False`` leaves the
+    counter alone, for orders whose lines are about to be deleted (their
+    delete signals take them out). Returns the number of holds released.
+    """
+    with transaction.atomic():
+        held = list(
+            Order.objects.filter(pk__in=order_ids, stock_held_until__isnull=False)
+            .select_for_update()
+            .values_list("pk", flat=True)
+        )
+        restock = _units(held) if held else {}
+        unsold = _units(order_ids) if units_sold else {}
+        if restock or unsold:
+            Product.objects.filter(pk__in=restock.keys() | unsold.keys()).update(
+                stock=F("stock") + _per_product(restock),
+                units_sold=F("units_sold") - _per_product(unsold),
+            )
+            catalog_versions.bump("product")
+        if held:
+            Order.objects.filter(pk__in=held).update(stock_held_until=None)
+    return len(held)
+
+
+def expire_holds(batch_size=500, now=None):
+    """
+    Cancel one batch of pending orders whose hold has run out and return
+    their stock. Orders that started a Paystack payment may be being paid
+    right now; they are left to paystack_events.settle_expired_payments,
+    which asks Paystack first. Returns the number of orders cancelled.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        expired = list(
+            Order.objects.filter(status="pending", stock_held_until__lte=now)
+            .filter(Q(paystack_reference__isnull=True) | Q(paystack_reference=""))
+            .select_for_update(skip_locked=True)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not expired:
+            return 0
+
+        Order.objects.filter(pk__in=expired).update(status="cancelled", status_changed_at=now)
+        sales_rollup.sync_orders(expired)
+        release(expired)
+    return len(expired)
@@ -0,0 +1,119 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from store.models import CartItem, Category, Order, OrderItem, Product, Review
+from store.services import cart_snapshot, catalog_versions, images, product_stats, sales_rollup, stock
+from store.services.order_analytics import invalidate_dashboard
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    if created:
+        product_stats.record_review(instance.product_id, instance.rating)
+    else:
+        product_stats.rebuild_product_stats([instance.product_id])
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    product_stats.record_review(instance.product_id, instance.rating, sign=-1)
+
+
+def _sync_on_commit(order_id):
+    # Filed once the order's writes commit, so every line is counted. A
+    # failure here leaves the cube short until rebuild_sales_rollup runs,
+    # it must not fail the commit that already happened.
+    transaction.on_commit(lambda: sales_rollup.sync_orders([order_id]), robust=True)
+
+
+@receiver(pre_save, sender=OrderItem)
+@receiver(pre_delete, sender=OrderItem)
+def order_item_changing(sender, instance, **kwargs):
+    # Take the order out of the cube with the lines it was counted with.
+    if instance.order_id is not None:
+        sales_rollup.remove_orders([instance.order_id])
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def order_item_changed(sender, instance, **kwargs):
+    _sync_on_commit(instance.order_id)
+
+
+@receiver(post_save, sender=OrderItem)
+def order_item_saved(sender, instance, created, **kwargs):
+    if not created:
+        product_stats.rebuild_product_stats([instance.product_id])
+    else:
+        product_stats.record_units_sold(
+            {instance.product_id: instance.quantity}, order_id=instance.order_id
+        )
+
+
+@receiver(post_delete, sender=OrderItem)
+def order_item_deleted(sender, instance, **kwargs):
+    # Cancelled orders were taken out of units_sold when they were cancelled.
+    product_stats.record_units_sold(
+        {instance.product_id: -instance.quantity}, order_id=instance.order_id
+    )
+
+
+@receiver(post_save, sender=CartItem)
+def cart_item_saved(sender, instance, **kwargs):
+    # Bulk writes and deletes (kept fast, without a row fetch) report the
+    # change themselves; see CartViewSet and place_order.
+    cart_snapshot.cart_changed(instance.cart_id)
+
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, created, update_fields=None, **kwargs):
+    invalidate_dashboard()
+    if created:
+        instance._loaded_status = instance.status
+        _sync_on_commit(instance.pk)
+        return
+    if update_fields is not None and "status" not in update_fields:
+        return
+    previous = getattr(instance, "_loaded_status", None)
+    if previous and previous != instance.status:
+        sales_rollup.sync_orders([instance.pk])
+        # A cancelled order gives back its units (and its stock while it
+        # holds it); leaving pending for any other status keeps them.
+        if instance.status == "cancelled":
+            stock.release([instance.pk])
+        elif instance.stock_held_until is not None:
+            Order.objects.filter(pk=instance.pk).update(stock_held_until=None)
+        instance.stock_held_until = None
+    instance._loaded_status = instance.status
+
+
+@receiver(pre_delete, sender=Order)
+def order_deleting(sender, instance, **kwargs):
+    sales_rollup.remove_orders([instance.pk])
+    if instance.stock_held_until is not None:
+        stock.release([instance.pk], units_sold=False)
+
+
+@receiver(post_delete, sender=Order)
+def order_deleted(sender, instance, **kwargs):
+    invalidate_dashboard()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def product_changed(sender, instance, **kwargs):
+    catalog_versions.bump("product", "search")
+    cart_snapshot.products_changed([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, **kwargs):
+    catalog_versions.bump("category", "search")
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Category)
+def image_saved(sender, instance, **kwargs):
+    images.generate_variants(instance)
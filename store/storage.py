@@ -0,0 +1,77 @@
+import logging
+import os
+
+import cloudinary
+from cloudinary_storage.storage import MediaCloudinaryStorage
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".tiff"}
+
+
+def _stem(name):
+    root, ext = os.path.splitext(name)
+    return root if ext.lower() in IMAGE_EXTENSIONS else name
+
+
+@deconstructible
+class VariantCloudinaryStorage(MediaCloudinaryStorage):
+    """
+    Cloudinary media storage that can address resized copies of an image.
+
+    Variant URLs are built from the stored public id with a transformation
+    in the path; Cloudinary derives and caches the variant on first
+    request, so nothing is uploaded ahead of time.
+    """
+
+    def variant_url(self, name, width, height, format="webp"):
+        public_id = _stem(self._prepend_prefix(name))
+        return cloudinary.CloudinaryImage(public_id).build_url(
+            width=width, height=height, crop="fill", quality="auto", format=format, secure=True,
+        )
+
+    def generate_variants(self, name, sizes, format="webp"):
+        """Nothing to do: Cloudinary renders variants from the URL transformation."""
+        return None
+
+
+@deconstructible
+class VariantFileSystemStorage(FileSystemStorage):
+    """
+    Local stand-in for VariantCloudinaryStorage (development and tests).
+    Variants are rendered with Pillow when the original is saved and kept
+    under ``variants/<width>x<height>/``.
+    """
+
+    def variant_name(self, name, width, height, format="webp"):
+        return f"variants/{width}x{height}/{_stem(name)}.{format}"
+
+    def variant_url(self, name, width, height, format="webp"):
+        return self.url(self.variant_name(name, width, height, format))
+
+    def generate_variants(self, name, sizes, format="webp"):
+        pending = [
+            (width, height) for width, height in sizes
+            if not self.exists(self.variant_name(name, width, height, format))
+        ]
+        if not pending:
+            return
+
+        try:
+            with self.open(name) as source:
+                original = Image.open(source)
+                original.load()
+        except FileNotFoundError:
+            return
+        except (UnidentifiedImageError, OSError) as error:
+            # Not a readable image: keep the original and serve it as is.
+            logger.warning("Cannot render variants of %s: %s", name, error)
+            return
+
+        for width, height in pending:
+            path = self.path(self.variant_name(name, width, height, format))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            ImageOps.fit(original, (width, height)).save(path, format=format.upper())
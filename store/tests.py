@@ -1,3 +1,1532 @@
-from django.test import TestCase
+import base64
+import csv
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from itertools import count
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.db.models import Q
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+import requests
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import routers
+from .models import Cart, CartItem, Category, Order, OrderItem, PaystackEvent, Product, Review, SalesRollup
+from .services.fake_paystack import FakePaystackServer
+from .services.paystack import CircuitBreaker, CircuitOpenError, PaystackClient, PaystackError
+from .services import benchmark, cart_snapshot, order_status, startup
+from .services.catalog_cache import get_catalog_cache
+from .services.checkout import place_order
+from .services.order_analytics import dashboard
+from .services.paystack_events import settle_expired_payments
+from .services.product_stats import rebuild_product_stats
+from .services.sale_schedule import apply_sale_schedule
+from .services.sales_rollup import rebuild_sales_rollup
+from .services.stock import InsufficientStock, expire_holds
+
+User = get_user_model()
+
+
+# Reads stay on the primary unless a test opts in to the replica database.
+@override_settings(REPLICA_DATABASE_ALIAS="")
+class StoreTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_catalog_cache().local.clear()
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.staff = User.objects.create_user("staff", "staff@example.com", "pw", is_staff=True)
+        self.user = User.objects.create_user("shopper", "shopper@example.com", "pw")
+        self.category = Category.objects.create(name="Phones")
+
+    def make_product(self, **kwargs):
+        fields = {
+            "category": self.category,
+            "name": "IPhone 14 Pro",
+            "description": "Dynamic Island",
+            "price": 50000,
+            "stock": 50,
+            "image": "products/iphone.png",
+        }
+        fields.update(kwargs)
+        return Product.objects.create(**fields)
+
+    def make_order(self, user, lines=2):
+        order = Order.objects.create(user=user, total_amount=0, state="Lagos")
+        for _ in range(lines):
+            OrderItem.objects.create(order=order, product=self.make_product(), quantity=1, price=10)
+        return order
+
+
+class EndpointQueryCountTests(StoreTestCase):
+    """Each listing must cost the same number of queries at any size."""
+
+    def assertConstantQueries(self, num, url, grow):
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                grow()
+            with self.assertNumQueries(num):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+    def test_product_list(self):
+        self.assertConstantQueries(
+            1, "/api/products/", lambda: [self.make_product() for _ in range(3)]
+        )
+
+    def test_category_list(self):
+        names = count()
+        self.assertConstantQueries(
+            1, "/api/categories/", lambda: Category.objects.create(name=f"Shoes {next(names)}")
+        )
+
+    def test_staff_order_list(self):
+        self.client.force_authenticate(self.staff)
+        self.assertConstantQueries(
+            2, "/api/orders/", lambda: [self.make_order(self.user) for _ in range(3)]
+        )
+
+    def test_customer_order_list(self):
+        self.client.force_authenticate(self.user)
+        self.assertConstantQueries(
+            2, "/api/orders/", lambda: [self.make_order(self.user) for _ in range(3)]
+        )
+
+    def test_cart_list(self):
+        self.client.force_authenticate(self.user)
+        cart = Cart.objects.create(user=self.user)
+        self.assertConstantQueries(
+            3, "/api/cart/",
+            lambda: [CartItem.objects.create(cart=cart, product=self.make_product()) for _ in range(3)],
+        )
+
+
+class RequestMetricsTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_product()
+
+    def test_server_timing_and_log_line(self):
+        with self.assertLogs("store.requests", "INFO") as logs:
+            response = self.client.get("/api/products/")
+        self.assertEqual(response.status_code, 200)
+        timing = response["Server-Timing"]
+        self.assertIn('db;dur=', timing)
+        self.assertIn('desc="1 queries"', timing)
+        self.assertIn("serialize;dur=", timing)
+        self.assertIn("view;dur=", timing)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["route"], "product-list")
+        self.assertEqual(record["status"], 200)
+        self.assertEqual(record["queries"], 1)
+        self.assertGreater(record["serialize_ms"] + record["view_ms"], 0)
+
+    @override_settings(QUERY_BUDGETS={"product-list": 0})
+    def test_query_budget_warning(self):
+        with self.assertLogs("store.requests", "WARNING") as logs:
+            self.client.get("/api/products/")
+        self.assertIn("Query budget exceeded on product-list: 1 queries (budget 0)", logs.output[0])
+
+    @override_settings(SERVER_TIMING=False)
+    def test_server_timing_can_be_disabled(self):
+        response = self.client.get("/api/products/")
+        self.assertFalse(response.has_header("Server-Timing"))
+
+
+class StartupTests(SimpleTestCase):
+    def test_startup_within_budget(self):
+        profile = startup.profile_startup()
+        self.assertLess(profile["total"], settings.STARTUP_BUDGET)
+        modules = {module for module, _, _, _ in profile["imports"]}
+        self.assertIn("store.views", modules)
+        # Cloudinary is configured when the media storage is first used.
+        self.assertNotIn("cloudinary", modules)
+
+    def test_parse_importtime(self):
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   django.utils\n"
+            "import time:       300 |        420 | django\n"
+        )
+        self.assertEqual(
+            startup.parse_importtime(output),
+            [("django.utils", 120, 120, 1), ("django", 300, 420, 0)],
+        )
+        self.assertEqual(startup.by_package(startup.parse_importtime(output)), [("django", 420)])
+
+
+class AsyncViewTests(StoreTestCase):
+    """The /api/async/ read paths answer like their sync counterparts."""
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.phone = self.make_product()
+            self.make_product(name="Case", price=2500, is_on_sale=True, discount_price=2000)
+
+    def assertSamePayload(self, sync_url, async_url):
+        expected = self.client.get(sync_url)
+        response = self.client.get(async_url)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.json(), expected.json())
+        return response
+
+    def test_product_list(self):
+        self.assertSamePayload("/api/products/?facets=1", "/api/async/products/?facets=1")
+        self.assertSamePayload("/api/products/?max_price=3000", "/api/async/products/?max_price=3000")
+        self.assertEqual(self.client.get("/api/async/products/?min_price=x").status_code, 400)
+
+    def test_product_list_page(self):
+        expected = self.client.get("/api/products/?page_size=1").json()
+        page = self.client.get("/api/async/products/?page_size=1").json()
+        self.assertEqual(page["results"], expected["results"])
+        self.assertIn("/api/async/products/?", page["next"])
+        rest = self.client.get(page["next"]).json()
+        self.assertEqual(len(rest["results"]), 1)
+        self.assertIsNone(rest["next"])
+
+    def test_product_detail(self):
+        self.assertSamePayload(f"/api/products/{self.phone.pk}/", f"/api/async/products/{self.phone.pk}/")
+        self.assertEqual(self.client.get("/api/async/products/0/").status_code, 404)
+
+    def test_category_list(self):
+        self.assertSamePayload("/api/categories/", "/api/async/categories/")
+
+    def test_conditional_get(self):
+        response = self.client.get("/api/async/products/")
+        not_modified = self.client.get("/api/async/products/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_cart_list(self):
+        response = self.client.get("/api/async/cart/")
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("Bearer", response["WWW-Authenticate"])
+
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.phone, quantity=2)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        self.assertSamePayload("/api/cart/", "/api/async/cart/")
+
+        # Built by the async path this time.
+        cart_snapshot.invalidate(self.user.pk)
+        built = self.client.get("/api/async/cart/").json()
+        self.assertEqual(built["items"][0]["quantity"], 2)
+        self.assertEqual(built, self.client.get("/api/cart/").json())
+
+    async def test_served_by_asgi_handler(self):
+        with self.assertLogs("store.requests", "INFO") as logs:
+            response = await self.async_client.get("/api/async/products/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+        self.assertIn("db;dur=", response["Server-Timing"])
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["route"], "async-product-list")
+        self.assertGreater(record["queries"], 0)
+
+
+@skipUnless(routers.replica_alias(), "REPLICA_DATABASE_URL is not set")
+@override_settings(REPLICA_DATABASE_ALIAS=settings.REPLICA_DATABASE_ALIAS)
+class ReplicaRoutingTests(StoreTestCase):
+    """
+    Runs against two separate databases. Nothing is replicated in tests,
+    so a read that reaches the replica finds it empty.
+    """
+
+    databases = "__all__"
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.phone = self.make_product()
+
+    def test_catalog_reads_use_replica(self):
+        self.assertEqual(self.client.get("/api/products/").json(), [])
+        self.assertEqual(self.client.get(f"/api/products/{self.phone.pk}/").status_code, 404)
+        # Outside a routed view, reads use the primary.
+        self.assertEqual(Product.objects.count(), 1)
+
+    def test_write_pins_client_to_primary(self):
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(self.client.get("/api/products/").json(), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f"/api/products/{self.phone.pk}/", {"stock": 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(routers.PIN_COOKIE, response.cookies)
+
+        self.assertEqual(len(self.client.get("/api/products/").json()), 1)
+        other = APIClient(SERVER_NAME="localhost")
+        other.force_authenticate(self.staff)
+        # Pinned by user too, for clients that drop cookies.
+        self.assertEqual(len(other.get("/api/products/").json()), 1)
+
+    def test_order_list_follows_writes(self):
+        order = self.make_order(self.user)
+        token = f"Bearer {AccessToken.for_user(self.user)}"
+        self.client.credentials(HTTP_AUTHORIZATION=token)
+        self.assertEqual(self.client.get("/api/orders/").json(), [])
+        # Details are always read from the primary.
+        self.assertEqual(self.client.get(f"/api/orders/{order.pk}/").status_code, 200)
+
+        self.client.post("/api/cart/", {"product_id": self.phone.pk})
+        fresh = APIClient(SERVER_NAME="localhost")
+        fresh.credentials(HTTP_AUTHORIZATION=token)
+        self.assertEqual([row["id"] for row in fresh.get("/api/orders/").json()], [order.pk])
+
+    def test_dashboard_reads_replica(self):
+        self.make_order(self.user)
+        with CaptureQueriesContext(connections[settings.REPLICA_DATABASE_ALIAS]) as replica:
+            data = dashboard(fresh=True)
+        self.assertGreater(len(replica), 0)
+        self.assertEqual(data["summary"]["total_orders"], 0)
+
+
+class ProductStatsTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = self.make_product()
+
+    def stats(self):
+        return Product.objects.values_list(
+            "review_count", "rating_sum", "average_rating", "units_sold"
+        ).get(pk=self.product.pk)
+
+    def test_review_signals_keep_counters(self):
+        first = Review.objects.create(product=self.product, user=self.user, rating=5)
+        Review.objects.create(product=self.product, user=self.staff, rating=2)
+        self.assertEqual(self.stats(), (2, 7, 3.5, 0))
+
+        first.rating = 3
+        first.save()
+        self.assertEqual(self.stats(), (2, 5, 2.5, 0))
+
+        first.delete()
+        self.assertEqual(self.stats(), (1, 2, 2.0, 0))
+
+    def test_order_item_signals_keep_units_sold(self):
+        order = Order.objects.create(user=self.user, total_amount=0)
+        item = OrderItem.objects.create(order=order, product=self.product, quantity=3, price=10)
+        self.assertEqual(self.stats()[3], 3)
+
+        item.quantity = 1
+        item.save()
+        self.assertEqual(self.stats()[3], 1)
+
+        item.delete()
+        self.assertEqual(self.stats()[3], 0)
+
+    def test_cancelled_orders_leave_units_sold(self):
+        order = Order.objects.create(user=self.user, total_amount=0, status="paid")
+        OrderItem.objects.create(order=order, product=self.product, quantity=3, price=10)
+        order.status = "cancelled"
+        order.save()
+        self.assertEqual(self.stats()[3], 0)
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock, 50)
+
+        rebuild_product_stats()
+        self.assertEqual(self.stats()[3], 0)
+        order.delete()
+        self.assertEqual(self.stats()[3], 0)
+
+    def test_order_item_signals_do_not_load_the_order(self):
+        order = Order.objects.create(user=self.user, total_amount=0, status="cancelled")
+        with CaptureQueriesContext(connection) as queries:
+            item = OrderItem.objects.create(order_id=order.pk, product=self.product, quantity=3, price=10)
+            OrderItem.objects.get(pk=item.pk).delete()
+        self.assertEqual(self.stats()[3], 0)
+        loads = [
+            query["sql"] for query in queries
+            if query["sql"].startswith('SELECT "store_order"') and '"store_order"."status"' in query["sql"]
+        ]
+        self.assertEqual(loads, [])
+
+    def test_rebuild_covers_bulk_writes_and_matches_signals(self):
+        Review.objects.create(product=self.product, user=self.user, rating=4)
+        order = Order.objects.create(user=self.user, total_amount=0)
+        OrderItem.objects.create(order=order, product=self.product, quantity=2, price=10)
+        incremental = self.stats()
+
+        rebuild_product_stats()
+        self.assertEqual(self.stats(), incremental)
+
+        # Bulk writes skip the signals; the rebuild picks them up.
+        Review.objects.bulk_create([Review(product=self.product, user=self.staff, rating=1)])
+        OrderItem.objects.bulk_create([OrderItem(order=order, product=self.product, quantity=5, price=10)])
+        self.assertEqual(self.stats(), incremental)
+
+        call_command("rebuild_product_stats", self.product.pk, stdout=io.StringIO())
+        self.assertEqual(self.stats(), (2, 5, 2.5, 7))
+
+
+class KeysetPaginationTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        # Ties on price are broken by pk.
+        self.ids = [self.make_product(price=price).pk for price in (100, 200, 100, 200, 100)]
+
+    def page(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return [p["id"] for p in response.data["results"]], response.data
+
+    def test_walks_forward_and_back_through_ties(self):
+        a, b, c, d, e = self.ids
+        first, data = self.page("/api/products/", {"ordering": "effective_price", "page_size": 2})
+        self.assertEqual(first, [a, c])
+        self.assertIsNone(data["previous"])
+
+        second, data = self.page(data["next"])
+        self.assertEqual(second, [e, b])
+        third, data = self.page(data["next"])
+        self.assertEqual(third, [d])
+        self.assertIsNone(data["next"])
+
+        back, data = self.page(data["previous"])
+        self.assertEqual(back, [e, b])
+        back, data = self.page(data["previous"])
+        self.assertEqual(back, [a, c])
+        self.assertIsNone(data["previous"])
+
+    def test_descending_ordering(self):
+        first, data = self.page("/api/products/", {"ordering": "-effective_price", "page_size": 3})
+        self.assertEqual(first, [self.ids[3], self.ids[1], self.ids[4]])
+        rest, _ = self.page(data["next"])
+        self.assertEqual(rest, [self.ids[2], self.ids[0]])
+
+    def test_invalid_cursors(self):
+        def cursor(payload):
+            return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+        for params in (
+            {"cursor": "not-a-cursor"},
+            {"cursor": cursor({"p": [1]})},
+            {"cursor": cursor({"p": ["soon", 1]})},
+            {"cursor": cursor({"p": [["2026-01-01"], 1]})},
+            {"cursor": cursor({"p": ["cheap", 1]}), "ordering": "effective_price"},
+            {"cursor": cursor({"p": [None, 1]}), "ordering": "effective_price"},
+        ):
+            response = self.client.get("/api/products/", params)
+            self.assertEqual(response.status_code, 404, params)
+            self.assertEqual(response.data["detail"], "Invalid cursor")
+
+
+class CartSnapshotTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.phone = self.make_product()
+            self.case = self.make_product(name="Case", price=2500)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def fresh_cart(self):
+        cart_snapshot.invalidate(self.user.pk)
+        return self.client.get("/api/cart/").data
+
+    def test_list_is_served_from_snapshot(self):
+        self.client.post("/api/cart/", {"product_id": self.phone.pk}, format="json")
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/cart/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item["quantity"] for item in response.data["items"]], [1])
+
+    def test_mutations_keep_snapshot_in_step_with_database(self):
+        data = self.client.post("/api/cart/", {"product_id": self.phone.pk}, format="json").data
+        data = self.client.post("/api/cart/", {"product_id": self.case.pk, "quantity": 3}, format="json").data
+        self.assertEqual(data, self.fresh_cart())
+
+        phone_item, case_item = data["items"]
+        data = self.client.post(
+            "/api/cart/update_quantity/", {"item_id": phone_item["id"], "action": "increment"}, format="json"
+        ).data
+        self.assertEqual(data["items"][0]["quantity"], 2)
+        self.assertEqual(data, self.fresh_cart())
+
+        data = self.client.post("/api/cart/remove_item/", {"item_id": case_item["id"]}, format="json").data
+        self.assertEqual(len(data["items"]), 1)
+        self.assertEqual(data, self.fresh_cart())
+
+    def test_catalog_changes_invalidate_snapshot(self):
+        self.client.post("/api/cart/", {"product_id": self.case.pk}, format="json")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.case.price = 3000
+            self.case.save()
+        response = self.client.get("/api/cart/")
+        self.assertEqual(response.data["items"][0]["price"], "3000.00")
+
+    def test_writes_outside_the_cart_keep_snapshot(self):
+        self.client.post("/api/cart/", {"product_id": self.case.pk}, format="json")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.phone.price = 1
+            self.phone.save()
+            Review.objects.create(product=self.case, user=self.staff, rating=5)
+        with self.assertNumQueries(0):
+            self.client.get("/api/cart/")
+
+    def test_write_during_rebuild_leaves_snapshot_stale(self):
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.case)
+        lines = cart_snapshot._lines
+
+        def write_then_read(cart_id):
+            # Another request adds a line after this build read the versions.
+            CartItem.objects.create(cart=cart, product=self.phone)
+            return lines(cart_id)
+
+        with mock.patch.object(cart_snapshot, "_lines", write_then_read):
+            cart_snapshot.build(cart, None)
+        self.assertIsNone(cart_snapshot.get(self.user.pk))
+
+
+class CartBatchTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+        self.cart = Cart.objects.create(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.products = [self.make_product(name=f"Item {n}") for n in range(6)]
+
+    def batch(self, *operations):
+        return self.client.post("/api/cart/batch/", {"operations": list(operations)}, format="json")
+
+    def quantities(self):
+        return dict(self.cart.items.values_list("product_id", "quantity"))
+
+    def test_applies_operations_in_order(self):
+        a, b, c = (p.pk for p in self.products[:3])
+        CartItem.objects.create(cart=self.cart, product_id=c, quantity=2)
+
+        response = self.batch(
+            {"op": "add", "product_id": a},
+            {"op": "add", "product_id": a, "quantity": 2},
+            {"op": "set", "product_id": b, "quantity": 5},
+            {"op": "add", "product_id": b, "quantity": -1},
+            {"op": "add", "product_id": c, "quantity": -5},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.quantities(), {a: 3, b: 4})
+        self.assertEqual(
+            [(item["product"], item["quantity"]) for item in response.data["items"]], [(a, 3), (b, 4)]
+        )
+
+        self.batch({"op": "add", "product_id": b}, {"op": "remove", "product_id": a})
+        self.assertEqual(self.quantities(), {b: 5})
+
+    def test_query_count_does_not_depend_on_batch_size(self):
+        for size in (1, 6):
+            operations = [{"op": "add", "product_id": p.pk} for p in self.products[:size]]
+            with self.assertNumQueries(9):
+                self.batch(*operations)
+
+    def test_rejects_invalid_batches(self):
+        self.assertEqual(self.batch().status_code, 400)
+        self.assertEqual(self.batch({"op": "add", "product_id": 999}).status_code, 400)
+        self.assertEqual(self.batch({"op": "explode", "product_id": self.products[0].pk}).status_code, 400)
+        self.assertEqual(self.quantities(), {})
+
+
+class OrderExportTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.staff)
+        self.orders = [self.make_order(self.user, lines=n) for n in (2, 0, 1)]
+        self.orders[2].status = "paid"
+        self.orders[2].save()
+
+    def export(self, **params):
+        response = self.client.get("/api/orders/export/", params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_has_a_row_per_line(self):
+        rows = list(csv.DictReader(io.StringIO(self.export(format="csv"))))
+        self.assertEqual(
+            [int(row["order_id"]) for row in rows],
+            [self.orders[0].pk, self.orders[0].pk, self.orders[1].pk, self.orders[2].pk],
+        )
+        self.assertEqual(rows[2]["product_id"], "")
+        self.assertEqual(rows[0]["username"], "shopper")
+
+    def test_ndjson_filters_by_status(self):
+        lines = self.export(format="ndjson", status="paid").splitlines()
+        self.assertEqual(len(lines), 1)
+        document = json.loads(lines[0])
+        self.assertEqual((document["id"], len(document["items"])), (self.orders[2].pk, 1))
+
+    def test_line_items_are_read_per_chunk(self):
+        with mock.patch("store.services.order_export.CHUNK_SIZE", 2):
+            with self.assertNumQueries(3):
+                self.export(format="ndjson")
+
+    def test_staff_only_and_validated(self):
+        self.assertEqual(self.client.get("/api/orders/export/", {"from": "yesterday"}).status_code, 400)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get("/api/orders/export/").status_code, 403)
+
+
+@mock.patch("store.services.paystack.initialize_transaction", return_value={
+    "status": True,
+    "data": {"reference": "ref-1", "authorization_url": "https://checkout.paystack.com/x"},
+})
+class CheckoutTests(StoreTestCase):
+    address = {"address": "1 Marina", "city": "Ikeja", "state": "Lagos"}
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+        self.cart = Cart.objects.create(user=self.user)
+
+    def fill_cart(self, lines):
+        for n in range(lines):
+            CartItem.objects.create(cart=self.cart, product=self.make_product(price=100 + n), quantity=2)
+
+    def test_creates_order_and_clears_cart(self, initialize):
+        self.fill_cart(3)
+        self.client.get("/api/cart/")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/cart/checkout/", self.address, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        order = Order.objects.get(pk=response.data["order_id"])
+        self.assertEqual(order.total_amount, 2 * (100 + 101 + 102) + 5000)
+        self.assertEqual(order.paystack_reference, "ref-1")
+        self.assertEqual(order.items.count(), 3)
+        self.assertFalse(self.cart.items.exists())
+        self.assertEqual(Product.objects.filter(units_sold=2).count(), 3)
+        self.assertIsNone(cart_snapshot.get(self.user.pk))
+
+    def test_query_count_does_not_depend_on_cart_size(self, initialize):
+        # The first order of the day creates its rollup cells.
+        self.fill_cart(1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/cart/checkout/", self.address, format="json")
+
+        for lines in (1, 5):
+            self.fill_cart(lines)
+            # Including the rollup filing that runs once the order commits.
+            with self.assertNumQueries(19), self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post("/api/cart/checkout/", self.address, format="json")
+            self.assertEqual(response.status_code, 200)
+
+    def test_empty_cart(self, initialize):
+        response = self.client.post("/api/cart/checkout/", self.address, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+        initialize.assert_not_called()
+
+    def test_takes_stock_and_holds_it(self, initialize):
+        self.fill_cart(2)
+        response = self.client.post("/api/cart/checkout/", self.address, format="json")
+
+        order = Order.objects.get(pk=response.data["order_id"])
+        self.assertGreater(order.stock_held_until, timezone.now())
+        self.assertEqual(list(Product.objects.values_list("stock", flat=True)), [48, 48])
+
+    def test_takes_stock_first_and_files_rollup_last(self, initialize):
+        self.fill_cart(2)
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/cart/checkout/", self.address, format="json")
+        writes = [
+            query["sql"].split('"')[1] for query in queries
+            if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+        ]
+        self.assertEqual(writes[0], "store_product")
+        self.assertLess(writes.index("store_order"), writes.index("store_salesrollup"))
+
+    def test_insufficient_stock_changes_nothing(self, initialize):
+        self.fill_cart(1)
+        short = self.make_product(stock=1)
+        CartItem.objects.create(cart=self.cart, product=short, quantity=2)
+
+        response = self.client.post("/api/cart/checkout/", self.address, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["products"], [short.pk])
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(self.cart.items.count(), 2)
+        self.assertEqual(list(Product.objects.values_list("stock", "units_sold")), [(50, 0), (1, 0)])
+        initialize.assert_not_called()
+
+    def test_cancelling_pending_order_returns_stock(self, initialize):
+        self.fill_cart(1)
+        paid = self.client.post("/api/cart/checkout/", self.address, format="json").data["order_id"]
+        self.fill_cart(1)
+        pending = self.client.post("/api/cart/checkout/", self.address, format="json").data["order_id"]
+
+        self.client.force_authenticate(self.staff)
+        self.client.patch(f"/api/orders/{paid}/", {"status": "paid"}, format="json")
+        self.client.patch(f"/api/orders/{paid}/", {"status": "cancelled"}, format="json")
+        self.client.patch(f"/api/orders/{pending}/", {"status": "cancelled"}, format="json")
+
+        self.assertEqual(list(Product.objects.order_by("pk").values_list("stock", flat=True)), [48, 50])
+        self.assertFalse(Order.objects.filter(stock_held_until__isnull=False).exists())
+
+    def test_expired_holds_are_cancelled_and_released(self, initialize):
+        self.fill_cart(2)
+        expired = self.client.post("/api/cart/checkout/", self.address, format="json").data["order_id"]
+        Order.objects.filter(pk=expired).update(stock_held_until=timezone.now())
+        self.fill_cart(1)
+        held = self.client.post("/api/cart/checkout/", self.address, format="json").data["order_id"]
+
+        abandoned = {"status": True, "data": {"status": "abandoned"}}
+        with mock.patch("store.services.paystack.verify_transaction", return_value=abandoned) as verify:
+            call_command("release_stock_holds", stdout=io.StringIO())
+        verify.assert_called_once_with("ref-1")
+
+        self.assertEqual(Order.objects.get(pk=expired).status, "cancelled")
+        self.assertEqual(Order.objects.get(pk=held).status, "pending")
+        counters = list(Product.objects.order_by("pk").values_list("stock", "units_sold"))
+        self.assertEqual(counters, [(50, 0), (50, 0), (48, 2)])
+        self.assertEqual(
+            SalesRollup.objects.get(category=None, status="cancelled").orders, 1
+        )
+
+        rebuild_product_stats()
+        self.assertEqual(list(Product.objects.order_by("pk").values_list("stock", "units_sold")), counters)
+
+    def test_expired_holds_with_a_payment_ask_paystack_first(self, initialize):
+        outcomes = {}
+        for status in ("success", "ongoing", "failed"):
+            self.fill_cart(1)
+            order = self.client.post("/api/cart/checkout/", self.address, format="json").data["order_id"]
+            Order.objects.filter(pk=order).update(
+                paystack_reference=f"ref-{status}", stock_held_until=timezone.now()
+            )
+            outcomes[f"ref-{status}"] = order
+        # An order whose payment never started is cancelled without asking.
+        unpaid = Order.objects.create(user=self.user, total_amount=1, stock_held_until=timezone.now())
+
+        def verify(reference):
+            return {"status": True, "data": {"status": reference.removeprefix("ref-")}}
+
+        with mock.patch("store.services.paystack.verify_transaction", side_effect=verify) as paystack:
+            self.assertEqual(expire_holds(), 1)
+            self.assertEqual(settle_expired_payments(), 2)
+        self.assertEqual(paystack.call_count, 3)
+
+        orders = Order.objects.in_bulk([unpaid.pk, *outcomes.values()])
+        self.assertEqual(orders[unpaid.pk].status, "cancelled")
+        self.assertEqual(orders[outcomes["ref-success"]].status, "paid")
+        self.assertEqual(orders[outcomes["ref-failed"]].status, "cancelled")
+        ongoing = orders[outcomes["ref-ongoing"]]
+        self.assertEqual(ongoing.status, "pending")
+        self.assertGreater(ongoing.stock_held_until, timezone.now())
+        self.assertEqual(list(Product.objects.order_by("pk").values_list("stock", flat=True)), [48, 48, 50])
+
+
+# Checkouts on separate connections, which only PostgreSQL runs truly in parallel.
+@skipUnless(connection.vendor == "postgresql", "needs PostgreSQL")
+@override_settings(REPLICA_DATABASE_ALIAS="")
+class StockConcurrencyTests(TransactionTestCase):
+    shoppers = 20
+    stock = 5
+
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name="Phones")
+        self.product = Product.objects.create(
+            category=category, name="Flash sale", description="", price=100,
+            stock=self.stock, is_on_sale=True, image="products/sale.png",
+        )
+        self.carts = []
+        for n in range(self.shoppers):
+            user = User.objects.create(username=f"shopper{n}")
+            cart = Cart.objects.create(user=user)
+            CartItem.objects.create(cart=cart, product=self.product, quantity=1)
+            self.carts.append(cart)
+
+    def checkout(self, cart, barrier, results):
+        try:
+            with connection.cursor() as cursor:
+                # A checkout stuck behind another one's lock fails the test.
+                cursor.execute("SET lock_timeout = '2s'")
+            barrier.wait()
+            start = time.perf_counter()
+            try:
+                place_order(cart, cart.user, "1 Marina", "Ikeja", "Lagos", 5000)
+                outcome = "placed"
+            except InsufficientStock:
+                outcome = "short"
+            results.append((outcome, time.perf_counter() - start))
+        except Exception as exc:
+            results.append((repr(exc), None))
+        finally:
+            connection.close()
+
+    def test_parallel_checkouts_never_oversell(self):
+        barrier = threading.Barrier(self.shoppers)
+        results = []
+        threads = [
+            threading.Thread(target=self.checkout, args=(cart, barrier, results))
+            for cart in self.carts
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        outcomes = sorted(outcome for outcome, _ in results)
+        self.assertEqual(outcomes, ["placed"] * self.stock + ["short"] * (self.shoppers - self.stock))
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.units_sold), (0, self.stock))
+        self.assertEqual(Order.objects.count(), self.stock)
+        self.assertLess(max(elapsed for _, elapsed in results), 2)
+
+
+class PaystackClientTests(SimpleTestCase):
+    def setUp(self):
+        self.server = FakePaystackServer().start()
+        self.addCleanup(self.server.stop)
+
+    def make_client(self, **kwargs):
+        options = {"base_url": self.server.url, "backoff": 0.01}
+        options.update(kwargs)
+        client = PaystackClient("sk_test", **options)
+        self.addCleanup(client.close)
+        return client
+
+    def test_initialize_and_verify(self):
+        client = self.make_client()
+        response = client.initialize_transaction(email="a@b.com", amount=5000, reference="Order-1")
+        self.assertTrue(response["status"])
+        self.assertEqual(client.verify_transaction("Order-1")["data"]["status"], "success")
+
+    def test_client_errors_are_returned(self):
+        response = self.make_client().verify_transaction("missing")
+        self.assertFalse(response["status"])
+
+    def test_verify_retries_server_errors(self):
+        client = self.make_client()
+        client.initialize_transaction(email="a@b.com", amount=5000, reference="Order-1")
+        self.server.fail_next(2)
+        self.assertTrue(client.verify_transaction("Order-1")["status"])
+
+    def test_initialize_is_not_retried_after_server_error(self):
+        self.server.fail_next(1)
+        with self.assertRaises(PaystackError), self.assertLogs("store.services.paystack", "WARNING"):
+            self.make_client().initialize_transaction(email="a@b.com", amount=5000, reference="Order-1")
+        self.assertEqual(self.server.request_count, 1)
+
+    def test_deadline_bounds_slow_responses(self):
+        self.server.latency = 0.5
+        client = self.make_client(read_timeout=0.05, deadline=0.2)
+        started = time.monotonic()
+        with self.assertRaises(PaystackError), self.assertLogs("store.services.paystack", "WARNING"):
+            client.verify_transaction("Order-1")
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_circuit_opens_after_repeated_failures(self):
+        client = self.make_client(max_retries=0, breaker=CircuitBreaker(threshold=2, reset_timeout=60))
+        self.server.fail_next(5)
+        for _ in range(2):
+            with self.assertRaises(PaystackError), self.assertLogs("store.services.paystack", "WARNING"):
+                client.verify_transaction("Order-1")
+        with self.assertRaises(CircuitOpenError):
+            client.verify_transaction("Order-1")
+        self.assertEqual(self.server.request_count, 2)
+
+    def test_non_json_body_is_a_breaker_failure(self):
+        client = self.make_client(max_retries=0, breaker=CircuitBreaker(threshold=2, reset_timeout=60))
+        html = requests.Response()
+        html.status_code = 200
+        html._content = b"<html>Bad gateway</html>"
+        with mock.patch.object(client.session, "request", return_value=html):
+            for _ in range(2):
+                with self.assertRaises(PaystackError), self.assertLogs("store.services.paystack", "WARNING"):
+                    client.verify_transaction("Order-1")
+            with self.assertRaises(CircuitOpenError):
+                client.verify_transaction("Order-1")
+
+
+class PaystackWebhookTests(StoreTestCase):
+    def post_event(self, payload):
+        body = json.dumps(payload).encode()
+        signature = hashlib.sha512(body + settings.PAYSTACK_SECRET_KEY.encode()).hexdigest()
+        return self.client.generic(
+            "POST", "/api/paystack/webhook/", body,
+            content_type="application/json", HTTP_X_PAYSTACK_SIGNATURE=signature,
+        )
+
+    def test_events_are_queued_once_and_applied_by_worker(self):
+        order = Order.objects.create(user=self.user, total_amount=100, paystack_reference="Order-1")
+        payload = {"event": "charge.success", "data": {"id": 42, "reference": "Order-1"}}
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.post_event(payload).status_code, 200)
+        self.assertEqual(self.post_event(payload).status_code, 200)
+        self.assertEqual(PaystackEvent.objects.count(), 1)
+
+        order.refresh_from_db()
+        self.assertEqual(order.status, "pending")
+
+        call_command("process_paystack_events", stdout=io.StringIO())
+        order.refresh_from_db()
+        self.assertEqual(order.status, "paid")
+        self.assertFalse(PaystackEvent.objects.filter(processed_at__isnull=True).exists())
+
+    def test_payment_for_cancelled_order_is_flagged(self):
+        order = Order.objects.create(
+            user=self.user, total_amount=100, paystack_reference="Order-1", status="cancelled"
+        )
+        self.post_event({"event": "charge.success", "data": {"id": 42, "reference": "Order-1"}})
+
+        with self.assertLogs("store.services.paystack_events", "WARNING") as logs:
+            call_command("process_paystack_events", stdout=io.StringIO())
+        self.assertIn(str(order.pk), logs.output[0])
+        order.refresh_from_db()
+        self.assertEqual((order.status, order.payment_needs_review), ("cancelled", True))
+
+    def test_events_without_ids_are_kept_apart(self):
+        for n in range(2):
+            self.post_event({"event": "transfer.success", "data": {"amount": n}})
+        self.post_event({"event": "transfer.success", "data": {"amount": 1}})
+        self.assertEqual(PaystackEvent.objects.count(), 2)
+
+    def test_rejects_bad_signature(self):
+        response = self.client.post(
+            "/api/paystack/webhook/", {"event": "charge.success"}, format="json",
+            HTTP_X_PAYSTACK_SIGNATURE="nope",
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(PaystackEvent.objects.exists())
+
+
+@mock.patch("store.services.paystack.verify_transaction", return_value={"data": {"status": "success"}})
+class PaymentVerifyTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+        self.order = Order.objects.create(user=self.user, total_amount=100, paystack_reference="Order-1")
+
+    def verify(self, reference="Order-1"):
+        return self.client.get("/api/cart/verify_payment/", {"reference": reference})
+
+    def test_verified_payment_marks_order_paid(self, verify):
+        self.assertEqual(self.verify().status_code, 200)
+        self.assertEqual(self.verify().status_code, 200)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, "paid")
+
+    def test_payment_for_cancelled_order_is_not_reported_verified(self, verify):
+        Order.objects.filter(pk=self.order.pk).update(status="cancelled")
+        with self.assertLogs("store.services.paystack_events", "WARNING"):
+            response = self.verify()
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["error"], "Cannot change status from cancelled to paid")
+        self.order.refresh_from_db()
+        self.assertEqual((self.order.status, self.order.payment_needs_review), ("cancelled", True))
+
+        self.assertEqual(self.verify("Order-2").status_code, 404)
+
+    def test_paystack_verify_checks_the_order(self, verify):
+        url = "/api/cart/paystack_verify/"
+        response = self.client.post(url, {"reference": f"ORDER_{self.order.pk}"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, "paid")
+
+        Order.objects.filter(pk=self.order.pk).update(status="cancelled")
+        with self.assertLogs("store.services.paystack_events", "WARNING"):
+            response = self.client.post(url, {"reference": f"ORDER_{self.order.pk}"}, format="json")
+        self.assertEqual(response.status_code, 409)
+
+        for reference in ("ORDER_999", "ORDER_x"):
+            response = self.client.post(url, {"reference": reference}, format="json")
+            self.assertEqual(response.status_code, 404)
+
+
+class OrderStatusTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.staff)
+
+    def bulk(self, ids, status):
+        return self.client.post("/api/orders/bulk-status/", {"ids": ids, "status": status}, format="json")
+
+    def make_orders(self, status, n):
+        orders = [self.make_order(self.user, lines=1) for _ in range(n)]
+        Order.objects.filter(pk__in=[o.pk for o in orders]).update(status=status)
+        rebuild_sales_rollup()
+        return [o.pk for o in orders]
+
+    def test_bulk_moves_allowed_orders_and_reports_the_rest(self):
+        paid = self.make_orders("paid", 3)
+        pending = self.make_orders("pending", 1)
+
+        response = self.bulk(paid + pending + [999], "shipped")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["updated"], paid)
+        self.assertEqual(response.data["failed"], [
+            {"id": pending[0], "error": "Cannot change status from pending to shipped"},
+            {"id": 999, "error": "Order not found"},
+        ])
+        self.assertEqual(Order.objects.filter(status="shipped").count(), 3)
+        self.assertFalse(Order.objects.filter(status="shipped", status_changed_at__isnull=True).exists())
+
+    def make_spread_orders(self, n):
+        # One category and state per order, so every order has its own cells.
+        ids = []
+        for _ in range(n):
+            category = Category.objects.create(name=f"Category {Category.objects.count()}")
+            order = Order.objects.create(user=self.user, total_amount=10, state=category.name, status="paid")
+            OrderItem.objects.create(order=order, product=self.make_product(category=category), quantity=1, price=10)
+            ids.append(order.pk)
+        rebuild_sales_rollup()
+        return ids
+
+    def test_query_count_does_not_depend_on_order_or_cell_count(self):
+        for n in (2, 20):
+            ids = self.make_spread_orders(n)
+            with self.assertNumQueries(11):
+                self.bulk(ids, "shipped")
+        self.assertFalse(SalesRollup.objects.filter(status="paid").exclude(orders=0).exists())
+        self.assertEqual(SalesRollup.objects.filter(status="shipped", category=None).count(), 22)
+
+    def test_single_status_change_stays_within_query_budget(self):
+        order = self.make_spread_orders(1)[0]
+        with self.assertNumQueries(13), self.assertNoLogs("store.requests", "WARNING"):
+            response = self.client.patch(f"/api/orders/{order}/", {"status": "shipped"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_cancel_refiles_rollup_and_releases_stock(self):
+        pending = self.make_orders("pending", 2)
+        paid = self.make_orders("paid", 1)
+        Order.objects.filter(pk=pending[0]).update(stock_held_until=timezone.now() + timedelta(hours=1))
+
+        with self.assertNoLogs("store.requests", "WARNING"):
+            response = self.bulk(pending + paid, "cancelled")
+        self.assertEqual(response.data["updated"], pending + paid)
+
+        def cube():
+            return sorted(
+                SalesRollup.objects.exclude(orders=0)
+                .values_list("category_id", "status", "orders", "units", "revenue"),
+                key=str,
+            )
+
+        incremental = cube()
+        rebuild_sales_rollup()
+        self.assertEqual(cube(), incremental)
+        # Only the held order's product gets its unit back.
+        self.assertEqual(sorted(Product.objects.values_list("stock", flat=True)), [50, 50, 51])
+
+    def test_order_changed_by_another_request_is_reported(self):
+        ids = self.make_orders("pending", 2)
+        real_predecessors = order_status.predecessors
+
+        def race(status):
+            # Another admin cancels the first order after the statuses were read.
+            Order.objects.filter(pk=ids[0]).update(status="cancelled")
+            return real_predecessors(status)
+
+        with mock.patch("store.services.order_status.predecessors", side_effect=race):
+            moved, failed = order_status.transition(ids, "paid")
+
+        self.assertEqual(moved, [ids[1]])
+        self.assertEqual(failed, {ids[0]: "Order status changed by another request"})
+        self.assertEqual(Order.objects.get(pk=ids[0]).status, "cancelled")
+
+    def test_single_order_update_uses_transition(self):
+        [pk] = self.make_orders("pending", 1)
+        response = self.client.patch(f"/api/orders/{pk}/", {"status": "paid"}, format="json")
+        self.assertEqual(response.data["status"], "paid")
+        self.assertIsNotNone(Order.objects.get(pk=pk).paid_at)
+
+        response = self.client.patch(f"/api/orders/{pk}/", {"status": "completed"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["Error"], "Cannot change status from paid to completed")
+
+    def test_rejects_bad_requests(self):
+        self.assertEqual(self.bulk([], "paid").status_code, 400)
+        self.assertEqual(self.bulk(["1"], "paid").status_code, 400)
+        self.assertEqual(self.bulk([1], "lost").status_code, 400)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.bulk([1], "paid").status_code, 403)
+
+
+@mock.patch("store.services.paystack.initialize_transaction", return_value={
+    "status": True,
+    "data": {"reference": "ref-1", "authorization_url": "https://checkout.paystack.com/x"},
+})
+class SalesRollupTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.shoes = Category.objects.create(name="Shoes")
+        self.client.force_authenticate(self.user)
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.make_product(price=100), quantity=2)
+        CartItem.objects.create(cart=cart, product=self.make_product(category=self.shoes, price=50), quantity=1)
+
+    def checkout(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/cart/checkout/", {"address": "1 Marina", "city": "Ikeja", "state": "Lagos"}, format="json"
+            )
+        return Order.objects.get(pk=response.data["order_id"])
+
+    def cube(self):
+        return sorted(
+            SalesRollup.objects.exclude(orders=0, units=0, revenue=0)
+            .values_list("state", "category_id", "status", "orders", "units", "revenue"),
+            key=lambda row: (row[1] or 0, row[2]),
+        )
+
+    def test_checkout_and_status_changes_update_cube(self, initialize):
+        order = self.checkout()
+        self.assertEqual(self.cube(), [
+            ("Lagos", None, "pending", 1, 3, 5250),
+            ("Lagos", self.category.pk, "pending", 1, 2, 200),
+            ("Lagos", self.shoes.pk, "pending", 1, 1, 50),
+        ])
+
+        self.client.force_authenticate(self.staff)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f"/api/orders/{order.pk}/", {"status": "paid"}, format="json")
+        self.assertEqual([row[2] for row in self.cube()], ["paid"] * 3)
+
+        response = self.client.get("/api/admin/analytics/")
+        self.assertEqual(response.data["summary"]["total_revenue"], 5250)
+        self.assertEqual(response.data["summary"]["pending_orders"], 1)
+        self.assertEqual(response.data["daily_sales"][0]["total"], 5250)
+        self.assertEqual(
+            [(row["product__name"], row["quantity_sold"]) for row in response.data["top_products"]],
+            [("IPhone 14 Pro", 2), ("IPhone 14 Pro", 1)],
+        )
+
+    def test_rebuild_matches_incremental_cube(self, initialize):
+        order = self.checkout()
+        order.status = "cancelled"
+        order.save()
+        incremental = self.cube()
+
+        rebuild_sales_rollup()
+        self.assertEqual(self.cube(), incremental)
+
+        order.delete()
+        self.assertEqual(self.cube(), [])
+
+    def test_orders_created_outside_checkout_are_counted_once(self, initialize):
+        # Never filed: TestCase does not run the on_commit hook.
+        unfiled = self.make_order(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            filed = self.make_order(self.user)
+        line = filed.items.first()
+        line.quantity = 3
+        with self.captureOnCommitCallbacks(execute=True):
+            line.save()
+
+        order_status.transition([unfiled.pk, filed.pk], "paid")
+        self.assertFalse(
+            SalesRollup.objects.filter(Q(orders__lt=0) | Q(units__lt=0) | Q(revenue__lt=0)).exists()
+        )
+        self.assertEqual([row[3:5] for row in self.cube()], [(2, 6), (2, 6)])
+
+        incremental = self.cube()
+        rebuild_sales_rollup()
+        self.assertEqual(self.cube(), incremental)
+
+
+class DashboardCacheTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.staff)
+        self.order = self.make_order(self.user)
+
+    def test_dashboard_is_cached_until_an_order_changes(self):
+        with self.assertNumQueries(3):
+            self.client.get("/api/admin/analytics/")
+        with self.assertNumQueries(0):
+            self.client.get("/api/admin/analytics/")
+        with self.assertNumQueries(3):
+            self.client.get("/api/admin/analytics/?fresh=1")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order.status = "cancelled"
+            self.order.save(update_fields=["status"])
+        with self.assertNumQueries(3):
+            self.client.get("/api/admin/analytics/")
+
+
+class ConditionalCatalogTests(StoreTestCase):
+    def test_unchanged_catalog_answers_304_without_catalog_queries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = self.make_product()
+        response = self.client.get("/api/products/")
+        etag = response["ETag"]
+        self.assertTrue(response.has_header("Last-Modified"))
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/products/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.price = 40000
+            product.save()
+        response = self.client.get("/api/products/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_depends_on_query(self):
+        first = self.client.get("/api/categories/")["ETag"]
+        self.assertNotEqual(first, self.client.get("/api/categories/?page=2")["ETag"])
+
+
+class CatalogCacheTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product = self.make_product()
+
+    def test_anonymous_reads_are_cached_until_catalog_changes(self):
+        first = self.client.get("/api/products/?category=%d" % self.category.pk)
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/products/?category=%d" % self.category.pk)
+        self.assertEqual(first.data, second.data)
+
+        get_catalog_cache().local.clear()
+        with self.assertNumQueries(0):
+            self.client.get("/api/products/?category=%d" % self.category.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = "IPhone 15"
+            self.product.save()
+        response = self.client.get("/api/products/?category=%d" % self.category.pk)
+        self.assertEqual(response.data[0]["name"], "IPhone 15")
+
+        stats = get_catalog_cache().stats()
+        self.assertEqual((stats["local_hits"], stats["shared_hits"]), (1, 1))
+
+    def test_authenticated_reads_bypass_cache(self):
+        self.client.get("/api/categories/")
+        self.client.force_authenticate(self.staff)
+        with self.assertNumQueries(1):
+            self.client.get("/api/categories/")
+
+
+class ProductSearchTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.phone = self.make_product(name="Galaxy S23", description="Android phone")
+            self.case = self.make_product(name="Leather case", description="Fits the Galaxy S23")
+            laptops = Category.objects.create(name="Laptops")
+            self.laptop = self.make_product(
+                name="ThinkPad X1", description="Business notebook", category=laptops
+            )
+
+    def search(self, query):
+        response = self.client.get("/api/products/search/", {"q": query})
+        self.assertEqual(response.status_code, 200)
+        return [product["id"] for product in response.data]
+
+    def test_ranks_name_matches_above_description_matches(self):
+        self.assertEqual(self.search("galaxy"), [self.phone.pk, self.case.pk])
+        self.assertEqual(self.search("galaxy leath"), [self.case.pk])
+        self.assertEqual(self.search("laptops"), [self.laptop.pk])
+        self.assertEqual(self.search("tablet"), [])
+
+    def test_index_follows_catalog_writes(self):
+        self.assertEqual(self.search("thinkpad"), [self.laptop.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.laptop.name = "Yoga Slim"
+            self.laptop.save()
+        self.assertEqual(self.search("thinkpad"), [])
+        self.assertEqual(self.search("yoga"), [self.laptop.pk])
+
+    def test_query_is_required(self):
+        response = self.client.get("/api/products/search/")
+        self.assertEqual(response.status_code, 400)
+
+
+class ProductFilterTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        laptops = Category.objects.create(name="Laptops")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cheap = self.make_product(price=8000, tag="special_sale", is_on_sale=True)
+            self.phone = self.make_product(price=60000)
+            self.sold_out = self.make_product(price=70000, stock=0)
+            self.laptop = self.make_product(price=700000, category=laptops, is_on_sale=True)
+
+    def ids(self, response):
+        results = response.data["results"] if isinstance(response.data, dict) else response.data
+        return sorted(product["id"] for product in results)
+
+    def test_filters_combine(self):
+        response = self.client.get("/api/products/", {"tag": "special_sale"})
+        self.assertEqual(self.ids(response), [self.cheap.pk])
+
+        response = self.client.get(
+            "/api/products/",
+            {"category": self.category.pk, "min_price": 10000, "in_stock": "true"},
+        )
+        self.assertEqual(self.ids(response), [self.phone.pk])
+
+        response = self.client.get("/api/products/", {"on_sale": "1", "max_price": 100000})
+        self.assertEqual(self.ids(response), [self.cheap.pk])
+
+        response = self.client.get("/api/products/", {"min_price": "cheap"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_facets_come_from_one_query(self):
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/products/", {"facets": "1", "min_price": 50000})
+        self.assertEqual(
+            self.ids(response), [self.phone.pk, self.sold_out.pk, self.laptop.pk]
+        )
+
+        facets = response.data["facets"]
+        self.assertEqual(
+            [(c["name"], c["count"]) for c in facets["category"]], [("Phones", 2), ("Laptops", 1)]
+        )
+        self.assertEqual([(t["value"], t["count"]) for t in facets["tag"]], [("new_arrival", 3)])
+        self.assertEqual(
+            [(b["min"], b["max"], b["count"]) for b in facets["price"]],
+            [(50000, 100000, 2), (500000, None, 1)],
+        )
+        self.assertEqual([(f["value"], f["count"]) for f in facets["on_sale"]], [(True, 1), (False, 2)])
+
+        response = self.client.get("/api/products/", {"facets": "1", "page_size": 2})
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertEqual(sum(c["count"] for c in response.data["facets"]["category"]), 4)
+
+    def test_orders_and_filters_by_effective_price(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            deal = self.make_product(price=90000, discount_price=40000, is_on_sale=True)
+            self.make_product(price=20000, discount_price=10000)
+
+        response = self.client.get("/api/products/", {"min_price": 30000, "max_price": 50000})
+        self.assertEqual(self.ids(response), [deal.pk])
+
+        response = self.client.get("/api/products/", {"ordering": "effective_price", "page_size": 3})
+        self.assertEqual(
+            [p["effective_price"] for p in response.data["results"]], ["8000.00", "20000.00", "40000.00"]
+        )
+        response = self.client.get(response.data["next"])
+        self.assertEqual(
+            [p["effective_price"] for p in response.data["results"]], ["60000.00", "70000.00", "700000.00"]
+        )
+
+        response = self.client.get("/api/products/", {"ordering": "-stock"})
+        self.assertEqual(response.status_code, 400)
+
+
+@mock.patch("store.services.paystack.initialize_transaction", return_value={
+    "status": True,
+    "data": {"reference": "ref-1", "authorization_url": "https://checkout.paystack.com/x"},
+})
+class SaleScheduleTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        self.product = self.make_product(
+            price=1000, discount_price=600,
+            sale_starts_at=now - timedelta(minutes=1), sale_ends_at=now + timedelta(hours=1),
+        )
+        self.client.force_authenticate(self.user)
+        self.cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=self.cart, product=self.product, quantity=2)
+
+    def effective_price(self):
+        return Product.objects.values_list("effective_price", flat=True).get(pk=self.product.pk)
+
+    def test_schedule_starts_and_ends_sale(self, initialize):
+        self.assertEqual(self.effective_price(), 1000)
+
+        self.assertEqual(apply_sale_schedule(), (1, 0))
+        self.assertEqual(apply_sale_schedule(), (0, 0))
+        self.assertEqual(self.effective_price(), 600)
+
+        call_command("apply_sale_schedule", stdout=io.StringIO())
+        self.assertEqual(apply_sale_schedule(timezone.now() + timedelta(hours=2)), (0, 1))
+        self.assertEqual(self.effective_price(), 1000)
+
+    def test_manual_sale_updates_effective_price(self, initialize):
+        self.client.force_authenticate(self.staff)
+        response = self.client.patch(f"/api/products/{self.product.pk}/", {"is_on_sale": "true"})
+        self.assertEqual(response.data["effective_price"], "600.00")
+
+    def test_cart_and_checkout_charge_sale_price(self, initialize):
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_sale_schedule()
+        self.assertEqual(self.client.get("/api/cart/").data["items"][0]["price"], "600.00")
+
+        response = self.client.post(
+            "/api/cart/checkout/", {"address": "1 Marina", "city": "Ikeja", "state": "Lagos"}, format="json"
+        )
+        order = Order.objects.get(pk=response.data["order_id"])
+        self.assertEqual(order.total_amount, 2 * 600 + 5000)
+        self.assertEqual(order.items.get().price, 600)
+
+
+class ImageVariantTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        storages = {**settings.STORAGES, "default": {"BACKEND": "store.storage.VariantFileSystemStorage"}}
+        local_storage = override_settings(STORAGES=storages, MEDIA_ROOT=media.name, MEDIA_URL="/media/")
+        local_storage.enable()
+        self.addCleanup(local_storage.disable)
+        self.media = media.name
+
+    def upload(self, size=(1600, 1200)):
+        buffer = io.BytesIO()
+        Image.new("RGB", size, "teal").save(buffer, format="PNG")
+        return SimpleUploadedFile("phone.png", buffer.getvalue(), content_type="image/png")
+
+    def test_variants_are_rendered_on_save_and_listed(self):
+        product = self.make_product(image=self.upload())
+
+        for width, height in Product.IMAGE_VARIANTS.values():
+            path = os.path.join(self.media, "variants", f"{width}x{height}", "products", "phone.webp")
+            with Image.open(path) as variant:
+                self.assertEqual((variant.size, variant.format), ((width, height), "WEBP"))
+
+        images = self.client.get(f"/api/products/{product.pk}/").data["images"]
+        self.assertEqual(
+            images["thumb"], "http://localhost/media/variants/160x160/products/phone.webp"
+        )
+        self.assertEqual(images["srcset"].count("w,"), len(Product.IMAGE_VARIANTS) - 1)
+
+    def test_unreadable_upload_keeps_original_without_variants(self):
+        upload = SimpleUploadedFile("notes.png", b"not an image", content_type="image/png")
+        with self.assertLogs("store.storage", "WARNING"):
+            product = self.make_product(image=upload)
+
+        self.assertTrue(os.path.exists(os.path.join(self.media, product.image.name)))
+        self.assertFalse(os.path.exists(os.path.join(self.media, "variants")))
+
+    def test_cart_lines_use_thumbnails(self):
+        product = self.make_product(image=self.upload())
+        self.client.force_authenticate(self.user)
+        response = self.client.post("/api/cart/", {"product_id": product.pk}, format="json")
+        self.assertTrue(response.data["items"][0]["product_image"].endswith("/160x160/products/phone.webp"))
+
+    def test_created_product_reports_effective_price(self):
+        self.client.force_authenticate(self.staff)
+        response = self.client.post("/api/products/", {
+            "category": self.category.pk, "name": "Pixel 8", "description": "Android phone",
+            "price": 90000, "discount_price": 40000, "is_on_sale": "true", "stock": 5,
+            "image": self.upload(),
+        }, format="multipart")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["effective_price"], "40000.00")
+
+
+class ProductImportTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.staff)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.products = [self.make_product(name=f"Phone {n}", price=1000) for n in range(3)]
+
+    def test_csv_upload_updates_changed_fields_and_reports_errors(self):
+        rows = ["id,category,name,description,price,image"]
+        rows += [f"{p.pk},,,,1500," for p in self.products[:2]]
+        rows += [
+            f"{self.products[2].pk},,,,1000,",
+            ",phones,Pixel 8,Android phone,90000,products/pixel.png",
+            ",tablets,iPad,Tablet,1,products/ipad.png",
+            "999,,,,5,",
+            "abc,,,,-1,",
+        ]
+        upload = SimpleUploadedFile("prices.csv", "\n".join(rows).encode(), content_type="text/csv")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/products/bulk/", {"file": upload}, format="multipart")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {key: response.data[key] for key in ("created", "updated", "unchanged")},
+            {"created": 1, "updated": 2, "unchanged": 1},
+        )
+        self.assertEqual([error["row"] for error in response.data["errors"]], [5, 6, 7])
+        self.assertEqual(
+            sorted(Product.objects.values_list("price", flat=True)), [1000, 1500, 1500, 90000]
+        )
+        self.assertEqual(Product.objects.get(name="Pixel 8").category, self.category)
+
+        # The catalog caches and search index see the import.
+        response = self.client.get("/api/products/search/", {"q": "pixel"})
+        self.assertEqual(len(response.data), 1)
+
+    def test_query_count_does_not_depend_on_row_count(self):
+        for price in (2000, 3000):
+            rows = [{"id": p.pk, "price": str(price)} for p in self.products]
+            rows += [{"category": "phones", "name": f"New {n}", "description": "x", "price": "5",
+                      "image": "products/new.png"} for n in range(price // 1000)]
+            with self.assertNumQueries(6):
+                response = self.client.post("/api/products/bulk/", rows, format="json")
+            self.assertEqual(response.data["errors"], [])
+
+    def test_dry_run_and_staff_only(self):
+        rows = [{"id": self.products[0].pk, "price": "1"}]
+        response = self.client.post("/api/products/bulk/?dry_run=1", rows, format="json")
+        self.assertEqual(response.data["updated"], 1)
+        self.assertFalse(Product.objects.filter(price=1).exists())
+
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.post("/api/products/bulk/", rows, format="json").status_code, 403)
+
+    def test_non_utf8_upload_is_rejected(self):
+        content = "id,price\n1,5\nCaf\xe9,1\n".encode("latin-1")
+        upload = SimpleUploadedFile("prices.csv", content, content_type="text/csv")
+        response = self.client.post("/api/products/bulk/", {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["error"], "File must be UTF-8 encoded")
+
+        with tempfile.NamedTemporaryFile("wb", suffix=".csv", delete=False) as source:
+            source.write(content)
+        self.addCleanup(os.unlink, source.name)
+        with self.assertRaisesMessage(CommandError, "File must be UTF-8 encoded"):
+            call_command("import_products", source.name, stdout=io.StringIO())
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as source:
+            json.dump([{"id": self.products[0].pk, "stock": 7}], source)
+        self.addCleanup(os.unlink, source.name)
+
+        out = io.StringIO()
+        call_command("import_products", source.name, stdout=out)
+        self.assertIn("1 updated", out.getvalue())
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].stock, 7)
+
+
+class BenchmarkTests(StoreTestCase):
+    def test_seed_store_creates_consistent_data(self):
+        out = io.StringIO()
+        call_command("seed_store", users=5, categories=2, products=20, reviews=30, carts=3, orders=10, stdout=out)
+        self.assertIn("20 products", out.getvalue())
+
+        self.assertEqual(Product.objects.count(), 20)
+        self.assertEqual(Order.objects.count(), 10)
+        self.assertEqual(OrderItem.objects.count(), 30)
+        self.assertEqual(
+            sum(Product.objects.values_list("review_count", flat=True)), 30
+        )
+        totals = SalesRollup.objects.filter(category__isnull=True)
+        self.assertEqual(sum(totals.values_list("orders", flat=True)), 10)
+
+    def test_every_route_is_benchmarked_without_errors(self):
+        report = benchmark.run_benchmark([20], repeat=1)
+        results = {result["endpoint"]: result for result in report["results"]}
+        self.assertEqual(set(results), {endpoint.name for endpoint in benchmark.ENDPOINTS})
+        self.assertEqual({result["route"] for result in results.values()}, benchmark.app_routes())
+        failures = {name: r["status"] for name, r in results.items() if max(r["status"]) >= 400}
+        self.assertEqual(failures, {})
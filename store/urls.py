@@ -3,6 +3,8 @@ from rest_framework import routers
 from .views import ProductViewSet, CategoryViewSet, CartViewSet, OrderViewSet, paystack_webhook
 from store.api.admin_analytics_views import AdminDashboardAnalytics
 from store.api.debug_auth_view import DebugJWTView
+from store.api.catalog_cache_view import CatalogCacheStats
+from store.api import async_views
 
 router = routers.DefaultRouter()
 router.register(r'products', ProductViewSet)
@@ -15,4 +17,9 @@ urlpatterns = [
     path("paystack/webhook/", paystack_webhook),
     path("debug/jwt/", DebugJWTView.as_view()),
     path("admin/analytics/", AdminDashboardAnalytics.as_view()),
+    path("admin/catalog-cache/", CatalogCacheStats.as_view()),
+    path("async/products/", async_views.product_list, name="async-product-list"),
+    path("async/products/<int:pk>/", async_views.product_detail, name="async-product-detail"),
+    path("async/categories/", async_views.category_list, name="async-category-list"),
+    path("async/cart/", async_views.cart_list, name="async-cart-list"),
 ]
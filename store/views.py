@@ -1,46 +1,59 @@
 import hashlib
+import logging
 from django.views.decorators.csrf import csrf_exempt
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.conf import settings
-from django.db.models import Sum, Avg
 from rest_framework import viewsets, status, permissions, authentication
 from rest_framework.permissions import SAFE_METHODS, BasePermission, IsAuthenticated, IsAdminUser, AllowAny
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
 from rest_framework.decorators import action
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from rest_framework.response import Response
 
 from .models import Product, Category, Cart, CartItem, Order, OrderItem
-from .serializers import ProductSerializer, CategorySerializer, CartSerializer, OrderSerializer
+from .serializers import ProductSerializer, CategorySerializer, OrderSerializer
 from .permissions import IsAdminOrReadOnly,  PublicReadAdminWrite
-
-from paystackapi.transaction import Transaction
+from .pagination import KeysetPagination
+from .renderers import CSVRenderer, NDJSONRenderer
+from .mixins import (
+    CatalogCacheMixin, CatalogConditionalGetMixin, FacetedListMixin, ReplicaReadMixin,
+    SerializerOptimizedQuerysetMixin,
+)
+from store.services.checkout import place_order
+from store.services.stock import InsufficientStock
+from store.services.product_filters import facet_counts, filter_products
+from store.services.search import search_products
+
+from store.services import cart_batch, cart_snapshot, order_export, order_status, paystack, product_import
+from store.services.paystack import PaystackError
+from store.services.paystack_events import mark_order_paid, record_event
 from django.utils import timezone
+from functools import partial
 import json
 
+logger = logging.getLogger(__name__)
+
 DELIVERY_FEES = {
     "lagos": 5000,
     "ogun": 8000,
     "oyo": 8000,
 }
 
-ALLOWED_STATUS_TRANSITIONS = {
-    "pending": ["paid", "cancelled"],
-    "paid": ["shipped", "cancelled"],
-    "shipped": ["delivered"],
-    "delivered": ["completed"],
-    "completed": [],
-    "cancelled": [],
-}
+def payment_unavailable(exc):
+    return Response(
+        {"error": "Payment provider unavailable", "message": str(exc)},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(ReplicaReadMixin, SerializerOptimizedQuerysetMixin, viewsets.ModelViewSet):
     # queryset = Order.objects.all().order_by('-created_at')
     # serializer_class = OrderSerializer
     # permission_classes = [IsAdminUser]
 
     serializer_class = OrderSerializer
-    print("🔥 LOADED OrderViewSet from:", __file__)
+    pagination_class = KeysetPagination
+    replica_actions = ("list",)
 
     def get_permissions(self):
         if self.action in ["list", "retrieve"]:
@@ -56,43 +69,72 @@ class OrderViewSet(viewsets.ModelViewSet):
     def partial_update(self, request, *args, **kwargs):
         order = self.get_object()
         new_status = request.data.get("status")
-        status_value = request.data.get("status")
 
         if not new_status:
             return Response(
                 {"Error": "Status is Required"}, status=status.HTTP_400_BAD_REQUEST,
             )
 
-        allowed = ALLOWED_STATUS_TRANSITIONS.get(order.status, [])
-
-        if new_status not in allowed:
+        _, failed = order_status.transition([order.pk], new_status)
+        if failed:
             return Response(
-                {"Error": f"Cannot change status from {order.status} to {new_status}"},
-                status=status.HTTP_400_BAD_REQUEST,
+                {"Error": failed[order.pk]}, status=status.HTTP_400_BAD_REQUEST,
             )
 
+        # The only changed field the serializer shows; no need to reload.
         order.status = new_status
-        order.save(update_fields=["status"])
-
-        # if status_value:
-        #     order.status = status_value
-        #     order.save()
-
         serializer = self.get_serializer(order)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=["post"], url_path="bulk-status")
+    def bulk_status(self, request):
+        ids, new_status = order_status.parse_bulk_request(request.data)
+        moved, failed = order_status.transition(ids, new_status)
+        return Response({
+            "updated": moved,
+            "failed": [{"id": pk, "error": reason} for pk, reason in sorted(failed.items())],
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"], renderer_classes=[CSVRenderer, NDJSONRenderer])
+    def export(self, request):
+        orders = order_export.filter_orders(request.query_params)
+        renderer = request.accepted_renderer
+        if renderer.format == "ndjson":
+            rows = order_export.ndjson_lines(orders)
+        else:
+            rows = order_export.csv_rows(orders)
+
+        response = StreamingHttpResponse(rows, content_type=renderer.media_type)
+        response["Content-Disposition"] = (
+            f'attachment; filename="orders-{timezone.now():%Y%m%d}.{renderer.format}"'
+        )
+        return response
+
 
 class CartViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
 
+    def get_authenticators(self):
+        # Cart reads (badge polling) trust the signed token alone, so a
+        # cached snapshot is served without loading the user row.
+        if self.action_map.get(self.request.method.lower()) == "list":
+            return [JWTStatelessUserAuthentication()]
+        return super().get_authenticators()
+
     def get_cart(self, user):
-        cart, _ = Cart.objects.get_or_create(user=user)
+        cart, _ = Cart.objects.get_or_create(user_id=user.pk)
         return cart
 
+    def get_cart_data(self, cart, request):
+        """Return the cart payload after a write, rebuilding the snapshot."""
+        cart_snapshot.cart_changed(cart.pk)
+        return cart_snapshot.build(cart, request)
+
     def list(self, request):
-        cart = self.get_cart(request.user)
-        serializer = CartSerializer(cart, context={'request': request})
-        return Response(serializer.data)
+        data = cart_snapshot.get(request.user.pk)
+        if data is None:
+            data = cart_snapshot.build(self.get_cart(request.user), request)
+        return Response(data)
 
     def create(self, request):
         cart = self.get_cart(request.user)
@@ -124,8 +166,10 @@ class CartViewSet(viewsets.ViewSet):
 
         item.save()
 
-        serializer = CartSerializer(cart, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(
+            self.get_cart_data(cart, request),
+            status=status.HTTP_201_CREATED,
+        )
 
     @action(detail=False, methods=["post"])
     def update_quantity(self, request):
@@ -156,8 +200,10 @@ class CartViewSet(viewsets.ViewSet):
             else:
                 item.save()
 
-        serializer = CartSerializer(cart, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(
+            self.get_cart_data(cart, request),
+            status=status.HTTP_200_OK,
+        )
 
     @action(detail=False, methods=["post"])
     def remove_item(self, request):
@@ -171,26 +217,26 @@ class CartViewSet(viewsets.ViewSet):
             )
 
         CartItem.objects.filter(id=item_id, cart=cart).delete()
+        return Response(self.get_cart_data(cart, request), status=status.HTTP_200_OK)
 
-        serializer = CartSerializer(cart, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+    @action(detail=False, methods=["post"])
+    def batch(self, request):
+        operations = request.data.get("operations") if hasattr(request.data, "get") else None
+        cart = self.get_cart(request.user)
+        cart_batch.apply_operations(cart, operations)
+        return Response(self.get_cart_data(cart, request), status=status.HTTP_200_OK)
 
     @action(detail=False, methods=["post"])
     def clear(self, request):
         cart = self.get_cart(request.user)
         cart.items.all().delete()
+        cart_snapshot.cart_changed(cart.pk)
         return Response({"message": "Cart cleared"}, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=["post"])
     def checkout(self, request):
         cart = self.get_cart(request.user)
 
-        if not cart.items.exists():
-            return Response(
-                {"error": "Cart is empty"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
         address = request.data.get("address")
         city = request.data.get("city")
         state = request.data.get("state")
@@ -208,44 +254,38 @@ class CartViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        cart_total = sum(
-            item.product.price * item.quantity for item in cart.items.all()
-        )
-
-        delivery_fee = DELIVERY_FEES[state_key]
-
-        total_amount = cart_total + delivery_fee
-
-        order = Order.objects.create(
-            user=request.user,
-            total_amount=total_amount,
-            delivery_fee=delivery_fee,
-            address=address,
-            city=city,
-            state=state,
-            status="pending"
-        )
-        for item in cart.items.all():
-            OrderItem.objects.create(
-                order=order,
-                product=item.product,
-                quantity=item.quantity,
-                price=item.product.price
+        try:
+            order = place_order(
+                cart,
+                request.user,
+                address=address,
+                city=city,
+                state=state,
+                delivery_fee=DELIVERY_FEES[state_key],
             )
+        except InsufficientStock as exc:
+            return Response(
+                {"error": "Not enough stock", "products": exc.product_ids},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if order is None:
+            return Response(
+                {"error": "Cart is empty"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        total_amount = order.total_amount
 
         paystack_amount = int(total_amount * 100)  # amount in kobo
 
-        response = Transaction.initialize(
-            reference=f"Order-{order.id}",
-            amount=paystack_amount,
-            email=request.user.email or "test@example.com",
-            callback_url="http://localhost:3000/payment/success",
-            secret_key=settings.PAYSTACK_SECRET_KEY,
-        )
-        order.paystack_reference = response["data"]["reference"]
-        order.save()
-
-        cart.items.all().delete()  # clear cart after checkout
+        try:
+            response = paystack.initialize_transaction(
+                reference=f"Order-{order.id}",
+                amount=paystack_amount,
+                email=request.user.email or "test@example.com",
+                callback_url="http://localhost:3000/payment/success",
+            )
+        except PaystackError as exc:
+            return payment_unavailable(exc)
 
         if not response.get("status"):
             return Response(
@@ -256,6 +296,9 @@ class CartViewSet(viewsets.ViewSet):
                 status=400,
             )
 
+        order.paystack_reference = response["data"]["reference"]
+        order.save(update_fields=["paystack_reference"])
+
         return Response({
             "payment_url": response["data"]["authorization_url"],
             "reference": response["data"]["reference"],
@@ -269,15 +312,18 @@ class CartViewSet(viewsets.ViewSet):
         if not reference:
             return Response({"error": "Reference is required"}, status=400)
 
-        response = Transaction.verify(
-            reference=reference
-        )
-
-        if response["data"]["status"] == "success":
-            order = Order.objects.get(paystack_reference=reference)
-            order.status = "paid"
-            order.paid_at = timezone.now()
-            order.save()
+        try:
+            response = paystack.verify_transaction(reference)
+        except PaystackError as exc:
+            return payment_unavailable(exc)
+
+        if (response.get("data") or {}).get("status") == "success":
+            order = Order.objects.filter(paystack_reference=reference).first()
+            if order is None:
+                return Response({"error": "Order not found"}, status=404)
+            error = mark_order_paid(order.pk)
+            if error:
+                return Response({"error": error}, status=409)
 
             return Response({
                 "message": "Payment verified",
@@ -298,11 +344,14 @@ class CartViewSet(viewsets.ViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        response = Transaction.initialize(
-            email=request.user.email,
-            amount=int(order.total_amount * 100),  # amount in kobo
-            reference=f"ORDER-{order.id}"
-        )
+        try:
+            response = paystack.initialize_transaction(
+                email=request.user.email,
+                amount=int(order.total_amount * 100),  # amount in kobo
+                reference=f"ORDER-{order.id}"
+            )
+        except PaystackError as exc:
+            return payment_unavailable(exc)
         return Response(response, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=["post"])
@@ -314,17 +363,21 @@ class CartViewSet(viewsets.ViewSet):
                 {"error": "Payment reference is required"},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        response = Transaction.verify(reference=reference)
+        try:
+            response = paystack.verify_transaction(reference)
+        except PaystackError as exc:
+            return payment_unavailable(exc)
 
-        if response['data']['status'] == 'success':
+        if (response.get('data') or {}).get('status') == 'success':
             order_id = reference.replace("ORDER_", "")
-
-            try:
-                order = Order.objects.get(id=order_id)
-                order.status = "paid"
-                order.save()
-            except Order.DoesNotExist:
-                pass
+            if not order_id.isdecimal() or not Order.objects.filter(id=order_id).exists():
+                return Response(
+                    {"error": "Order not found"},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            error = mark_order_paid(int(order_id))
+            if error:
+                return Response({"error": error}, status=status.HTTP_409_CONFLICT)
 
             return Response(
                 {"message": "Payment verified successfully"},
@@ -348,25 +401,29 @@ def paystack_webhook(request):
     if computed_signature != paystack_signature:
         return HttpResponse(status=401)
 
-    payload = json.loads(request.body)
-
-    if payload["event"] == "charge.success":
-        reference = payload["data"]["reference"]
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return HttpResponse(status=400)
+    if not isinstance(payload, dict):
+        return HttpResponse(status=400)
 
-        try:
-            order = Order.objects.get(paystack_reference=reference)
-            order.status = "paid"
-            order.paid_at = timezone.now()
-            order.save()
-        except Order.DoesNotExist:
-            pass
+    # Acknowledge right away; process_paystack_events applies the log.
+    record_event(payload, request.body)
 
     return HttpResponse(status=200)
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(
+    ReplicaReadMixin,
+    CatalogConditionalGetMixin,
+    CatalogCacheMixin,
+    SerializerOptimizedQuerysetMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    catalog_models = ("category",)
 
     authentication_classes = [
         JWTAuthentication,
@@ -392,9 +449,17 @@ class CategoryViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(
+    ReplicaReadMixin,
+    CatalogConditionalGetMixin,
+    CatalogCacheMixin,
+    FacetedListMixin,
+    SerializerOptimizedQuerysetMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
+    catalog_models = ("product",)
 
     authentication_classes = [
         JWTAuthentication,
@@ -404,34 +469,63 @@ class ProductViewSet(viewsets.ModelViewSet):
 
     permission_classes = [PublicReadAdminWrite]
     parser_classes = [MultiPartParser, FormParser]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        queryset = Product.objects.all()
+        return filter_products(Product.objects.all(), self.request.query_params)
 
-        category_id = self.request.query_params.get("category")
-        tag = self.request.query_params.get("tag")
-        if category_id:
-            queryset = queryset.filter(category_id=category_id)
+    def get_facets(self, queryset):
+        return facet_counts(queryset)
 
-        if tag == "best_seller":
-            queryset = queryset.annotate(
-                total_sold=Sum("items__quantity")
-            ).order_by("-total_sold")
+    @action(detail=False, methods=["post"], parser_classes=[JSONParser, MultiPartParser])
+    def bulk(self, request):
+        # JSON list (or {"products": [...]}), or an uploaded CSV/JSON "file".
+        upload = request.FILES.get("file")
+        try:
+            if upload is not None:
+                fmt = "json" if upload.name.lower().endswith(".json") else "csv"
+                rows = product_import.read_rows(upload.read(), fmt)
+            else:
+                rows = request.data
+                if isinstance(rows, dict):
+                    rows = rows.get("products")
+                if not isinstance(rows, list):
+                    raise product_import.ImportFormatError("Expected a list of products")
+        except product_import.ImportFormatError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = request.query_params.get("dry_run") in ("1", "true")
+        summary = product_import.import_products(rows, dry_run=dry_run)
+        return Response(summary, status=status.HTTP_200_OK)
 
-        elif tag == "top_rated":
-            queryset = queryset.annotate(
-                avg_rating=Avg("reviews__rating")
-            ).order_by("-avg_rating")
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        # Category renames change results too; "search" is bumped for both.
+        self.catalog_models = ("product", "search")
+        return self.conditional_response(
+            partial(self.cached_response, self.search_results), request
+        )
 
-        elif tag:
-            queryset = queryset.filter(tags=tag)
+    def search_results(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response({"error": "q is required"}, status=400)
+        try:
+            limit = min(max(int(request.query_params.get("limit", 20)), 1), 100)
+        except ValueError:
+            return Response({"error": "limit must be a number"}, status=400)
 
-        return queryset
+        ids = search_products(query, limit)
+        products = self.filter_queryset(Product.objects.filter(pk__in=ids)).in_bulk()
+        serializer = self.get_serializer(
+            [products[pk] for pk in ids if pk in products], many=True
+        )
+        return Response(serializer.data)
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         if not serializer.is_valid():
-            print("❌ SERIALIZER ERRORS:", serializer.errors)
+            logger.info("Product create rejected: %s", serializer.errors)
             return Response(serializer.errors, status=400)
 
         self.perform_create(serializer)
@@ -445,7 +539,7 @@ class ProductViewSet(viewsets.ModelViewSet):
         )
 
         if not serializer.is_valid():
-            print("❌ UPDATE ERRORS:", serializer.errors)
+            logger.info("Product update rejected: %s", serializer.errors)
             return Response(serializer.errors, status=400)
 
         self.perform_update(serializer)